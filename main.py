@@ -1,20 +1,90 @@
 # #!/usr/bin/python
+import os
 import sys
+import signal
+from typing import Optional
 
 from src.cli import CLI
 from src.darts import XOhOne
+from src.folded_legs import BoundedScoreboard
 from src.game_options import GameMode
+from src.journal import GAME_JOURNAL_FILE, GameJournal
+from src.match_snapshot import MATCH_SNAPSHOT_FILE, MatchSnapshots, resume_match
+
+PROFILE_ENV = "DARTS_PROFILE"  # "1" for latencies, "memory" to also trace memory
+SPECTATOR_ENV = "DARTS_SPECTATOR_PORT"  # port of the live feed for viewers
+RESUME_ARGUMENT = "--resume"  # continues the match of the last snapshot
+# "1" folds finished legs into summaries, any other value is the file their darts
+# are moved to, for all day sessions
+FOLD_LEGS_ENV = "DARTS_FOLD_LEGS"
+# files of the game journal and the match snapshot, "0" turns them off
+JOURNAL_ENV = "DARTS_JOURNAL"
+SNAPSHOT_ENV = "DARTS_SNAPSHOT"
+
+
+def file_option(env: str, default: str) -> Optional[str]:
+    file_name = os.environ.get(env) or default
+    return None if file_name == "0" else file_name
 
 
 def main() -> None:
+    if os.environ.get(PROFILE_ENV):
+        from src.instrumentation import profiler
+
+        profiler.enable(
+            trace_memory=os.environ[PROFILE_ENV] == "memory", report_on_exit=True
+        )
+        if hasattr(signal, "SIGUSR1"):  # kill -USR1 dumps the report while playing
+            signal.signal(signal.SIGUSR1, lambda *_: profiler.dump())
     ui = CLI()
-    players = ui.read_players()
-    if not len(players):
-        sys.exit("The game was canceled, no players found")
-    game_opt = ui.read_game_options(players)
-    if game_opt.game_mode == GameMode.XOhOne:
-        game = XOhOne(ui, players, game_opt)
-    game.play()
+    journal_file = file_option(JOURNAL_ENV, GAME_JOURNAL_FILE)
+    snapshot_file = file_option(SNAPSHOT_ENV, MATCH_SNAPSHOT_FILE)
+    resumed = None
+    if RESUME_ARGUMENT in sys.argv[1:]:
+        if not snapshot_file:
+            sys.exit(f"Cannot resume, {SNAPSHOT_ENV} turns the snapshot off")
+        resumed = resume_match(snapshot_file, journal_file)
+    if resumed:
+        players = [player.name for player in resumed.scoreboard.get_players()]
+        game_opt = resumed.scoreboard.game_options
+    else:
+        players = ui.read_players()
+        if not len(players):
+            sys.exit("The game was canceled, no players found")
+        game_opt = ui.read_game_options(players)
+    feed = None
+    if os.environ.get(SPECTATOR_ENV):
+        from src.spectator import SpectatorFeed
+
+        feed = SpectatorFeed()
+        feed.start_in_thread(port=int(os.environ[SPECTATOR_ENV]))
+    snapshots = MatchSnapshots(snapshot_file) if snapshot_file else None
+    journal = GameJournal(journal_file) if journal_file else None
+    try:
+        if game_opt.game_mode == GameMode.XOhOne:
+            game = XOhOne(ui, players, game_opt, journal, feed, snapshots)
+        if os.environ.get(FOLD_LEGS_ENV) and not resumed:
+            # a resumed session keeps the scoreboard class of its snapshot
+            spill_file = os.environ[FOLD_LEGS_ENV]
+            game.scoreboard = BoundedScoreboard(
+                game_opt, None if spill_file == "1" else spill_file
+            )
+        try:
+            if resumed:
+                game.resume(resumed)
+                game.play_rounds()
+            else:
+                game.play()
+        except SystemExit:  # canceled, the match can be resumed
+            if snapshots and game.scoreboard.players:
+                snapshots.save(game.scoreboard, journal)
+            raise
+        finally:
+            if isinstance(game.scoreboard, BoundedScoreboard):
+                game.scoreboard.close()
+    finally:
+        if journal:  # writes what is still queued, e.g. the last snapshot
+            journal.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,274 @@
+from typing import Optional
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from src.checkout import get_checkout_table
+from src.game_options import GameOptions, InputMethod
+from src.history import ColumnarHistory
+from src.rules import BUST, LEG_WON, get_rules_of
+from src.scoreboard import Scoreboard, Turn
+from src.throw import THROW_TABLE
+
+FIRST_NINE_VISITS = 3
+# lower bounds of the tons, ton-forties and 180s, a visit counts in one band only
+VISIT_BANDS = [100, 140, 180]
+# a dart or visit is a checkout attempt if the score can be finished with it
+FINISHING_DARTS = {InputMethod.THREEDARTS: 1, InputMethod.ROUND: 3}
+NO_FINISH = 99
+
+
+@dataclass
+class PlayerAnalytics:
+    player: str
+    first_nine_points: int = 0
+    first_nine_visits: int = 0
+    checkout_attempts: int = 0
+    checkouts: int = 0
+    highest_finish: int = 0
+    tons: int = 0
+    ton_forties: int = 0
+    one_eighties: int = 0
+    best_leg: Optional[int] = None  # fewest darts of a won leg
+    worst_leg: Optional[int] = None
+
+    def first_nine_average(self) -> float:
+        if not self.first_nine_visits:
+            return 0
+        return self.first_nine_points / self.first_nine_visits
+
+    def checkout_percentage(self) -> float:
+        if not self.checkout_attempts:
+            return 0
+        return self.checkouts / self.checkout_attempts * 100
+
+    def count_band(self, band: int, sign: int) -> None:
+        if band == 1:
+            self.tons += sign
+        elif band == 2:
+            self.ton_forties += sign
+        elif band == 3:
+            self.one_eighties += sign
+
+    def count_leg(self, darts: int) -> None:
+        self.best_leg = min(darts, self.best_leg or darts)
+        self.worst_leg = max(darts, self.worst_leg or darts)
+
+
+def visit_band(points: int) -> int:
+    # 0 below a ton, then the index of the band
+    band = 0
+    for lower_bound in VISIT_BANDS:
+        if points >= lower_bound:
+            band += 1
+    return band
+
+
+def finish_darts(game_options: GameOptions) -> np.ndarray:
+    # fewest darts to finish every remaining score
+    checkout = get_checkout_table(game_options.check_out, game_options.start_points)
+    return np.array(
+        [
+            checkout.darts_needed(score) or NO_FINISH
+            for score in range(game_options.start_points + 1)
+        ]
+    )
+
+
+def code_table(input_method: InputMethod) -> np.ndarray:
+    # dart code by segment and multiplier as stored in the columnar history
+    throws = THROW_TABLE[input_method].values()
+    table = np.zeros(
+        (max(throw.segment for throw in throws) + 1, 4),
+        dtype=np.int64,
+    )
+    for throw in throws:
+        table[throw.segment, throw.multiplier] = throw.code
+    return table
+
+
+def analyze(
+    history: ColumnarHistory, game_options: GameOptions
+) -> list[PlayerAnalytics]:
+    # all statistics of a match in one pass of array operations over its darts
+    analytics = [PlayerAnalytics(player.name) for player in history.players]
+    if not len(history):
+        return analytics
+    input_method = game_options.input_method
+    rules = get_rules_of(game_options)
+    new_scores = np.array(rules.new_scores, dtype=np.int64).reshape(
+        rules.rows, rules.width
+    )
+    flags = np.frombuffer(bytes(rules.flags), dtype=np.uint8).reshape(
+        rules.rows, rules.width
+    )
+    player_count = len(history.players)
+    players = np.array(history.player_ids, dtype=np.int64)
+    scores = np.array(history.scores, dtype=np.int64)
+    throws_in_round = np.array(history.throws_in_round, dtype=np.int64)
+    codes = code_table(input_method)[
+        np.array(history.segments, dtype=np.int64),
+        np.array(history.multipliers, dtype=np.int64),
+    ]
+    darts = np.arange(len(history))
+    legs = np.searchsorted(np.array(history.leg_offsets), darts, side="right") - 1
+
+    dart_flags = flags[scores, codes]
+    bust = (dart_flags & BUST) > 0
+    won = (dart_flags & LEG_WON) > 0
+    points = scores - new_scores[scores, codes]
+
+    visit_starts = throws_in_round == 0
+    visits = np.cumsum(visit_starts) - 1
+    visit_points = np.bincount(visits, weights=points).astype(np.int64)
+    visit_players = players[visit_starts]
+    visit_scores = scores[visit_starts]
+    # number of the visit of its player in the leg
+    groups = legs[visit_starts] * player_count + visit_players
+    order = np.argsort(groups, kind="stable")
+    sorted_groups = groups[order]
+    positions = np.arange(len(order))
+    group_starts = np.maximum.accumulate(
+        np.where(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]], positions, 0)
+    )
+    visit_numbers = np.empty_like(order)
+    visit_numbers[order] = positions - group_starts
+    first_nine = visit_numbers < FIRST_NINE_VISITS
+
+    attempts = finish_darts(game_options)[scores] <= FINISHING_DARTS[input_method]
+    bands = np.searchsorted(VISIT_BANDS, visit_points, side="right")
+    dart_weights = np.where(bust, input_method.value - throws_in_round, 1)
+    leg_darts = np.bincount(
+        legs * player_count + players,
+        weights=dart_weights,
+        minlength=(legs[-1] + 1) * player_count,
+    ).reshape(-1, player_count)
+
+    def per_player(mask: np.ndarray, of: np.ndarray, weights=None) -> list[int]:
+        counts = np.bincount(of[mask], weights=weights, minlength=player_count)
+        return [int(count) for count in counts]
+
+    columns = {
+        "first_nine_points": per_player(
+            first_nine, visit_players, visit_points[first_nine]
+        ),
+        "first_nine_visits": per_player(first_nine, visit_players),
+        "checkout_attempts": per_player(attempts, players),
+        "checkouts": per_player(won, players),
+        "tons": per_player(bands == 1, visit_players),
+        "ton_forties": per_player(bands == 2, visit_players),
+        "one_eighties": per_player(bands == 3, visit_players),
+    }
+    for name, values in columns.items():
+        for player_analytics, value in zip(analytics, values):
+            setattr(player_analytics, name, value)
+    for dart in np.flatnonzero(won):
+        player_analytics = analytics[players[dart]]
+        player_analytics.highest_finish = max(
+            player_analytics.highest_finish, int(visit_scores[visits[dart]])
+        )
+        player_analytics.count_leg(int(leg_darts[legs[dart], players[dart]]))
+    return analytics
+
+
+def analyze_scoreboard(scoreboard: Scoreboard) -> list[PlayerAnalytics]:
+    history = ColumnarHistory.from_history(
+        scoreboard.history, scoreboard.players, scoreboard.game_options.input_method
+    )
+    return analyze(history, scoreboard.game_options)
+
+
+@dataclass
+class DartUndo:
+    # what a dart changed, to take it back without a rescan
+    turn: Turn
+    analytics: PlayerAnalytics  # of the player before the dart
+    visit: tuple[int, int, int, int]  # visit number, points, score and leg darts
+    leg: Optional[tuple[list[int], list[int]]] = None  # before a won leg reset them
+
+
+class LiveAnalytics:
+    # The same statistics updated with every dart. update follows a scoreboard
+    # and only looks at the new darts, undone darts are rolled back one by one.
+    def __init__(self, scoreboard: Scoreboard) -> None:
+        self.scoreboard = scoreboard
+        self.finish_darts = finish_darts(scoreboard.game_options)
+        self.reset()
+
+    def reset(self) -> None:
+        players = self.scoreboard.players
+        self.analytics = [PlayerAnalytics(player.name) for player in players]
+        self.undo: list[DartUndo] = []
+        self.visit_numbers = [0] * len(players)
+        self.visit_points = [0] * len(players)
+        self.visit_scores = [0] * len(players)
+        self.leg_darts = [0] * len(players)
+
+    def update(self) -> list[PlayerAnalytics]:
+        # darts undone since the last update, or replaced by other darts, are
+        # rolled back first
+        timeline = self.scoreboard.timeline
+        position = self.scoreboard.position
+        while self.undo and (
+            len(self.undo) > position
+            or self.undo[-1].turn != timeline[len(self.undo) - 1]
+        ):
+            self.roll_back(self.undo.pop())
+        for turn in timeline[len(self.undo) : position]:
+            self.add_turn(turn)
+        return self.analytics
+
+    def roll_back(self, undo: DartUndo) -> None:
+        player = undo.turn.player.idf
+        vars(self.analytics[player]).update(vars(undo.analytics))
+        if undo.leg:
+            self.visit_numbers, self.leg_darts = undo.leg
+        (
+            self.visit_numbers[player],
+            self.visit_points[player],
+            self.visit_scores[player],
+            self.leg_darts[player],
+        ) = undo.visit
+
+    def add_turn(self, turn: Turn) -> None:
+        input_method = self.scoreboard.game_options.input_method
+        player = turn.player.idf
+        player_analytics = self.analytics[player]
+        new_score, bust, won = self.scoreboard.rules.lookup(turn.score, turn.throw)
+        points = turn.score - new_score
+        undo = DartUndo(
+            turn,
+            replace(player_analytics),
+            (
+                self.visit_numbers[player],
+                self.visit_points[player],
+                self.visit_scores[player],
+                self.leg_darts[player],
+            ),
+        )
+        self.undo.append(undo)
+        if not turn.throw_in_round:
+            self.visit_numbers[player] += 1
+            self.visit_points[player] = 0
+            self.visit_scores[player] = turn.score
+            if self.visit_numbers[player] <= FIRST_NINE_VISITS:
+                player_analytics.first_nine_visits += 1
+        if self.visit_numbers[player] <= FIRST_NINE_VISITS:
+            player_analytics.first_nine_points += points
+        player_analytics.count_band(visit_band(self.visit_points[player]), -1)
+        self.visit_points[player] += points
+        player_analytics.count_band(visit_band(self.visit_points[player]), 1)
+        if self.finish_darts[turn.score] <= FINISHING_DARTS[input_method]:
+            player_analytics.checkout_attempts += 1
+        self.leg_darts[player] += (
+            input_method.value - turn.throw_in_round if bust else 1
+        )
+        if won:
+            player_analytics.checkouts += 1
+            player_analytics.highest_finish = max(
+                player_analytics.highest_finish, self.visit_scores[player]
+            )
+            player_analytics.count_leg(self.leg_darts[player])
+            undo.leg = self.visit_numbers, self.leg_darts
+            self.visit_numbers = [0] * len(self.analytics)
+            self.leg_darts = [0] * len(self.analytics)
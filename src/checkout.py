@@ -0,0 +1,187 @@
+import os
+import json
+import threading
+from typing import Optional
+from dataclasses import dataclass, field
+
+from src.game_options import CheckInOut, InputMethod
+from src.rules import is_checking_dart
+from src.throw import Throw, THROW_TABLE
+
+CHECKOUT_SAVE_FILE = "checkout_{check_out}_{max_score}.json"
+ROUTES_PER_SCORE = 5
+MAX_DARTS_IN_ROUND = InputMethod.THREEDARTS.value
+
+SCORING_DARTS = [
+    throw for throw in THROW_TABLE[InputMethod.THREEDARTS].values() if throw.score
+]
+
+
+def halvings(score: int) -> int:
+    count = 0
+    while score and not score % 2:
+        score //= 2
+        count += 1
+    return count
+
+
+def rank_route(route: list[Throw]) -> tuple[int, int, int, int, int]:
+    # fewest darts, avoid the bull, fewest doubles and triples to set up, a finish
+    # that leaves a double after a miss into the single and then the biggest first
+    # dart
+    bulls = sum(throw.segment == 25 for throw in route)
+    setup_multipliers = sum(throw.multiplier > 1 for throw in route[:-1])
+    return (
+        len(route),
+        bulls,
+        setup_multipliers,
+        -halvings(route[-1].score),
+        -route[0].score,
+    )
+
+
+def find_routes(check_out: CheckInOut) -> dict[int, list[list[Throw]]]:
+    finishing_darts = [
+        throw for throw in SCORING_DARTS if is_checking_dart(throw, check_out)
+    ]
+    routes: dict[int, list[list[Throw]]] = {}
+    setups: list[list[Throw]] = [[]]
+    setups += [[throw] for throw in SCORING_DARTS]
+    setups += [
+        [first, second]
+        for first in SCORING_DARTS
+        for second in SCORING_DARTS
+        if (first.score, first.multiplier) >= (second.score, second.multiplier)
+    ]
+    for setup in setups:
+        setup_score = sum(throw.score for throw in setup)
+        for finish in finishing_darts:
+            routes.setdefault(setup_score + finish.score, []).append(setup + [finish])
+    return {
+        score: sorted(found, key=rank_route)[:ROUTES_PER_SCORE]
+        for score, found in sorted(routes.items())
+    }
+
+
+def find_min_darts(check_out: CheckInOut, max_score: int) -> list[Optional[int]]:
+    finishing_scores = {
+        throw.score for throw in SCORING_DARTS if is_checking_dart(throw, check_out)
+    }
+    setup_scores = sorted({throw.score for throw in SCORING_DARTS})
+    min_darts: list[Optional[int]] = [0]
+    for score in range(1, max_score + 1):
+        best = 1 if score in finishing_scores else None
+        if best is None:
+            for setup_score in setup_scores:
+                if setup_score >= score:
+                    break
+                rest = min_darts[score - setup_score]
+                if rest is not None and (best is None or rest + 1 < best):
+                    best = rest + 1
+        min_darts.append(best)
+    return min_darts
+
+
+@dataclass
+class CheckoutTable:
+    check_out: CheckInOut
+    max_score: int
+    min_darts: list[Optional[int]] = field(default_factory=list)
+    routes: dict[int, list[list[str]]] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, check_out: CheckInOut, max_score: int) -> "CheckoutTable":
+        return cls(
+            check_out=check_out,
+            max_score=max_score,
+            min_darts=find_min_darts(check_out, max_score),
+            routes={
+                score: [[throw.input_score for throw in route] for route in found]
+                for score, found in find_routes(check_out).items()
+                if score <= max_score
+            },
+        )
+
+    def darts_needed(self, score: int) -> Optional[int]:
+        if not 0 < score <= self.max_score:
+            return None
+        return self.min_darts[score]
+
+    def routes_for(
+        self, score: int, darts_left: int = MAX_DARTS_IN_ROUND
+    ) -> list[list[str]]:
+        return [
+            route for route in self.routes.get(score, []) if len(route) <= darts_left
+        ]
+
+    def suggest(self, score: int, darts_left: int = MAX_DARTS_IN_ROUND) -> str:
+        routes = self.routes_for(score, darts_left)
+        if not routes:
+            return ""
+        return " ".join(dart.upper() for dart in routes[0])
+
+    def save_to_file(self, file_name: str) -> None:
+        with open(file_name, "w+") as file:
+            json.dump(
+                {
+                    "check_out": self.check_out.value,
+                    "max_score": self.max_score,
+                    "min_darts": self.min_darts,
+                    "routes": self.routes,
+                },
+                file,
+            )
+
+
+def load_checkout_table_from_file(file_name: str) -> CheckoutTable:
+    with open(file_name, "r") as file:
+        values = json.load(file)
+    return CheckoutTable(
+        check_out=CheckInOut(values["check_out"]),
+        max_score=values["max_score"],
+        min_darts=values["min_darts"],
+        routes={int(score): routes for score, routes in values["routes"].items()},
+    )
+
+
+checkout_tables: dict[tuple[CheckInOut, int], CheckoutTable] = {}
+building: dict[tuple[CheckInOut, int], threading.Thread] = {}
+
+
+def get_checkout_table(
+    check_out: CheckInOut, max_score: int, cache_dir: Optional[str] = None
+) -> CheckoutTable:
+    # built once per rule set, kept in memory and cached on disk if cache_dir is set
+    key = (check_out, max_score)
+    table = checkout_tables.get(key)
+    if cache_dir is None:
+        if table is None:
+            table = checkout_tables[key] = CheckoutTable.build(check_out, max_score)
+        return table
+    file_name = os.path.join(
+        cache_dir,
+        CHECKOUT_SAVE_FILE.format(check_out=check_out.value, max_score=max_score),
+    )
+    if os.path.exists(file_name):
+        table = table or load_checkout_table_from_file(file_name)
+    else:
+        table = table or CheckoutTable.build(check_out, max_score)
+        table.save_to_file(file_name)
+    checkout_tables[key] = table
+    return table
+
+
+def prepare_checkout_table(
+    check_out: CheckInOut, max_score: int
+) -> Optional[CheckoutTable]:
+    # the table once it is built, until then it is built on a background thread
+    # so the first prompt does not wait for it
+    key = (check_out, max_score)
+    if key in checkout_tables:
+        return checkout_tables[key]
+    if key not in building:
+        building[key] = threading.Thread(
+            target=get_checkout_table, args=key, daemon=True
+        )
+        building[key].start()
+    return None
@@ -1,9 +1,11 @@
 import sys
-from typing import Optional
+from typing import Optional, TextIO
 from platform import system
-import colorama
+from dataclasses import dataclass, fields
 
-from src.scoreboard import Stats, Turn, is_overthrow
+from src.checkout import CheckoutTable, prepare_checkout_table
+from src.rules import get_rules_of
+from src.scoreboard import Stats, Turn
 from src.game_options import (
     GameOptions,
     InputMethod,
@@ -14,9 +16,12 @@ from src.throw import Throw
 
 ABORT_MSG = ["exit", "abort", "quit", "stop", "end"]
 UNDO = ["undo", "back"]
+REDO = ["redo", "forward"]
 IMPLEMENTED_OS = {"Windows": "cls", "Linux": "clear"}
 STATS_TO_PRINT = ["player", "sets", "legs", "score", "average", "darts"]
 MAX_LINES_TO_DISPLAY: int = 12
+PRINTED_STATS = [field.name for field in fields(Stats) if field.name in STATS_TO_PRINT]
+TAB_WIDTH = 8
 
 
 def get_os() -> Optional[str]:
@@ -32,12 +37,106 @@ def get_console_clear() -> str:
     raise NotImplementedError(f"{system()} clear cmd not implemented")
 
 
+@dataclass
+class ScoreboardLayout:
+    tabs_after_name: int
+    title: str
+    header: str
+    footer: str
+
+
+def build_layout(players: tuple[str, ...]) -> ScoreboardLayout:
+    max_name_length = max(len(player) for player in players)
+    tabs_after_name = (max_name_length // TAB_WIDTH) + 1
+    header = ""
+    for field in PRINTED_STATS:
+        if field == "player":
+            header += f"{field.capitalize()}" + "\t" * tabs_after_name
+        else:
+            header += f"{field.capitalize()}\t"
+    # player lines never have more tabs than the header
+    title = " Scoreboard "  # needs to be even number
+    dashes = (header.count("\t") * TAB_WIDTH - len(title)) // 2
+    return ScoreboardLayout(
+        tabs_after_name=tabs_after_name,
+        title=dashes * "-" + title + dashes * "-",
+        header=header,
+        footer=(2 * dashes + len(title)) * "-",
+    )
+
+
+def format_stats(player_stats: Stats, layout: ScoreboardLayout) -> str:
+    to_print = ""
+    for field in PRINTED_STATS:
+        sep = "\t"
+        value = getattr(player_stats, field)
+        if field == "player":
+            sep = ":" + "\t" * (layout.tabs_after_name - len(value) // TAB_WIDTH)
+        if field == "average":
+            to_print += f"{value:.2f}" + sep
+            continue
+        to_print += f"{value}" + sep
+    return to_print
+
+
+class FrameRenderer:
+    # Keeps the frame that is on screen and only rewrites the lines that changed.
+    # The whole update is sent to the terminal in a single write.
+    def __init__(self, stream: TextIO = sys.stdout) -> None:
+        self.stream = stream
+        self.frame: list[str] = []
+
+    def render(self, lines: list[str], lines_on_screen: int) -> None:
+        # lines_on_screen counts the lines from the top of the last frame to the
+        # cursor, including prompts written below the frame
+        output = [f"\033[{lines_on_screen}F" if lines_on_screen else "\r"]
+        unchanged = 0
+        for i, line in enumerate(lines):
+            if i < len(self.frame) and self.frame[i] == line:
+                unchanged += 1
+                continue
+            if unchanged:
+                output.append(f"\033[{unchanged}E")  # down to next changed line
+                unchanged = 0
+            output.append(f"\033[2K{line}\n")
+        if unchanged:
+            output.append(f"\033[{unchanged}E")
+        output.append("\033[J")  # clear everything below the frame
+        self.stream.write("".join(output))
+        self.stream.flush()
+        self.frame = lines
+
+    def append(self, lines: list[str]) -> None:
+        self.stream.write("".join(line + "\n" for line in lines))
+        self.stream.flush()
+        self.frame = []
+
+
+def parse_input(
+    user_input: str, input_method: InputMethod = InputMethod.THREEDARTS
+) -> tuple[ThrowReturn, Throw]:
+    if user_input.lower() in ABORT_MSG:
+        return ThrowReturn.EXIT, Throw("0")
+    elif user_input.lower() in UNDO:
+        return ThrowReturn.UNDO, Throw("0")
+    elif user_input.lower() in REDO:
+        return ThrowReturn.REDO, Throw("0")
+    elif not len(user_input):
+        user_input = "0"
+    return ThrowReturn.THROW, Throw(user_input, input_method)
+
+
 class CLI:
     def __init__(self) -> None:
         if get_os() == "Windows":
+            import colorama  # only needed for the escape codes on Windows
+
             colorama.just_fix_windows_console()
         self.cmd_clear = get_console_clear()
         self.lines_to_delete = 0
+        self.checkout_table: Optional[CheckoutTable] = None
+        self.renderer = FrameRenderer()
+        self.layouts: dict[tuple[str, ...], ScoreboardLayout] = {}
 
     def write(self, line: str, increment_lines: int = 1) -> None:
         self.lines_to_delete += increment_lines
@@ -53,20 +152,25 @@ class CLI:
         return red_input
 
     def display_game_start(self, game_options: GameOptions) -> None:
+        prepare_checkout_table(game_options.check_out, game_options.start_points)
         self.display_game_options(game_options)
         self.write("--- Game on! ---")
 
     def display_input_help(self, input_method: InputMethod) -> None:
+        self.write("\n".join(self.input_help(input_method)), 7)
+
+    def input_help(self, input_method: InputMethod) -> list[str]:
         if input_method == InputMethod.THREEDARTS:
-            msg = (
-                "\n(Prefix d for double or t for triple + Number, eg t20,\n"
-                "empty input enters 0\n"
-                "enter 'undo' to undo last entered throw, \n"
-                "enter 'exit' or 'quit' to stop the game)\n"
-            )
-        else:
-            raise NotImplementedError("Input method '{input_method}' not supported")
-        self.write(msg, 6)
+            return [
+                "",
+                "(Prefix d for double or t for triple + Number, eg t20,",
+                "empty input enters 0",
+                "enter 'undo' to undo last entered throw, ",
+                "enter 'redo' to redo the last undone throw, ",
+                "enter 'exit' or 'quit' to stop the game)",
+                "",
+            ]
+        raise NotImplementedError("Input method '{input_method}' not supported")
 
     def display_scoreboard(
         self,
@@ -75,56 +179,19 @@ class CLI:
         game_options: GameOptions,
         clear_screen: bool = True,
     ) -> None:
-        if clear_screen:
-            sys.stdout.write("\033[2K")  # clear line
-            for _ in range(self.lines_to_delete):
-                sys.stdout.write("\033[F")  # back to previous line
-                sys.stdout.write("\033[2K")  # clear line
-            self.lines_to_delete = 0
-
-        max_name_lenght = 0
-        for statistic in statistics:
-            if len(statistic.player) > max_name_lenght:
-                max_name_lenght = len(statistic.player)
-        tabs_after_name = (max_name_lenght // 8) + 1
-
-        header = ""
-        for field in statistics[0].__dataclass_fields__:
-            if field not in STATS_TO_PRINT:
-                continue
-            if field == "player":
-                header += f"{field.capitalize()}" + "\t" * tabs_after_name
-            else:
-                header += f"{field.capitalize()}\t"
-        max_tabs_in_player_line = header.count("\t")
-        player_lines: list[str] = []
-        for player_stats in statistics:
-            to_print = ""
-            for field in player_stats.__dataclass_fields__:
-                if field not in STATS_TO_PRINT:
-                    continue
-                sep = "\t"
-                value = getattr(player_stats, field)
-                if field == "player":
-                    sep = ":" + "\t" * (tabs_after_name - len(value) // 8)
-                if field == "average":
-                    to_print += f"{value:.2f}" + sep
-                    continue
-                to_print += f"{value}" + sep
-            player_lines.append(to_print)
-
-            if to_print.count("\t") > max_tabs_in_player_line:
-                max_tabs_in_player_line = to_print.count("\t")
-
-        title = " Scoreboard "  # needs to be even number
-        dashes = (max_tabs_in_player_line * 8 - len(title)) // 2
-
-        self.write(dashes * "-" + title + dashes * "-")
-        self.write(header)
-        for player in player_lines:
-            self.write(player)
-        self.write((2 * dashes + len(title)) * "-")
-        self.display_input_help(game_options.input_method)
+        self.checkout_table = prepare_checkout_table(
+            game_options.check_out, game_options.start_points
+        )
+        players = tuple(player_stats.player for player_stats in statistics)
+        if players not in self.layouts:
+            self.layouts[players] = build_layout(players)
+        layout = self.layouts[players]
+
+        lines = [layout.title, layout.header]
+        lines += [format_stats(player_stats, layout) for player_stats in statistics]
+        lines.append(layout.footer)
+        lines += self.input_help(game_options.input_method)
+        rules = get_rules_of(game_options)
         max_line_for_mode = (
             MAX_LINES_TO_DISPLAY // (4 - game_options.input_method.value)
         ) - 1
@@ -133,9 +200,15 @@ class CLI:
                 f"{turn.player.name} requires: {turn.score:3}"
                 f" - Dart {turn.throw_in_round+1}: {turn.throw.input_score:<3}"
             )
-            if is_overthrow(turn.score, turn.throw, game_options.check_out):
+            if rules.is_bust(turn.score, turn.throw):
                 to_print += "  - Overthrow"
-            self.write(to_print)
+            lines.append(to_print)
+        if clear_screen:
+            self.renderer.render(lines, self.lines_to_delete)
+            self.lines_to_delete = len(lines)
+        else:
+            self.renderer.append(lines)
+            self.lines_to_delete += len(lines)
 
     def display_game_options(self, game_options: GameOptions) -> None:
         dashes = 15
@@ -148,19 +221,19 @@ class CLI:
     def read_throw(
         self, player: str, remaining_score: int, dart: int
     ) -> tuple[ThrowReturn, Throw]:
+        checkout = ""
+        if self.checkout_table:
+            checkout = self.checkout_table.suggest(
+                remaining_score, InputMethod.THREEDARTS.value - dart
+            )
+        if checkout:
+            checkout = f" ({checkout})"
         while True:
             user_input = self.read(
-                f"{player} requires: {remaining_score:3} - Dart {dart+1}: "
+                f"{player} requires: {remaining_score:3}{checkout} - Dart {dart+1}: "
             )
-            if user_input.lower() in ABORT_MSG:
-                return ThrowReturn.EXIT, Throw("0")
-            elif user_input.lower() in UNDO:
-                return ThrowReturn.UNDO, Throw("0")
-            elif not len(user_input):
-                user_input = "0"
             try:
-                throw = Throw(user_input)
-                return ThrowReturn.THROW, throw
+                return parse_input(user_input)
             except ValueError as err:
                 self.write(f"Wrong input: {err}")
 
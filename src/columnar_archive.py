@@ -0,0 +1,270 @@
+import os
+import json
+import time
+from array import array
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+import numpy as np
+
+from src.game_options import GameOptions, InputMethod
+from src.history import ColumnarHistory
+from src.rules import get_rules_of
+from src.scoreboard import Scoreboard
+
+COLUMNAR_ARCHIVE_DIR = "columnar_archive"
+INDEX_FILE = "games.jsonl"
+# one file per column with one fixed width value per dart, typecodes of array
+DART_COLUMNS = {
+    "games": "I",
+    "players": "I",
+    "segments": "B",
+    "multipliers": "B",
+    "scores": "H",
+    "throws_in_round": "B",
+    "points": "H",  # points scored, 0 for busts
+    "darts": "B",  # darts counted, a bust counts the rest of the visit
+}
+LEG_COLUMN = "legs"  # first dart of every leg
+LEG_TYPECODE = "Q"
+SEGMENTS = 26  # 0 is a miss, 25 the bull
+
+
+@dataclass
+class ArchivedGame:
+    game_id: int
+    played_at: float
+    players: list[str]
+    options: dict
+    first_dart: int
+    darts: int
+    first_leg: int
+    legs: int
+
+
+class ColumnarArchive:
+    # Darts of all games in column files that are memory mapped for queries, so
+    # aggregations run over millions of darts without creating an object per dart.
+    # The index is written after the columns of a game, columns that are longer
+    # than the index says are the rest of an interrupted write and cut off.
+    def __init__(self, directory: str = COLUMNAR_ARCHIVE_DIR) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.games: list[ArchivedGame] = []
+        self.player_ids: dict[str, int] = {}
+        self.mapped: dict[str, np.ndarray] = {}
+        if not os.path.exists(self.path(INDEX_FILE)):
+            open(self.path(INDEX_FILE), "wb").close()
+        with open(self.path(INDEX_FILE), "rb") as file:
+            complete = 0
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                self.index_game(ArchivedGame(**json.loads(line)))
+                complete += len(line)
+        self.cut_columns(complete)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def column_file(self, name: str) -> str:
+        return self.path(f"{name}.col")
+
+    @property
+    def dart_count(self) -> int:
+        return self.games[-1].first_dart + self.games[-1].darts if self.games else 0
+
+    @property
+    def leg_count(self) -> int:
+        return self.games[-1].first_leg + self.games[-1].legs if self.games else 0
+
+    def index_game(self, game: ArchivedGame) -> None:
+        self.games.append(game)
+        for name in game.players:
+            self.player_ids.setdefault(name, len(self.player_ids))
+
+    def cut_columns(self, index_size: int) -> None:
+        if os.path.getsize(self.path(INDEX_FILE)) > index_size:
+            os.truncate(self.path(INDEX_FILE), index_size)
+        lengths = {name: self.dart_count for name in DART_COLUMNS}
+        lengths[LEG_COLUMN] = self.leg_count
+        for name, length in lengths.items():
+            file_name = self.column_file(name)
+            size = length * array(self.typecode(name)).itemsize
+            if not os.path.exists(file_name):
+                open(file_name, "wb").close()
+            elif os.path.getsize(file_name) > size:
+                os.truncate(file_name, size)
+
+    def typecode(self, name: str) -> str:
+        return LEG_TYPECODE if name == LEG_COLUMN else DART_COLUMNS[name]
+
+    def add_game(
+        self, scoreboard: Scoreboard, played_at: Optional[float] = None
+    ) -> int:
+        game_options = scoreboard.game_options
+        history = ColumnarHistory.from_history(
+            scoreboard.get_history(),
+            scoreboard.get_players(),
+            game_options.input_method,
+        )
+        known = dict(self.player_ids)
+        ids = [
+            known.setdefault(player.name, len(known))
+            for player in scoreboard.get_players()
+        ]
+        game = ArchivedGame(
+            game_id=len(self.games),
+            played_at=time.time() if played_at is None else played_at,
+            players=[player.name for player in scoreboard.get_players()],
+            options=game_options.to_dict(),
+            first_dart=self.dart_count,
+            darts=len(history),
+            first_leg=self.leg_count,
+            legs=len(history.leg_offsets),
+        )
+        rules = get_rules_of(game_options)
+        points = array(DART_COLUMNS["points"])
+        darts = array(DART_COLUMNS["darts"])
+        for dset in scoreboard.get_history():
+            for leg in dset:
+                for turn in leg:
+                    new_score, bust, _ = rules.lookup(turn.score, turn.throw)
+                    points.append(turn.score - new_score)
+                    darts.append(
+                        game_options.input_method.value - turn.throw_in_round
+                        if bust
+                        else 1
+                    )
+        columns = {
+            "games": array(DART_COLUMNS["games"], [game.game_id]) * len(history),
+            "players": array(
+                DART_COLUMNS["players"], (ids[idf] for idf in history.player_ids)
+            ),
+            "segments": history.segments,
+            "multipliers": history.multipliers,
+            "scores": history.scores,
+            "throws_in_round": history.throws_in_round,
+            "points": points,
+            "darts": darts,
+            LEG_COLUMN: array(
+                LEG_TYPECODE, (game.first_dart + start for start in history.leg_offsets)
+            ),
+        }
+        for name, values in columns.items():
+            with open(self.column_file(name), "ab") as file:
+                file.write(array(self.typecode(name), values).tobytes())
+        with open(self.path(INDEX_FILE), "a") as file:
+            file.write(json.dumps(asdict(game)) + "\n")
+        self.index_game(game)
+        self.mapped = {}  # the maps end at the previous last dart
+        return game.game_id
+
+    def column(self, name: str) -> np.ndarray:
+        # read only view of the column file, no data is copied
+        if name not in self.mapped:
+            length = self.leg_count if name == LEG_COLUMN else self.dart_count
+            dtype = np.dtype(self.typecode(name))
+            if length:
+                self.mapped[name] = np.memmap(
+                    self.column_file(name), dtype=dtype, mode="r", shape=(length,)
+                )
+            else:  # empty files can't be mapped
+                self.mapped[name] = np.zeros(0, dtype=dtype)
+        return self.mapped[name]
+
+    def game_mask(
+        self,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        game_options: Optional[GameOptions] = None,
+    ) -> np.ndarray:
+        # selected games, indexed by the games column it selects their darts
+        options = game_options.to_dict() if game_options else None
+        return np.array(
+            [
+                (since is None or game.played_at >= since)
+                and (until is None or game.played_at < until)
+                and (options is None or game.options == options)
+                for game in self.games
+            ],
+            dtype=bool,
+        )
+
+    def dart_mask(
+        self, name: Optional[str] = None, games: Optional[np.ndarray] = None
+    ) -> Optional[np.ndarray]:
+        # None selects every dart, the columns are then used without a copy
+        if games is not None and games.all():
+            games = None
+        if name is None and games is None:
+            return None
+        mask = np.ones(self.dart_count, dtype=bool)
+        if name is not None:
+            if name not in self.player_ids:
+                return ~mask
+            mask &= self.column("players") == self.player_ids[name]
+        if games is not None:
+            mask &= games[self.column("games")]
+        return mask
+
+    def selected(self, name: str, mask: Optional[np.ndarray]) -> np.ndarray:
+        column = self.column(name)
+        return column if mask is None else column[mask]
+
+    def averages(self, games: Optional[np.ndarray] = None) -> dict[str, float]:
+        # three dart average of every player over the selected games
+        mask = self.dart_mask(games=games)
+        players = self.selected("players", mask)
+        points = np.bincount(
+            players,
+            weights=self.selected("points", mask),
+            minlength=len(self.player_ids),
+        )
+        darts = np.bincount(
+            players,
+            weights=self.selected("darts", mask),
+            minlength=len(self.player_ids),
+        )
+        return {
+            name: float(points[idf] / darts[idf] * 3) if darts[idf] else 0
+            for name, idf in self.player_ids.items()
+        }
+
+    def average_trend(
+        self, name: str, games: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        # three dart average of name in every selected game played, in game order
+        mask = self.dart_mask(name, games)
+        played = np.array(
+            [
+                name in game.players and (games is None or games[game.game_id])
+                for game in self.games
+            ],
+            dtype=bool,
+        )
+        game_ids = self.selected("games", mask)
+        points = np.bincount(
+            game_ids, weights=self.selected("points", mask), minlength=len(self.games)
+        )[played]
+        darts = np.bincount(
+            game_ids, weights=self.selected("darts", mask), minlength=len(self.games)
+        )[played]
+        return np.divide(points * 3, darts, out=np.zeros(len(darts)), where=darts > 0)
+
+    def segment_heatmap(
+        self, name: Optional[str] = None, games: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        # darts per multiplier (rows single, double and treble) and segment,
+        # games with whole visits as input have no segments and are left out
+        by_dart = np.array(
+            [
+                game.options.get("input_method") == InputMethod.THREEDARTS.value
+                for game in self.games
+            ],
+            dtype=bool,
+        )
+        mask = self.dart_mask(name, by_dart if games is None else by_dart & games)
+        cells = (self.selected("multipliers", mask).astype(np.intp) - 1) * SEGMENTS
+        cells += self.selected("segments", mask)
+        return np.bincount(cells, minlength=3 * SEGMENTS).reshape(3, SEGMENTS)
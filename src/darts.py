@@ -1,21 +1,109 @@
 import sys
+from typing import TYPE_CHECKING, Optional
 
+from src.journal import GameJournal
 from src.ui import UI
 from src.game_options import GameOptions, ThrowReturn
 from src.scoreboard import Scoreboard
+from src.throw import Throw
 
+if TYPE_CHECKING:
+    from src.match_snapshot import MatchSnapshots, ResumedMatch
+    from src.spectator import SpectatorFeed
 
-class XOhOne:
-    def __init__(self, ui: UI, players: list[str], game_options: GameOptions) -> None:
-        self.ui = ui
+
+class XOhOneGame:
+    # the game flow without a UI, shared by the blocking and the async game
+    def __init__(
+        self,
+        players: list[str],
+        game_options: GameOptions,
+        journal: Optional[GameJournal] = None,
+        feed: Optional["SpectatorFeed"] = None,
+        snapshots: Optional["MatchSnapshots"] = None,
+    ) -> None:
         self.scoreboard = Scoreboard(game_options)
         self.players = players
         self.game_options = game_options
+        self.journal = journal
+        self.feed = feed
+        self.snapshots = snapshots
 
-    def play(self) -> None:
+    def start_game(self) -> None:
+        if self.journal:
+            self.journal.start_game(self.game_options)
         for player_name in self.players:
-            self.scoreboard.register_player(player_name)
+            player = self.scoreboard.register_player(player_name)
+            if self.journal:
+                self.journal.record_register(player)
+        if self.feed:
+            self.feed.start(self.scoreboard)
+
+    def resume(self, resumed: "ResumedMatch") -> None:
+        # continues a match restored from a snapshot and the journal
+        self.scoreboard = resumed.scoreboard
+        if self.journal:
+            self.journal.game_id = resumed.game_id
+            self.journal.events = resumed.events
+        if self.feed:
+            self.feed.start(self.scoreboard)
+
+    def apply_input(self, throw_return: ThrowReturn, throw: Throw) -> bool:
+        # returns if the game was won
+        game_won = self.apply_to_scoreboard(throw_return, throw)
+        if self.feed:
+            self.feed.publish_changes(self.scoreboard)
+        if self.snapshots:
+            if game_won:
+                self.snapshots.finish(self.journal)
+            else:
+                self.snapshots.after_input(self.scoreboard, self.journal)
+        return game_won
+
+    def apply_to_scoreboard(self, throw_return: ThrowReturn, throw: Throw) -> bool:
+        player, throw_in_round = self.scoreboard.current_player()
+        if throw_return == ThrowReturn.UNDO:
+            if self.scoreboard.undo_throw():
+                if self.journal:
+                    self.journal.record_undo()
+                return False
+        elif throw_return == ThrowReturn.REDO:
+            if self.scoreboard.redo_throw() and self.journal:
+                self.journal.record_redo()
+            return self.scoreboard.is_win("game", player)
+        self.scoreboard.add_throw(player, throw, throw_in_round)
+        if self.journal:
+            self.journal.record_throw(player, throw, throw_in_round)
+        if self.scoreboard.was_overthrow(player):
+            return False
+        if self.scoreboard.append_hist_if_winning_throw(player):
+            if self.journal:
+                self.journal.record_win("leg", player)
+                if len(self.scoreboard.history[-1]) == 1:  # a new set was started
+                    self.journal.record_win("set", player)
+            return self.scoreboard.is_win("game", player)
+        return False
+
+
+class XOhOne(XOhOneGame):
+    def __init__(
+        self,
+        ui: UI,
+        players: list[str],
+        game_options: GameOptions,
+        journal: Optional[GameJournal] = None,
+        feed: Optional["SpectatorFeed"] = None,
+        snapshots: Optional["MatchSnapshots"] = None,
+    ) -> None:
+        super().__init__(players, game_options, journal, feed, snapshots)
+        self.ui = ui
+
+    def play(self) -> None:
+        self.start_game()
         self.ui.display_game_start(self.game_options)
+        self.play_rounds()
+
+    def play_rounds(self) -> None:
         while not self.do_player_round():  # game not won
             ...  # Do some stuff if more than two are playing
 
@@ -33,12 +121,4 @@ class XOhOne:
         )
         if throw_return == ThrowReturn.EXIT:
             sys.exit("The game was canceled")
-        elif throw_return == ThrowReturn.UNDO:
-            if self.scoreboard.undo_throw():
-                return False
-        self.scoreboard.add_throw(player, throw, throw_in_round)
-        if self.scoreboard.was_overthrow(player):
-            return False
-        if self.scoreboard.append_hist_if_winning_throw(player):
-            return self.scoreboard.is_win("game", player)
-        return False
+        return self.apply_input(throw_return, throw)
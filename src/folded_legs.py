@@ -0,0 +1,637 @@
+import os
+import struct
+from dataclasses import dataclass, replace
+from typing import IO, Any, Iterator, Optional, Sequence, TypeVar, Union, overload
+
+from src.game_options import GameOptions
+from src.rules import RuleTable
+from src.scoreboard import Player, PlayerTally, Scoreboard, Turn
+from src.throw import THROWS
+
+TURN = struct.Struct("<BHHB")  # player, score, throw code, throw in round
+MAX_PLAYERS = 256
+MAX_START_POINTS = 2**16 - 1
+INDEX_SUFFIX = ".index"
+
+T = TypeVar("T")
+
+
+class Spill:
+    # Bytes in memory or in a file. Writing at an offset replaces everything
+    # that was written after it.
+    def __init__(self, file_name: Optional[str] = None, mode: str = "w+b") -> None:
+        self.file: Optional[IO[bytes]] = open(file_name, mode) if file_name else None
+        self.data = bytearray()
+
+    def write(self, offset: int, data: bytes) -> None:
+        if self.file:
+            self.file.seek(offset)
+            self.file.write(data)
+        else:
+            del self.data[offset:]
+            self.data += data
+
+    def read(self, offset: int, size: int) -> bytes:
+        if self.file:
+            self.file.seek(offset)
+            return self.file.read(size)
+        return bytes(self.data[offset : offset + size])
+
+    def sync(self) -> None:
+        if self.file:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def close(self) -> None:
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+class LegStore:
+    # The darts and the summaries of folded legs in timeline order, in memory or
+    # in a spill file and an index file next to it. The darts of a leg follow the
+    # darts of the leg before, a summary has a fixed size, so only the number of
+    # legs stays in memory.
+    def __init__(
+        self, players: list[Player], file_name: Optional[str] = None, mode: str = "w+b"
+    ) -> None:
+        self.players = players
+        self.file_name = file_name
+        self.darts = Spill(file_name, mode)
+        self.index = Spill(file_name + INDEX_SUFFIX if file_name else None, mode)
+        self.legs = 0
+
+    @classmethod
+    def reopen(
+        cls,
+        players: list[Player],
+        file_name: Optional[str],
+        legs: int,
+        darts: int,
+        data: bytes,
+    ) -> "LegStore":
+        # the store of a snapshot, legs kept in memory were copied into it
+        store = cls(players, file_name, "r+b")
+        store.legs = legs
+        if not file_name:
+            store.darts.data = bytearray(data[: darts * TURN.size])
+            store.index.data = bytearray(data[darts * TURN.size :])
+        return store
+
+    def sync(self) -> None:
+        self.darts.sync()
+        self.index.sync()
+
+    def close(self) -> None:
+        self.darts.close()
+        self.index.close()
+
+    def record(self) -> str:
+        # first dart, darts, set and winner, then per player the remaining score
+        # when the leg was closed, the points and the darts thrown
+        players = len(self.players)
+        return f"<IIIB{players}H{2 * players}I"
+
+    def save(self, leg: "FoldedLeg", turns: Sequence[Turn]) -> None:
+        # replaces the leg with the same number and all legs after it
+        self.darts.write(
+            leg.start * TURN.size,
+            b"".join(
+                TURN.pack(
+                    turn.player.idf, turn.score, turn.throw.code, turn.throw_in_round
+                )
+                for turn in turns
+            ),
+        )
+        record = self.record()
+        self.index.write(
+            leg.number * struct.calcsize(record),
+            struct.pack(
+                record,
+                leg.start,
+                leg.darts,
+                leg.set_nr,
+                leg.winner,
+                *leg.closed,
+                *leg.points,
+                *leg.thrown,
+            ),
+        )
+        self.legs = leg.number + 1
+
+    def leg(self, number: int) -> "FoldedLeg":
+        record = self.record()
+        size = struct.calcsize(record)
+        start, darts, set_nr, winner, *values = struct.unpack(
+            record, self.index.read(number * size, size)
+        )
+        players = len(self.players)
+        return FoldedLeg(
+            self,
+            number,
+            start,
+            darts,
+            set_nr,
+            winner,
+            values[:players],
+            values[players : 2 * players],
+            values[2 * players :],
+        )
+
+    def load(self, start: int, darts: int) -> list[Turn]:
+        data = self.darts.read(start * TURN.size, darts * TURN.size)
+        return [
+            Turn(self.players[player], score, THROWS[code], throw_in_round)
+            for player, score, code, throw_in_round in TURN.iter_unpack(data)
+        ]
+
+    def copy(self, legs: int, darts: int) -> bytes:
+        # the first legs when they are kept in memory, a spill file is not copied
+        if self.file_name:
+            return b""
+        size = struct.calcsize(self.record())
+        return self.darts.read(0, darts * TURN.size) + self.index.read(0, legs * size)
+
+    def nbytes(self) -> int:
+        return len(self.darts.data) + len(self.index.data)
+
+
+class FoldedSequence(Sequence[T]):
+    # A list read from the store, it compares and prints like the list.
+    __slots__ = ()
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (FoldedSequence, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+    @overload
+    def __getitem__(self, index: int) -> T: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[T]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[T, list[T]]:
+        if isinstance(index, slice):
+            return [self.item(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"Index {index} is out of range")
+        return self.item(index)
+
+    def item(self, index: int) -> T:
+        raise NotImplementedError
+
+
+class FoldedLeg(FoldedSequence[Turn]):
+    # A completed leg as its summary record. The darts are read from the store
+    # whenever they are needed and are not kept.
+    __slots__ = (
+        "store",
+        "number",
+        "start",
+        "darts",
+        "set_nr",
+        "winner",
+        "closed",
+        "points",
+        "thrown",
+    )
+
+    def __init__(
+        self,
+        store: LegStore,
+        number: int,
+        start: int,
+        darts: int,
+        set_nr: int,
+        winner: int,
+        closed: list[int],
+        points: list[int],
+        thrown: list[int],
+    ) -> None:
+        self.store = store
+        self.number = number
+        self.start = start
+        self.darts = darts
+        self.set_nr = set_nr
+        self.winner = winner
+        self.closed = closed
+        self.points = points
+        self.thrown = thrown
+
+    @classmethod
+    def fold(
+        cls,
+        store: LegStore,
+        number: int,
+        start: int,
+        set_nr: int,
+        turns: Sequence[Turn],
+        closed: list[int],
+        rules: RuleTable,
+        input_darts: int,
+    ) -> "FoldedLeg":
+        # per player, busted visits count the darts that were not thrown
+        points = [0] * len(store.players)
+        thrown = [0] * len(store.players)
+        for turn in turns:
+            new_score, bust, _ = rules.lookup(turn.score, turn.throw)
+            if bust:
+                thrown[turn.player.idf] += input_darts - turn.throw_in_round
+            else:
+                points[turn.player.idf] += turn.score - new_score
+                thrown[turn.player.idf] += 1
+        leg = cls(
+            store,
+            number,
+            start,
+            len(turns),
+            set_nr,
+            turns[-1].player.idf,
+            closed,
+            points,
+            thrown,
+        )
+        store.save(leg, turns)
+        return leg
+
+    def __repr__(self) -> str:
+        return f"FoldedLeg(darts={self.darts}, winner={self.winner})"
+
+    def __len__(self) -> int:
+        return self.darts
+
+    def __iter__(self) -> Iterator[Turn]:
+        return iter(self.turns())
+
+    def item(self, index: int) -> Turn:
+        return self.turns()[index]
+
+    @property
+    def end(self) -> int:
+        return self.start + self.darts
+
+    def turns(self) -> list[Turn]:
+        return self.store.load(self.start, self.darts)
+
+
+class FoldedHistory(FoldedSequence["FoldedSet"]):
+    # The sets of a BoundedScoreboard. All legs before the live leg are folded in
+    # the store and read from it, only their counts stay in memory.
+    def __init__(self, store: LegStore) -> None:
+        self.store = store
+        self.legs = 0  # folded
+        self.sets = 1
+        self.set_start = 0  # the first leg of the current set
+        self.live: list[Turn] = []
+
+    def __len__(self) -> int:
+        return self.sets
+
+    def item(self, index: int) -> "FoldedSet":
+        return FoldedSet(self, index)
+
+    def first_leg(self, set_nr: int) -> int:
+        if set_nr >= self.sets - 1:
+            return self.set_start
+        # the sets of the folded legs only grow, the first one with set_nr
+        low, high = 0, self.set_start
+        while low < high:
+            middle = (low + high) // 2
+            if self.store.leg(middle).set_nr < set_nr:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+
+class FoldedSet(FoldedSequence[Sequence[Turn]]):
+    # the legs of a set, the current set ends with the live leg
+    def __init__(self, history: FoldedHistory, set_nr: int) -> None:
+        self.history = history
+        self.is_current = set_nr == len(history) - 1
+        self.first = history.first_leg(set_nr)
+        end = history.legs if self.is_current else history.first_leg(set_nr + 1)
+        self.folded = end - self.first
+
+    def __len__(self) -> int:
+        return self.folded + self.is_current
+
+    def item(self, index: int) -> Sequence[Turn]:
+        if index == self.folded:
+            return self.history.live
+        return self.history.store.leg(self.first + index)
+
+    def folded_legs(self) -> Iterator[FoldedLeg]:
+        for number in range(self.first, self.first + self.folded):
+            yield self.history.store.leg(number)
+
+
+class SetLegs(FoldedSequence[int]):
+    # The legs won by a player per set. The sets before the current one are
+    # counted from the winners of their folded legs.
+    def __init__(self, history: FoldedHistory, player: int, current: int = 0) -> None:
+        self.history = history
+        self.player = player
+        self.current = current
+
+    def __len__(self) -> int:
+        return len(self.history)
+
+    def item(self, index: int) -> int:
+        if index == len(self) - 1:
+            return self.current
+        return sum(
+            leg.winner == self.player for leg in self.history[index].folded_legs()
+        )
+
+    def __setitem__(self, index: int, legs: int) -> None:
+        if index not in (-1, len(self) - 1):
+            raise IndexError("Only the legs of the current set can change")
+        self.current = legs
+
+
+class ClosedLegScores(FoldedSequence[list[int]]):
+    # the remaining scores when a leg was closed, from the summaries of the legs
+    def __init__(self, history: FoldedHistory) -> None:
+        self.history = history
+
+    def __len__(self) -> int:
+        return self.history.legs
+
+    def item(self, index: int) -> list[int]:
+        return self.history.store.leg(index).closed
+
+
+class FoldedTimeline:
+    # The timeline of a BoundedScoreboard. The darts of the legs in the store are
+    # read from it, only the darts after them are kept as turns.
+    def __init__(self, store: LegStore) -> None:
+        self.store = store
+        self.folded = 0  # darts in the legs of the store
+        self.tail: list[Turn] = []
+
+    def __len__(self) -> int:
+        return self.folded + len(self.tail)
+
+    def __iter__(self) -> Iterator[Turn]:
+        for number in range(self.store.legs):
+            yield from self.store.leg(number).turns()
+        yield from self.tail
+
+    def leg_at(self, dart: int) -> FoldedLeg:
+        # the folded leg with the dart
+        low, high = 0, self.store.legs - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.store.leg(middle).start <= dart:
+                low = middle
+            else:
+                high = middle - 1
+        return self.store.leg(low)
+
+    @overload
+    def __getitem__(self, index: int) -> Turn: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Turn]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Turn, list[Turn]]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return list(self)[index]
+            if start >= self.folded:
+                return self.tail[start - self.folded : stop - self.folded]
+            turns: list[Turn] = []
+            leg = self.leg_at(start)
+            while leg.start < stop:
+                turns += leg.turns()[start - leg.start : stop - leg.start]
+                start = leg.end
+                if leg.number + 1 == self.store.legs:
+                    break
+                leg = self.store.leg(leg.number + 1)
+            return turns + self.tail[: max(stop - self.folded, 0)]
+        if index < 0:
+            index += len(self)
+        if index >= self.folded:
+            return self.tail[index - self.folded]
+        leg = self.leg_at(index)
+        return leg.turns()[index - leg.start]
+
+    def __delitem__(self, index: slice) -> None:
+        # only the undone darts from a position to the end are deleted
+        start = index.indices(len(self))[0]
+        while start < self.folded:
+            leg = self.store.leg(self.store.legs - 1)
+            self.tail = leg.turns() + self.tail
+            self.folded = leg.start
+            self.store.legs -= 1
+        del self.tail[start - self.folded :]
+
+    def append(self, turn: Turn) -> None:
+        self.tail.append(turn)
+
+    def fold(self, darts: int) -> None:
+        # the darts at the start of the tail were saved as the last leg of the store
+        self.folded += darts
+        del self.tail[:darts]
+
+
+@dataclass
+class FoldedSnapshot:
+    tallies: list[PlayerTally]  # with the legs of the current set only
+    leg_shifts: int
+    legs: int
+    sets: int
+    set_start: int
+
+
+class BoundedScoreboard(Scoreboard):
+    # A scoreboard for long sessions. Completed legs are folded into the store as
+    # summaries, so only the darts of the current leg are kept as turns and of the
+    # folded legs only their counts. The stats come from the running tallies,
+    # undoing into a folded leg loads its darts again.
+    history: FoldedHistory  # type: ignore[assignment]
+    closed_leg_scores: ClosedLegScores  # type: ignore[assignment]
+    timeline: FoldedTimeline  # type: ignore[assignment]
+    snapshots: dict[int, FoldedSnapshot]  # type: ignore[assignment]
+
+    def __init__(
+        self, game_options: GameOptions, spill_file: Optional[str] = None
+    ) -> None:
+        if game_options.start_points > MAX_START_POINTS:
+            raise ValueError(
+                f"Cannot fold legs of more than {MAX_START_POINTS} start points"
+            )
+        super().__init__(game_options)
+        self.open_store(LegStore(self.players, spill_file))
+
+    def open_store(self, store: LegStore) -> None:
+        self.store = store
+        self.history = FoldedHistory(store)
+        self.closed_leg_scores = ClosedLegScores(self.history)
+        self.timeline = FoldedTimeline(store)
+
+    def close(self) -> None:
+        self.store.close()
+
+    def register_player(self, name: str) -> Player:
+        if len(self.players) >= MAX_PLAYERS:
+            raise ValueError(f"Cannot fold legs of more than {MAX_PLAYERS} players")
+        if self.store.legs:
+            raise ValueError("Cannot register players after legs were folded")
+        player = super().register_player(name)
+        self.tallies[-1].legs_per_set = SetLegs(  # type: ignore[assignment]
+            self.history, player.idf
+        )
+        return player
+
+    def append_hist_if_winning_throw(self, player: Player) -> bool:
+        if not self.is_win("leg", player):
+            return False
+        set_won = self.is_win("set", player)
+        self.fold_leg([tally.remaining for tally in self.tallies])
+        if set_won:
+            for tally in self.tallies:
+                self.leg_shifts -= tally.legs_per_set[-1]
+            self.history.sets += 1
+            self.history.set_start = self.history.legs
+            for tally in self.tallies:
+                tally.legs_per_set[-1] = 0
+        for tally in self.tallies:
+            tally.remaining = self.game_options.start_points
+        self.update_visit()
+        return True
+
+    def fold_leg(self, closed: list[int]) -> None:
+        history = self.history
+        if history.legs == self.store.legs:  # a redone leg is still in the store
+            FoldedLeg.fold(
+                self.store,
+                history.legs,
+                self.timeline.folded,
+                history.sets - 1,
+                history.live,
+                closed,
+                self.rules,
+                self.game_options.input_method.value,
+            )
+            self.timeline.fold(len(history.live))
+        history.legs += 1
+        history.live = []
+        # snapshots before the current leg are replaced by replaying from the start
+        self.snapshots = {
+            position: snapshot
+            for position, snapshot in self.snapshots.items()
+            if not position or position >= self.position
+        }
+
+    def undo_throw(self) -> bool:
+        if not self.history.live and self.history.legs:
+            self.unfold_leg()
+        return super().undo_throw()
+
+    def unfold_leg(self) -> None:
+        # the last folded leg becomes the live leg again
+        history = self.history
+        leg = self.store.leg(history.legs - 1)
+        if leg.set_nr < history.sets - 1:  # back into the set it won
+            first = history.first_leg(leg.set_nr)
+            won = [0] * len(self.players)
+            for number in range(first, history.legs):
+                won[self.store.leg(number).winner] += 1
+            history.sets -= 1
+            history.set_start = first
+            for tally, legs in zip(self.tallies, won):
+                tally.legs_per_set[-1] = legs
+                self.leg_shifts += legs
+        history.legs -= 1
+        history.live = leg.turns()
+        for tally, remaining in zip(self.tallies, leg.closed):
+            tally.remaining = remaining
+
+    def take_snapshot(self) -> FoldedSnapshot:  # type: ignore[override]
+        return FoldedSnapshot(
+            tallies=[
+                replace(tally, legs_per_set=[tally.legs_per_set[-1]])
+                for tally in self.tallies
+            ],
+            leg_shifts=self.leg_shifts,
+            legs=self.history.legs,
+            sets=self.history.sets,
+            set_start=self.history.set_start,
+        )
+
+    def restore_snapshot(self, position: int) -> None:
+        snapshot = self.snapshots[position]
+        history = self.history
+        history.legs = snapshot.legs
+        history.sets = snapshot.sets
+        history.set_start = snapshot.set_start
+        start = self.store.leg(history.legs - 1).end if history.legs else 0
+        history.live = self.timeline[start:position]
+        self.tallies = [
+            replace(tally, legs_per_set=SetLegs(history, idf, tally.legs_per_set[0]))
+            for idf, tally in enumerate(snapshot.tallies)
+        ]
+        self.leg_shifts = snapshot.leg_shifts
+        self.position = position
+        self.update_visit()
+
+    def live_history(self) -> list[list[list[Turn]]]:
+        # the live leg, the folded legs are saved by folded_state
+        return [[self.history.live]]
+
+    def folded_state(self) -> tuple[dict[str, Any], bytes]:
+        # The counts of the folded legs and the running aggregates. The darts and
+        # summaries of the folded legs are only copied when kept in memory.
+        self.store.sync()
+        history = self.history
+        darts = self.position - len(history.live)
+        state = {
+            "spill": self.store.file_name,
+            "legs": history.legs,
+            "sets": history.sets,
+            "set_start": history.set_start,
+            "darts": darts,
+            "tallies": [
+                {**vars(tally), "legs_per_set": tally.legs_per_set[-1]}
+                for tally in self.tallies
+            ],
+        }
+        return state, self.store.copy(history.legs, darts)
+
+    def restore_folded(
+        self, state: dict[str, Any], data: bytes, live: list[Turn], redo: list[Turn]
+    ) -> None:
+        # the counterpart of folded_state, the live leg and the darts to redo
+        # come with the snapshot
+        self.store.close()
+        self.open_store(
+            LegStore.reopen(
+                self.players, state["spill"], state["legs"], state["darts"], data
+            )
+        )
+        history = self.history
+        history.legs = state["legs"]
+        history.sets = state["sets"]
+        history.set_start = state["set_start"]
+        history.live = live
+        self.tallies = [
+            PlayerTally(
+                **{
+                    **tally,
+                    "legs_per_set": SetLegs(history, idf, tally["legs_per_set"]),
+                }
+            )
+            for idf, tally in enumerate(state["tallies"])
+        ]
+        self.timeline.folded = state["darts"]
+        self.timeline.tail = list(live) + redo
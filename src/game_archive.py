@@ -0,0 +1,401 @@
+import time
+import sqlite3
+from typing import Any, Iterable, Optional
+from dataclasses import dataclass
+
+from src.checkout import get_checkout_table
+from src.game_options import GameOptions, InputMethod
+from src.rules import get_rules_of
+from src.scoreboard import Scoreboard
+
+GAME_ARCHIVE_FILE = "game_archive.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    played_at REAL NOT NULL,
+    game_mode TEXT NOT NULL,
+    start_points INTEGER NOT NULL,
+    check_in TEXT NOT NULL,
+    check_out TEXT NOT NULL,
+    sets INTEGER NOT NULL,
+    legs INTEGER NOT NULL,
+    input_method INTEGER NOT NULL,
+    winner_id INTEGER REFERENCES players (id)
+);
+CREATE TABLE IF NOT EXISTS game_players (
+    player_id INTEGER NOT NULL REFERENCES players (id),
+    game_id INTEGER NOT NULL REFERENCES games (id),
+    position INTEGER NOT NULL,
+    sets_won INTEGER NOT NULL,
+    legs_won INTEGER NOT NULL,
+    won INTEGER NOT NULL,
+    PRIMARY KEY (player_id, game_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS legs (
+    game_id INTEGER NOT NULL REFERENCES games (id),
+    set_nr INTEGER NOT NULL,
+    leg_nr INTEGER NOT NULL,
+    player_id INTEGER NOT NULL REFERENCES players (id),
+    points INTEGER NOT NULL,
+    darts INTEGER NOT NULL,
+    won INTEGER NOT NULL,
+    checkout_attempts INTEGER NOT NULL,
+    finish INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS throws (
+    game_id INTEGER NOT NULL REFERENCES games (id),
+    dart_nr INTEGER NOT NULL,
+    set_nr INTEGER NOT NULL,
+    leg_nr INTEGER NOT NULL,
+    player_id INTEGER NOT NULL REFERENCES players (id),
+    throw TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    throw_in_round INTEGER NOT NULL,
+    PRIMARY KEY (game_id, dart_nr)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS careers (
+    player_id INTEGER PRIMARY KEY REFERENCES players (id),
+    games INTEGER NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0,
+    legs INTEGER NOT NULL DEFAULT 0,
+    legs_won INTEGER NOT NULL DEFAULT 0,
+    points INTEGER NOT NULL DEFAULT 0,
+    darts INTEGER NOT NULL DEFAULT 0,
+    won_leg_darts INTEGER NOT NULL DEFAULT 0,
+    checkout_attempts INTEGER NOT NULL DEFAULT 0,
+    highest_finish INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS imports (
+    source TEXT PRIMARY KEY,
+    matches INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS legs_by_player ON legs (player_id, game_id);
+CREATE INDEX IF NOT EXISTS games_by_date ON games (played_at);
+CREATE INDEX IF NOT EXISTS games_by_options
+    ON games (start_points, check_out, check_in, input_method);
+CREATE INDEX IF NOT EXISTS game_players_by_game ON game_players (game_id);
+"""
+
+LEG_AGGREGATES = """
+SELECT
+    COUNT(DISTINCT legs.game_id),
+    COUNT(DISTINCT CASE WHEN games.winner_id = legs.player_id THEN legs.game_id END),
+    COUNT(*),
+    COALESCE(SUM(legs.won), 0),
+    COALESCE(SUM(legs.points), 0),
+    COALESCE(SUM(legs.darts), 0),
+    COALESCE(SUM(legs.darts * legs.won), 0),
+    COALESCE(SUM(legs.checkout_attempts), 0),
+    COALESCE(MAX(legs.finish), 0)
+FROM legs JOIN games ON games.id = legs.game_id
+WHERE legs.player_id = ?
+"""
+
+
+@dataclass
+class CareerStats:
+    player: str
+    games: int = 0
+    wins: int = 0
+    legs: int = 0
+    legs_won: int = 0
+    points: int = 0
+    darts: int = 0
+    won_leg_darts: int = 0
+    checkout_attempts: int = 0
+    highest_finish: int = 0
+
+    @property
+    def average(self) -> float:
+        return self.points / self.darts * 3 if self.darts else 0
+
+    @property
+    def darts_per_leg(self) -> float:
+        return self.won_leg_darts / self.legs_won if self.legs_won else 0
+
+    @property
+    def checkout_rate(self) -> float:
+        if not self.checkout_attempts:
+            return 0
+        return self.legs_won / self.checkout_attempts
+
+
+@dataclass
+class LegSummary:
+    set_nr: int
+    leg_nr: int
+    player: int
+    points: int = 0
+    darts: int = 0
+    won: int = 0
+    checkout_attempts: int = 0
+    finish: int = 0
+
+
+def summarize_legs(scoreboard: Scoreboard) -> list[LegSummary]:
+    # one pass over the history, aggregating every player of every leg
+    game_options = scoreboard.game_options
+    rules = get_rules_of(game_options)
+    checkout = get_checkout_table(game_options.check_out, game_options.start_points)
+    max_darts_for_attempt = 1
+    if game_options.input_method == InputMethod.ROUND:
+        max_darts_for_attempt = InputMethod.THREEDARTS.value
+    summaries: list[LegSummary] = []
+    for set_nr, dset in enumerate(scoreboard.get_history()):
+        for leg_nr, leg in enumerate(dset):
+            if not len(leg):
+                continue
+            of_leg = {
+                player.idf: LegSummary(set_nr, leg_nr, player.idf)
+                for player in scoreboard.get_players()
+            }
+            visit_start: dict[int, int] = {}
+            for turn in leg:
+                summary = of_leg[turn.player.idf]
+                if turn.throw_in_round == 0:
+                    visit_start[turn.player.idf] = turn.score
+                needed = checkout.darts_needed(turn.score)
+                if needed and needed <= max_darts_for_attempt:
+                    summary.checkout_attempts += 1
+                new_score, bust, won = rules.lookup(turn.score, turn.throw)
+                if bust:
+                    summary.darts += (
+                        game_options.input_method.value - turn.throw_in_round
+                    )
+                    continue
+                summary.points += turn.score - new_score
+                summary.darts += 1
+                if won:
+                    summary.won = 1
+                    summary.finish = visit_start.get(turn.player.idf, turn.score)
+            summaries.extend(of_leg.values())
+    return summaries
+
+
+def options_row(game_options: GameOptions) -> tuple[Any, ...]:
+    return (
+        game_options.game_mode.value,
+        game_options.start_points,
+        game_options.check_in.value,
+        game_options.check_out.value,
+        game_options.sets,
+        game_options.legs,
+        game_options.input_method.value,
+    )
+
+
+class GameArchive:
+    def __init__(self, file_name: str = GAME_ARCHIVE_FILE) -> None:
+        self.connection = sqlite3.connect(file_name)
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self) -> "GameArchive":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def player_id(self, name: str) -> int:
+        self.connection.execute(
+            "INSERT OR IGNORE INTO players (name) VALUES (?)", (name,)
+        )
+        row = self.connection.execute(
+            "SELECT id FROM players WHERE name = ?", (name,)
+        ).fetchone()
+        return int(row[0])
+
+    def add_game(
+        self, scoreboard: Scoreboard, played_at: Optional[float] = None
+    ) -> int:
+        with self.connection:
+            return self.insert_game(scoreboard, played_at)
+
+    def add_games(
+        self,
+        games: Iterable[tuple[Scoreboard, Optional[float]]],
+        source: str = "",
+        imported: int = 0,
+    ) -> list[int]:
+        # the import progress of source is committed in the same transaction
+        with self.connection:
+            ids = [self.insert_game(game, played_at) for game, played_at in games]
+            if source:
+                self.connection.execute(
+                    "INSERT INTO imports (source, matches) VALUES (?, ?)"
+                    " ON CONFLICT (source) DO UPDATE"
+                    " SET matches = matches + excluded.matches",
+                    (source, imported),
+                )
+            return ids
+
+    def imported_matches(self, source: str) -> int:
+        row = self.connection.execute(
+            "SELECT matches FROM imports WHERE source = ?", (source,)
+        ).fetchone()
+        return int(row[0]) if row else 0
+
+    def insert_game(self, scoreboard: Scoreboard, played_at: Optional[float]) -> int:
+        players = scoreboard.get_players()
+        ids = [self.player_id(player.name) for player in players]
+        winner = next(
+            (
+                i
+                for i, player in enumerate(players)
+                if scoreboard.is_win("game", player)
+            ),
+            None,
+        )
+        cursor = self.connection.execute(
+            "INSERT INTO games (played_at, game_mode, start_points, check_in,"
+            " check_out, sets, legs, input_method, winner_id)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                time.time() if played_at is None else played_at,
+                *options_row(scoreboard.game_options),
+                None if winner is None else ids[winner],
+            ),
+        )
+        game_id = int(cursor.lastrowid or 0)
+        summaries = summarize_legs(scoreboard)
+        self.connection.executemany(
+            "INSERT INTO legs (game_id, set_nr, leg_nr, player_id, points, darts,"
+            " won, checkout_attempts, finish) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    game_id,
+                    leg.set_nr,
+                    leg.leg_nr,
+                    ids[leg.player],
+                    leg.points,
+                    leg.darts,
+                    leg.won,
+                    leg.checkout_attempts,
+                    leg.finish,
+                )
+                for leg in summaries
+            ],
+        )
+        self.connection.executemany(
+            "INSERT INTO throws (game_id, dart_nr, set_nr, leg_nr, player_id, throw,"
+            " score, throw_in_round) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    game_id,
+                    dart_nr,
+                    set_nr,
+                    leg_nr,
+                    ids[turn.player.idf],
+                    turn.throw.input_score,
+                    turn.score,
+                    turn.throw_in_round,
+                )
+                for dart_nr, (set_nr, leg_nr, turn) in enumerate(
+                    (set_nr, leg_nr, turn)
+                    for set_nr, dset in enumerate(scoreboard.get_history())
+                    for leg_nr, leg in enumerate(dset)
+                    for turn in leg
+                )
+            ],
+        )
+        for position, (player, player_id) in enumerate(zip(players, ids)):
+            of_player = [leg for leg in summaries if leg.player == player.idf]
+            won = int(position == winner)
+            self.connection.execute(
+                "INSERT INTO game_players (player_id, game_id, position, sets_won,"
+                " legs_won, won) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    player_id,
+                    game_id,
+                    position,
+                    scoreboard.get_won_sets_of(player),
+                    sum(leg.won for leg in of_player),
+                    won,
+                ),
+            )
+            self.connection.execute(
+                "INSERT OR IGNORE INTO careers (player_id) VALUES (?)", (player_id,)
+            )
+            self.connection.execute(
+                "UPDATE careers SET games = games + 1, wins = wins + ?,"
+                " legs = legs + ?, legs_won = legs_won + ?, points = points + ?,"
+                " darts = darts + ?, won_leg_darts = won_leg_darts + ?,"
+                " checkout_attempts = checkout_attempts + ?,"
+                " highest_finish = MAX(highest_finish, ?) WHERE player_id = ?",
+                (
+                    won,
+                    len(of_player),
+                    sum(leg.won for leg in of_player),
+                    sum(leg.points for leg in of_player),
+                    sum(leg.darts for leg in of_player),
+                    sum(leg.darts for leg in of_player if leg.won),
+                    sum(leg.checkout_attempts for leg in of_player),
+                    max((leg.finish for leg in of_player), default=0),
+                    player_id,
+                ),
+            )
+        return game_id
+
+    def career_stats(
+        self,
+        name: str,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        game_options: Optional[GameOptions] = None,
+        opponent: Optional[str] = None,
+    ) -> CareerStats:
+        row = self.connection.execute(
+            "SELECT id FROM players WHERE name = ?", (name,)
+        ).fetchone()
+        if not row:
+            return CareerStats(player=name)
+        player_id = row[0]
+        if since is None and until is None and game_options is None and not opponent:
+            values = self.connection.execute(
+                "SELECT games, wins, legs, legs_won, points, darts, won_leg_darts,"
+                " checkout_attempts, highest_finish FROM careers WHERE player_id = ?",
+                (player_id,),
+            ).fetchone()
+            return CareerStats(name, *values) if values else CareerStats(name)
+
+        query = LEG_AGGREGATES
+        parameters: list[Any] = [player_id]
+        if since is not None:
+            query += " AND games.played_at >= ?"
+            parameters.append(since)
+        if until is not None:
+            query += " AND games.played_at < ?"
+            parameters.append(until)
+        if game_options is not None:
+            query += (
+                " AND games.game_mode = ? AND games.start_points = ?"
+                " AND games.check_in = ? AND games.check_out = ?"
+                " AND games.sets = ? AND games.legs = ? AND games.input_method = ?"
+            )
+            parameters.extend(options_row(game_options))
+        if opponent:
+            query += (
+                " AND legs.game_id IN (SELECT game_id FROM game_players"
+                " JOIN players ON players.id = game_players.player_id"
+                " WHERE players.name = ?)"
+            )
+            parameters.append(opponent)
+        return CareerStats(name, *self.connection.execute(query, parameters).fetchone())
+
+    def head_to_head(self, name: str, opponent: str) -> tuple[int, int, int]:
+        # games played against each other and the wins of both players
+        row = self.connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(a.won), 0), COALESCE(SUM(b.won), 0)"
+            " FROM game_players a JOIN game_players b ON a.game_id = b.game_id"
+            " WHERE a.player_id = (SELECT id FROM players WHERE name = ?)"
+            " AND b.player_id = (SELECT id FROM players WHERE name = ?)",
+            (name, opponent),
+        ).fetchone()
+        return int(row[0]), int(row[1]), int(row[2])
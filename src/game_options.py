@@ -1,9 +1,8 @@
 import os
 import json
 from enum import Enum
-from dataclasses import dataclass
-from dataclasses_json import dataclass_json
-
+from typing import Any
+from dataclasses import dataclass, fields
 
 SEGMENTS = [x for x in range(26) if x <= 20 or x == 25]
 IMPOSSIBLE_SCORES = [163, 166, 169, 172, 173, 175, 176, 178, 179]
@@ -15,6 +14,7 @@ GAME_OPTIONS_SAVE_FILE = "game_opt.json"
 class ThrowReturn(Enum):
     THROW = "throw"
     UNDO = "undo"
+    REDO = "redo"
     EXIT = "exit"
 
 
@@ -50,7 +50,6 @@ class InputMethod(Enum):
         return f"{self.name} : {self.value}"
 
 
-@dataclass_json
 @dataclass
 class GameOptions:
     game_mode: GameMode = GameMode.XOhOne
@@ -63,9 +62,53 @@ class GameOptions:
     input_method: InputMethod = InputMethod.THREEDARTS
     start_player: int = 0
 
-    def save_to_file(self) -> None:
-        with open(GAME_OPTIONS_SAVE_FILE, "w+") as file:
-            file.write(self.to_json())
+    def __post_init__(self) -> None:
+        self.validate()
+
+    def validate(self) -> None:
+        # a visit total has no last dart, it can only check in or out straight
+        if self.input_method != InputMethod.ROUND:
+            return
+        for rule, check in [("Check-in", self.check_in), ("Check-out", self.check_out)]:
+            if check != CheckInOut.STRAIGHT:
+                raise ValueError(
+                    f"{rule} '{check.value}' needs the darts of a visit,"
+                    f" not input method {self.input_method.name}"
+                )
+
+    def to_dict(self) -> dict[str, Any]:
+        # enums are stored by value, the same format dataclasses_json wrote
+        return {
+            option.name: value.value if isinstance(value, Enum) else value
+            for option in fields(self)
+            for value in [getattr(self, option.name)]
+        }
+
+    @classmethod
+    def from_dict(cls, values: dict[str, Any]) -> "GameOptions":
+        game_options = cls()
+        for option in fields(cls):
+            if option.name not in values:
+                continue
+            default = getattr(game_options, option.name)
+            value = values[option.name]
+            if isinstance(default, Enum):
+                value = type(default)(value)
+            setattr(game_options, option.name, value)
+        game_options.validate()
+        return game_options
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
+
+    def save_to_file(self, file_name: str = GAME_OPTIONS_SAVE_FILE) -> None:
+        to_save = self.to_json()
+        if os.path.exists(file_name):
+            with open(file_name, "r") as file:
+                if file.read() == to_save:
+                    return
+        with open(file_name, "w+") as file:
+            file.write(to_save)
 
 
 def load_game_opt_from_file(file_name: str = GAME_OPTIONS_SAVE_FILE) -> GameOptions:
@@ -73,4 +116,4 @@ def load_game_opt_from_file(file_name: str = GAME_OPTIONS_SAVE_FILE) -> GameOpti
         return GameOptions()
     with open(file_name, "r") as file:
         values = json.load(file)
-    return GameOptions().from_dict(values)
+    return GameOptions.from_dict(values)
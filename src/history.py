@@ -0,0 +1,191 @@
+from array import array
+from typing import Optional
+
+from src.game_options import InputMethod
+from src.scoreboard import Player, Turn
+from src.throw import Throw
+
+PREFIXES = {1: "", 2: "d", 3: "t"}
+MAX_PLAYERS = 256  # player ids are stored in one byte
+
+
+def encode_throw(throw: Throw) -> tuple[int, int]:
+    return throw.segment, throw.multiplier
+
+
+def decode_throw(
+    segment: int, multiplier: int, input_method: InputMethod = InputMethod.THREEDARTS
+) -> Throw:
+    return Throw(f"{PREFIXES[multiplier]}{segment}", input_method)
+
+
+class TurnView:
+    __slots__ = ("history", "index")
+
+    def __init__(self, history: "ColumnarHistory", index: int) -> None:
+        self.history = history
+        self.index = index
+
+    def __repr__(self) -> str:
+        return f"TurnView({self.to_turn()})"
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (TurnView, Turn)):
+            return (
+                self.player == other.player
+                and self.score == other.score
+                and self.throw.input_score == other.throw.input_score
+                and self.throw_in_round == other.throw_in_round
+            )
+        return NotImplemented
+
+    @property
+    def player(self) -> Player:
+        return self.history.players[self.history.player_ids[self.index]]
+
+    @property
+    def score(self) -> int:
+        return self.history.scores[self.index]
+
+    @property
+    def throw(self) -> Throw:
+        return decode_throw(
+            self.history.segments[self.index],
+            self.history.multipliers[self.index],
+            self.history.input_method,
+        )
+
+    @property
+    def throw_in_round(self) -> int:
+        return self.history.throws_in_round[self.index]
+
+    def to_turn(self) -> Turn:
+        return Turn(
+            player=self.player,
+            score=self.score,
+            throw=self.throw,
+            throw_in_round=self.throw_in_round,
+        )
+
+
+class ColumnarHistory:
+    # A compact copy of a scoreboard history for analytics and archives, the
+    # scoreboard itself keeps its list of Turns.
+    # Darts are kept in typed parallel arrays, sets and legs as offsets into them:
+    # set_offsets holds the first leg of every set, leg_offsets the first dart of
+    # every leg.
+    def __init__(
+        self,
+        players: list[Player],
+        input_method: InputMethod = InputMethod.THREEDARTS,
+    ) -> None:
+        if len(players) > MAX_PLAYERS:
+            raise ValueError(
+                f"A columnar history holds at most {MAX_PLAYERS} players,"
+                f" not {len(players)}"
+            )
+        self.players = players
+        self.input_method = input_method
+        self.player_ids = array("B")
+        self.segments = array("B")
+        self.multipliers = array("B")
+        self.scores = array("H")
+        self.throws_in_round = array("B")
+        self.set_offsets = array("L", [0])
+        self.leg_offsets = array("L", [0])
+
+    @classmethod
+    def from_history(
+        cls,
+        history: list[list[list[Turn]]],
+        players: list[Player],
+        input_method: InputMethod = InputMethod.THREEDARTS,
+    ) -> "ColumnarHistory":
+        columnar = cls(players, input_method)
+        for set_nr, dset in enumerate(history):
+            for leg_nr, leg in enumerate(dset):
+                if leg_nr:
+                    columnar.new_leg()
+                elif set_nr:
+                    columnar.new_leg(new_set=True)
+                for turn in leg:
+                    columnar.append(turn)
+        return columnar
+
+    def __len__(self) -> int:
+        return len(self.player_ids)
+
+    def __getitem__(self, index: int) -> TurnView:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"Dart {index} is not in the history")
+        return TurnView(self, index)
+
+    def append(self, turn: Turn) -> None:
+        segment, multiplier = encode_throw(turn.throw)
+        self.player_ids.append(turn.player.idf)
+        self.segments.append(segment)
+        self.multipliers.append(multiplier)
+        self.scores.append(turn.score)
+        self.throws_in_round.append(turn.throw_in_round)
+
+    def new_leg(self, new_set: bool = False) -> None:
+        if new_set:
+            self.set_offsets.append(len(self.leg_offsets))
+        self.leg_offsets.append(len(self))
+
+    def pop(self) -> Optional[Turn]:
+        # same order as Scoreboard.undo_throw, empty legs and sets are dropped first
+        if not len(self):
+            return None
+        while self.leg_offsets[-1] == len(self):
+            if self.set_offsets[-1] == len(self.leg_offsets) - 1:
+                self.set_offsets.pop()
+            self.leg_offsets.pop()
+        turn = self[-1].to_turn()
+        for column in self.columns().values():
+            column.pop()
+        return turn
+
+    def columns(self) -> dict[str, array]:
+        return {
+            "player_ids": self.player_ids,
+            "segments": self.segments,
+            "multipliers": self.multipliers,
+            "scores": self.scores,
+            "throws_in_round": self.throws_in_round,
+        }
+
+    def points(self) -> array:
+        return array(
+            "H", (seg * mult for seg, mult in zip(self.segments, self.multipliers))
+        )
+
+    def leg_bounds(self) -> list[list[tuple[int, int]]]:
+        leg_ends = list(self.leg_offsets[1:]) + [len(self)]
+        set_ends = list(self.set_offsets[1:]) + [len(self.leg_offsets)]
+        return [
+            [
+                (self.leg_offsets[leg], leg_ends[leg])
+                for leg in range(self.set_offsets[dset], set_ends[dset])
+            ]
+            for dset in range(len(self.set_offsets))
+        ]
+
+    def views(self) -> list[list[list[TurnView]]]:
+        return [
+            [[TurnView(self, i) for i in range(start, end)] for start, end in dset]
+            for dset in self.leg_bounds()
+        ]
+
+    def to_history(self) -> list[list[list[Turn]]]:
+        return [
+            [[turn.to_turn() for turn in leg] for leg in dset] for dset in self.views()
+        ]
+
+    def nbytes(self) -> int:
+        return sum(
+            len(column) * column.itemsize
+            for column in [*self.columns().values(), self.set_offsets, self.leg_offsets]
+        )
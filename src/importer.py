@@ -0,0 +1,168 @@
+import os
+import sys
+import csv
+import time
+from collections import deque
+from datetime import datetime
+from itertools import groupby, islice
+from dataclasses import dataclass
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional
+
+from src.game_archive import GameArchive
+from src.game_options import CheckInOut, GameOptions, InputMethod
+from src.scoreboard import Scoreboard
+from src.throw import Throw
+
+# The sheets of the VBA version are exported as CSV with one row per dart in the
+# order they were thrown. Missing option columns fall back to the GameOptions
+# defaults, the player of the first row of a match started the match.
+LEGACY_COLUMNS = [
+    "match",
+    "played_at",
+    "start_points",
+    "check_out",
+    "sets",
+    "legs",
+    "player",
+    "throw",
+]
+MATCHES_PER_CHUNK = 200
+CHUNKS_IN_FLIGHT = 4
+
+LegacyRow = dict[str, str]
+LegacyMatch = tuple[str, list[LegacyRow]]
+ParsedChunk = tuple[list[tuple[Scoreboard, Optional[float]]], int, int]
+
+
+@dataclass
+class ImportProgress:
+    matches: int = 0
+    darts: int = 0
+    rejected: int = 0
+    skipped: int = 0
+    elapsed: float = 0
+
+    def darts_per_second(self) -> float:
+        return self.darts / self.elapsed if self.elapsed else 0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.matches} matches ({self.rejected} rejected, {self.skipped}"
+            f" already imported), {self.darts} darts,"
+            f" {self.darts_per_second():.0f} darts/s"
+        )
+
+
+def read_rows(file_name: str) -> Iterator[LegacyRow]:
+    with open(file_name, "r", newline="", encoding="utf-8-sig") as file:
+        yield from csv.DictReader(file)
+
+
+def group_matches(rows: Iterable[LegacyRow]) -> Iterator[LegacyMatch]:
+    for match, match_rows in groupby(rows, key=lambda row: row["match"]):
+        yield match, list(match_rows)
+
+
+def chunked(matches: Iterable[LegacyMatch], size: int) -> Iterator[list[LegacyMatch]]:
+    iterator = iter(matches)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def options_of(row: LegacyRow) -> GameOptions:
+    game_options = GameOptions()
+    if row.get("start_points"):
+        game_options.start_points = int(row["start_points"])
+    if row.get("check_out"):
+        game_options.check_out = CheckInOut(row["check_out"].strip().lower())
+    if row.get("sets"):
+        game_options.sets = int(row["sets"])
+    if row.get("legs"):
+        game_options.legs = int(row["legs"])
+    return game_options
+
+
+def played_at_of(row: LegacyRow) -> Optional[float]:
+    if not row.get("played_at"):
+        return None
+    return datetime.fromisoformat(row["played_at"].strip()).timestamp()
+
+
+def parse_match(rows: list[LegacyRow]) -> tuple[Scoreboard, Optional[float]]:
+    scoreboard = Scoreboard(options_of(rows[0]))
+    names = list(dict.fromkeys(row["player"] for row in rows))
+    for name in names:
+        scoreboard.register_player(name)
+    for row in rows:
+        throw = Throw(row["throw"] or "0", InputMethod.THREEDARTS)
+        player, throw_in_round = scoreboard.current_player()
+        if player.name != row["player"]:
+            raise ValueError(f"{row['player']} threw out of turn, expected {player}")
+        scoreboard.add_throw(player, throw, throw_in_round)
+        if not scoreboard.was_overthrow(player):
+            scoreboard.append_hist_if_winning_throw(player)
+    return scoreboard, played_at_of(rows[0])
+
+
+def parse_chunk(chunk: list[LegacyMatch]) -> ParsedChunk:
+    games = []
+    rejected = 0
+    darts = 0
+    for _, rows in chunk:
+        darts += len(rows)
+        try:
+            games.append(parse_match(rows))
+        except (ValueError, KeyError):
+            rejected += 1
+    return games, rejected, darts
+
+
+def import_legacy(
+    file_name: str,
+    archive: GameArchive,
+    workers: Optional[int] = None,
+    matches_per_chunk: int = MATCHES_PER_CHUNK,
+    report: Optional[Callable[[ImportProgress], None]] = None,
+) -> ImportProgress:
+    # Streams the file, parses chunks of matches on a process pool and commits them
+    # in file order. Each commit also stores how many matches of the file are done,
+    # so an interrupted import resumes after the last committed chunk.
+    source = os.path.abspath(file_name)
+    progress = ImportProgress(skipped=archive.imported_matches(source))
+    started = time.monotonic()
+    matches = islice(group_matches(read_rows(file_name)), progress.skipped, None)
+    chunks = chunked(matches, matches_per_chunk)
+
+    def commit(chunk_size: int, parsed: ParsedChunk) -> None:
+        games, rejected, darts = parsed
+        archive.add_games(games, source=source, imported=chunk_size)
+        progress.matches += chunk_size
+        progress.rejected += rejected
+        progress.darts += darts
+        progress.elapsed = time.monotonic() - started
+        if report:
+            report(progress)
+
+    if workers == 0:
+        for chunk in chunks:
+            commit(len(chunk), parse_chunk(chunk))
+        return progress
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: deque[tuple[int, Future[ParsedChunk]]] = deque()
+        for chunk in chunks:
+            pending.append((len(chunk), executor.submit(parse_chunk, chunk)))
+            if len(pending) >= CHUNKS_IN_FLIGHT:
+                chunk_size, future = pending.popleft()
+                commit(chunk_size, future.result())
+        while pending:
+            chunk_size, future = pending.popleft()
+            commit(chunk_size, future.result())
+    return progress
+
+
+if __name__ == "__main__":
+    with GameArchive() as game_archive:
+        for legacy_file in sys.argv[1:]:
+            print(f"Importing {legacy_file}")
+            import_legacy(legacy_file, game_archive, report=print)
@@ -0,0 +1,190 @@
+import time
+import threading
+from queue import SimpleQueue
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional
+
+from src.cli import parse_input
+from src.darts import XOhOneGame
+from src.game_options import ThrowReturn
+from src.instrumentation import CallStats
+from src.scoreboard import Stats, Turn
+from src.throw import Throw
+
+
+@dataclass
+class Command:
+    source: str
+    throw_return: ThrowReturn
+    throw: Throw
+    submitted_ns: int = field(default_factory=time.perf_counter_ns)
+    done: Optional[threading.Event] = None  # set when the command was applied
+
+
+@dataclass(frozen=True)
+class BoardSnapshot:
+    # The state after a command, never changed after it was published. Readers
+    # take the latest one from ThrowIngestor.snapshot without a lock.
+    seq: int
+    stats: tuple[Stats, ...]
+    last_turns: tuple[Turn, ...]
+    player: str
+    remaining: int
+    dart: int
+    finished: bool
+    source: str = ""  # of the last applied command
+    submitted_ns: int = 0
+
+
+class ThrowIngestor:
+    # Several input sources submit throws, undos and redos for one game from any
+    # thread. Commands are queued and a single writer thread applies them in the
+    # order they were submitted, the scoreboard is never touched by another thread.
+    def __init__(self, game: XOhOneGame) -> None:
+        self.game = game
+        self.queue: SimpleQueue[Optional[Command]] = SimpleQueue()
+        self.seq = 0
+        self.snapshot = self.take_snapshot(None, False)
+        self.changed = threading.Event()
+        self.applied: dict[str, int] = {}  # commands per source
+        self.rejected: dict[str, int] = {}  # after the game was won
+        self.apply_latency = CallStats()  # submitted until the snapshot was published
+        self.writer = threading.Thread(target=self.apply_commands, daemon=True)
+        self.writer.start()
+
+    def submit(self, source: str, user_input: str) -> Command:
+        # raises ValueError for invalid input, in the thread of the source
+        throw_return, throw = parse_input(
+            user_input.strip(), self.game.game_options.input_method
+        )
+        command = Command(source, throw_return, throw)
+        self.queue.put(command)
+        return command
+
+    def flush(self) -> None:
+        # waits until every command submitted before was applied
+        done = threading.Event()
+        self.queue.put(Command("", ThrowReturn.THROW, Throw("0"), done=done))
+        done.wait()
+
+    def close(self) -> None:
+        if self.writer.is_alive():
+            self.queue.put(None)
+            self.writer.join()
+
+    def apply_commands(self) -> None:
+        while (command := self.queue.get()) is not None:
+            if command.done:
+                command.done.set()
+                continue
+            if self.snapshot.finished or command.throw_return == ThrowReturn.EXIT:
+                self.rejected[command.source] = self.rejected.get(command.source, 0) + 1
+                continue
+            game_won = self.game.apply_input(command.throw_return, command.throw)
+            self.applied[command.source] = self.applied.get(command.source, 0) + 1
+            self.snapshot = self.take_snapshot(command, game_won)
+            self.changed.set()
+            self.apply_latency.add(time.perf_counter_ns() - command.submitted_ns)
+
+    def take_snapshot(
+        self, command: Optional[Command], finished: bool
+    ) -> BoardSnapshot:
+        scoreboard = self.game.scoreboard
+        self.seq += 1
+        if not scoreboard.players:
+            return BoardSnapshot(self.seq, (), (), "", 0, 0, False)
+        player, throw_in_round = scoreboard.current_player()
+        return BoardSnapshot(
+            seq=self.seq,
+            stats=tuple(scoreboard.get_all_stats()),
+            last_turns=tuple(scoreboard.turns_of_current_round()),
+            player=player.name,
+            remaining=scoreboard.get_remaining_score_of(player),
+            dart=throw_in_round,
+            finished=finished,
+            source=command.source if command else "",
+            submitted_ns=command.submitted_ns if command else 0,
+        )
+
+
+class Renderer:
+    # Draws the latest snapshot in its own thread. Snapshots published while
+    # drawing are skipped, the next frame shows the newest one.
+    def __init__(
+        self, ingestor: ThrowIngestor, render: Callable[[BoardSnapshot], None]
+    ) -> None:
+        self.ingestor = ingestor
+        self.render = render
+        self.latency = CallStats()  # submitted until the frame was drawn
+        self.frames = 0
+        self.running = True
+        self.thread = threading.Thread(target=self.draw_frames, daemon=True)
+        self.thread.start()
+
+    def draw_frames(self) -> None:
+        drawn = 0
+        while self.running:
+            self.ingestor.changed.wait()
+            self.ingestor.changed.clear()
+            snapshot = self.ingestor.snapshot
+            if snapshot.seq == drawn or not self.running:
+                continue
+            self.render(snapshot)
+            drawn = snapshot.seq
+            self.frames += 1
+            if snapshot.submitted_ns:
+                self.latency.add(time.perf_counter_ns() - snapshot.submitted_ns)
+
+    def stop(self) -> None:
+        self.running = False
+        self.ingestor.changed.set()
+        self.thread.join()
+
+
+class StreamSource:
+    # Submits one input per line of a file, a pipe or any other text stream,
+    # e.g. a named pipe written by a device or a recorded device log.
+    def __init__(
+        self,
+        ingestor: ThrowIngestor,
+        name: str,
+        stream: Iterable[str],
+        delay: float = 0,
+    ) -> None:
+        self.ingestor = ingestor
+        self.name = name
+        self.stream = stream
+        self.delay = delay  # seconds between lines to replay a recording
+        self.errors: list[str] = []
+        self.thread = threading.Thread(target=self.read_lines, daemon=True)
+
+    def start(self) -> "StreamSource":
+        self.thread.start()
+        return self
+
+    def read_lines(self) -> None:
+        for line in self.stream:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            try:
+                self.ingestor.submit(self.name, line)
+            except ValueError as err:
+                self.errors.append(f"{line}: {err}")
+            if self.delay:
+                time.sleep(self.delay)
+
+    def join(self) -> None:
+        self.thread.join()
+
+
+def open_source(
+    ingestor: ThrowIngestor, name: str, file_name: str, delay: float = 0
+) -> StreamSource:
+    # opening a named pipe blocks until the device side is opened, so it is
+    # opened in the thread of the source
+    def lines() -> Iterable[str]:
+        with open(file_name, "r") as stream:
+            yield from stream
+
+    return StreamSource(ingestor, name, lines(), delay).start()
@@ -0,0 +1,160 @@
+import sys
+import time
+import atexit
+import functools
+import importlib
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, TextIO
+
+# hot paths of the game loop as module, class and attribute
+HOT_PATHS = [
+    ("src.darts", "XOhOne", "do_player_round"),
+    ("src.scoreboard", "Scoreboard", "add_throw"),
+    ("src.scoreboard", "Scoreboard", "get_all_stats"),
+    ("src.scoreboard", "Scoreboard", "current_player"),
+    ("src.throw", "Throw", "__new__"),
+    ("src.cli", "CLI", "display_scoreboard"),
+]
+BUCKETS = 64  # powers of two nanoseconds
+PERCENTILES = [50, 90, 99]
+
+
+@dataclass
+class CallStats:
+    calls: int = 0
+    total_ns: int = 0
+    max_ns: int = 0
+    # calls per latency bucket, bucket b holds latencies below 2**b ns
+    buckets: list[int] = field(default_factory=lambda: [0] * BUCKETS)
+    memory: int = 0  # bytes allocated and still held after the calls
+    max_memory: int = 0
+
+    def add(self, elapsed_ns: int, memory: int = 0) -> None:
+        self.calls += 1
+        self.total_ns += elapsed_ns
+        self.max_ns = max(self.max_ns, elapsed_ns)
+        self.buckets[min(elapsed_ns.bit_length(), BUCKETS - 1)] += 1
+        self.memory += memory
+        self.max_memory = max(self.max_memory, memory)
+
+    def clear(self) -> None:
+        self.calls = self.total_ns = self.max_ns = self.memory = self.max_memory = 0
+        self.buckets = [0] * BUCKETS
+
+    def percentile(self, percent: int) -> int:
+        # upper bound of the bucket holding the percentile
+        if not self.calls:
+            return 0
+        wanted = self.calls * percent / 100
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if seen >= wanted:
+                return min(2**bucket, self.max_ns)
+        return self.max_ns
+
+
+class Instrumentation:
+    # Wraps the hot paths only while enabled. Disabled, the original functions are
+    # in place, so there is no cost at all.
+    def __init__(self) -> None:
+        self.stats: dict[str, CallStats] = {}
+        self.originals: list[tuple[type, str, Any]] = []
+        self.trace_memory = False
+
+    def enable(
+        self,
+        targets: list[tuple[str, str, str]] = HOT_PATHS,
+        trace_memory: bool = False,
+        report_on_exit: bool = False,
+    ) -> None:
+        if self.originals:
+            self.disable()
+        self.trace_memory = trace_memory
+        if trace_memory:
+            import tracemalloc
+
+            tracemalloc.start()
+        for module_name, class_name, attribute in targets:
+            owner = getattr(importlib.import_module(module_name), class_name)
+            original = owner.__dict__[attribute]
+            name = f"{class_name}.{attribute}"
+            if isinstance(original, (staticmethod, classmethod)):
+                wrapped: Any = type(original)(self.wrap(name, original.__func__))
+            else:
+                wrapped = self.wrap(name, original)
+            self.originals.append((owner, attribute, original))
+            setattr(owner, attribute, wrapped)
+        if report_on_exit:
+            atexit.register(self.dump)
+
+    def disable(self) -> None:
+        for owner, attribute, original in reversed(self.originals):
+            setattr(owner, attribute, original)
+        self.originals = []
+        if self.trace_memory:
+            import tracemalloc
+
+            tracemalloc.stop()
+            self.trace_memory = False
+
+    def wrap(self, name: str, function: Callable[..., Any]) -> Callable[..., Any]:
+        stats = self.stats.setdefault(name, CallStats())
+        clock = time.perf_counter_ns
+        if self.trace_memory:
+            import tracemalloc
+
+            traced_memory = tracemalloc.get_traced_memory
+
+            @functools.wraps(function)
+            def traced(*args: Any, **kwargs: Any) -> Any:
+                memory = traced_memory()[0]
+                started = clock()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    stats.add(clock() - started, traced_memory()[0] - memory)
+
+            return traced
+
+        @functools.wraps(function)
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            started = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stats.add(clock() - started)
+
+        return timed
+
+    def reset(self) -> None:
+        for stats in self.stats.values():
+            stats.clear()
+
+    def report(self) -> str:
+        columns = ["calls", "total ms", "mean us"]
+        columns += [f"p{percent} us" for percent in PERCENTILES] + ["max us"]
+        if self.trace_memory:
+            columns += ["memory kB", "max kB"]
+        width = max([len(name) for name in self.stats] + [8])
+        lines = [f"{'':{width}}" + "".join(f"{column:>11}" for column in columns)]
+        for name, stats in sorted(
+            self.stats.items(), key=lambda item: -item[1].total_ns
+        ):
+            values = [
+                f"{stats.calls}",
+                f"{stats.total_ns / 1e6:.1f}",
+                f"{stats.total_ns / stats.calls / 1e3 if stats.calls else 0:.1f}",
+            ]
+            values += [f"{stats.percentile(p) / 1e3:.1f}" for p in PERCENTILES]
+            values.append(f"{stats.max_ns / 1e3:.1f}")
+            if self.trace_memory:
+                values += [f"{stats.memory / 1e3:.1f}", f"{stats.max_memory / 1e3:.1f}"]
+            lines.append(f"{name:{width}}" + "".join(f"{v:>11}" for v in values))
+        return "\n".join(lines)
+
+    def dump(self, file: Optional[TextIO] = None) -> None:
+        print(self.report(), file=file or sys.stderr)
+
+
+profiler = Instrumentation()
@@ -0,0 +1,212 @@
+import os
+import json
+import time
+import threading
+from uuid import uuid4
+from dataclasses import dataclass
+from queue import Empty, SimpleQueue
+from typing import Any, Iterable, Iterator, Optional, Union
+
+from src.game_options import GameOptions, InputMethod
+from src.scoreboard import Player, Scoreboard
+from src.throw import Throw
+
+GAME_JOURNAL_FILE = "game_journal.jsonl"
+FSYNC_EVERY = 64  # events
+FSYNC_INTERVAL = 1.0  # seconds
+
+
+@dataclass
+class FileWrite:
+    # a file replaced by the writer thread once the events before it are on
+    # disk, no data removes the file
+    file_name: str
+    data: Optional[bytes]
+
+
+def replace_file(file_name: str, data: Optional[bytes]) -> None:
+    # written to a temporary file first, a crash leaves the old or the new file
+    if data is None:
+        if os.path.exists(file_name):
+            os.remove(file_name)
+        return
+    temporary = f"{file_name}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, file_name)
+
+
+class GameJournal:
+    # Events are handed to a writer thread, so recording a throw only costs a queue
+    # put. The writer appends one JSON line per event and fsyncs in batches.
+    def __init__(
+        self,
+        file_name: str = GAME_JOURNAL_FILE,
+        fsync_every: int = FSYNC_EVERY,
+        fsync_interval: float = FSYNC_INTERVAL,
+    ) -> None:
+        self.file_name = file_name
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.game_id = ""
+        self.events = 0  # recorded for the current game, the seq of the last one
+        self.queue: SimpleQueue[
+            Union[dict[str, Any], threading.Event, FileWrite, None]
+        ] = SimpleQueue()
+        self.writer = threading.Thread(target=self.write_events, daemon=True)
+        self.writer.start()
+
+    def __enter__(self) -> "GameJournal":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def record(self, event: str, **values: Any) -> None:
+        self.events += 1
+        values.update(event=event, game=self.game_id, time=time.time(), seq=self.events)
+        self.queue.put(values)
+
+    def start_game(self, game_options: GameOptions, game_id: str = "") -> str:
+        self.game_id = game_id or uuid4().hex
+        self.events = 0
+        self.record("game", options=game_options.to_dict())
+        return self.game_id
+
+    def record_register(self, player: Player) -> None:
+        self.record("register", player=player.idf, name=player.name)
+
+    def record_throw(self, player: Player, throw: Throw, throw_in_round: int) -> None:
+        self.record(
+            "throw",
+            player=player.idf,
+            throw=throw.input_score,
+            input_method=throw.input_methode.value,
+            dart=throw_in_round,
+        )
+
+    def record_undo(self) -> None:
+        self.record("undo")
+
+    def record_redo(self) -> None:
+        self.record("redo")
+
+    def record_win(self, asked: str, player: Player) -> None:
+        self.record(asked, player=player.idf)
+
+    def write_events(self) -> None:
+        unsynced = 0
+        last_sync = time.monotonic()
+        with open(self.file_name, "a") as file:
+            while True:
+                try:
+                    event = self.queue.get(timeout=self.fsync_interval)
+                except Empty:
+                    event = {}
+                if event is None:
+                    break
+                if isinstance(event, (threading.Event, FileWrite)):
+                    file.flush()
+                    os.fsync(file.fileno())
+                    unsynced = 0
+                    last_sync = time.monotonic()
+                    if isinstance(event, FileWrite):
+                        replace_file(event.file_name, event.data)
+                    else:
+                        event.set()
+                    continue
+                if event:
+                    file.write(json.dumps(event) + "\n")
+                    unsynced += 1
+                if unsynced and (
+                    unsynced >= self.fsync_every
+                    or time.monotonic() - last_sync >= self.fsync_interval
+                ):
+                    file.flush()
+                    os.fsync(file.fileno())
+                    unsynced = 0
+                    last_sync = time.monotonic()
+            file.flush()
+            os.fsync(file.fileno())
+
+    def write_file(self, file_name: str, data: Optional[bytes]) -> None:
+        # e.g. a snapshot of the match, it is written after the events recorded
+        # so far without the game waiting for the disk
+        if self.writer.is_alive():
+            self.queue.put(FileWrite(file_name, data))
+        else:
+            replace_file(file_name, data)
+
+    def sync(self) -> None:
+        # waits until every recorded event is written and on disk
+        if self.writer.is_alive():
+            synced = threading.Event()
+            self.queue.put(synced)
+            synced.wait()
+
+    def close(self) -> None:
+        if self.writer.is_alive():
+            self.queue.put(None)
+            self.writer.join()
+
+
+def read_journal(file_name: str = GAME_JOURNAL_FILE) -> Iterator[dict[str, Any]]:
+    if not os.path.exists(file_name):
+        return
+    with open(file_name, "r") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:  # torn last line after a crash
+                return
+
+
+def read_game_events(
+    game_id: str, after: int = 0, file_name: str = GAME_JOURNAL_FILE
+) -> Iterator[dict[str, Any]]:
+    # events of one game with a seq after the given one, lines of other games
+    # are not parsed
+    if not os.path.exists(file_name):
+        return
+    quoted_id = json.dumps(game_id)
+    with open(file_name, "r") as file:
+        for line in file:
+            if quoted_id not in line:
+                continue
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:  # torn last line after a crash
+                return
+            if event.get("game") == game_id and event["seq"] > after:
+                yield event
+
+
+def apply_event(scoreboard: Scoreboard, event: dict[str, Any]) -> None:
+    if event["event"] == "register":
+        scoreboard.register_player(event["name"])
+    elif event["event"] == "throw":
+        player = scoreboard.players[event["player"]]
+        throw = Throw(event["throw"], InputMethod(event["input_method"]))
+        scoreboard.add_throw(player, throw, event["dart"])
+        if not scoreboard.was_overthrow(player):
+            scoreboard.append_hist_if_winning_throw(player)
+    elif event["event"] == "undo":
+        scoreboard.undo_throw()
+    elif event["event"] == "redo":
+        scoreboard.redo_throw()
+    # leg and set wins are derived by the scoreboard itself
+
+
+def replay(events: Iterable[dict[str, Any]]) -> dict[str, Scoreboard]:
+    scoreboards: dict[str, Scoreboard] = {}
+    for event in events:
+        if event["event"] == "game":
+            game_options = GameOptions.from_dict(event["options"])
+            scoreboards[event["game"]] = Scoreboard(game_options)
+        elif event["game"] in scoreboards:
+            apply_event(scoreboards[event["game"]], event)
+    return scoreboards
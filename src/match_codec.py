@@ -0,0 +1,215 @@
+import struct
+from enum import Enum
+from typing import Iterable, Iterator, Optional
+
+from src.game_options import (
+    CheckInOut,
+    GameMode,
+    GameOptions,
+    InputMethod,
+    SetLegMode,
+)
+from src.rules import get_rules_of
+from src.scoreboard import Player, Scoreboard, Turn
+from src.throw import THROW_TABLE, Throw
+
+MAGIC = b"DRT\x01"
+# magic, game mode, sets, legs, start points, check out, check in, win mode,
+# input method and start player, enums are stored by their position
+HEADER = struct.Struct("<4sBHHHBBBBB")
+MATCH_LENGTH = struct.Struct("<I")
+# every input of an input method is one byte, its position in the throw table
+DART_CODES = {
+    input_method: list(THROW_TABLE[input_method].values())
+    for input_method in InputMethod
+}
+BYTE_OF = {
+    throw.code: byte
+    for codes in DART_CODES.values()
+    for byte, throw in enumerate(codes)
+}
+# a dart thrown out of turn is prefixed with ESCAPE, its player and dart in visit
+ESCAPE = 255
+
+
+def enum_index(member: Enum) -> int:
+    return list(type(member)).index(member)
+
+
+def encode_options(game_options: GameOptions) -> bytes:
+    return HEADER.pack(
+        MAGIC,
+        enum_index(game_options.game_mode),
+        game_options.sets,
+        game_options.legs,
+        game_options.start_points,
+        enum_index(game_options.check_out),
+        enum_index(game_options.check_in),
+        enum_index(game_options.win_mode),
+        enum_index(game_options.input_method),
+        game_options.start_player,
+    )
+
+
+def decode_options(data: bytes) -> GameOptions:
+    (
+        magic,
+        game_mode,
+        sets,
+        legs,
+        start_points,
+        check_out,
+        check_in,
+        win_mode,
+        input_method,
+        start_player,
+    ) = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Data is not an encoded match")
+    return GameOptions(
+        game_mode=list(GameMode)[game_mode],
+        sets=sets,
+        legs=legs,
+        start_points=start_points,
+        check_out=list(CheckInOut)[check_out],
+        check_in=list(CheckInOut)[check_in],
+        win_mode=list(SetLegMode)[win_mode],
+        input_method=list(InputMethod)[input_method],
+        start_player=start_player,
+    )
+
+
+class TurnOrder:
+    # Who throws next, the same order the scoreboard keeps. Only darts thrown
+    # out of this order need more than one byte.
+    def __init__(self, game_options: GameOptions, players: int) -> None:
+        self.game_options = game_options
+        self.rules = get_rules_of(game_options)
+        self.players = players
+        self.remaining = [game_options.start_points] * players
+        self.visit = (0, 0)
+
+    def start_leg(self, set_nr: int, leg_nr: int) -> None:
+        # the start player moves on with every won leg and set
+        start_player = self.game_options.start_player + set_nr + leg_nr
+        self.visit = start_player % self.players, 0
+        self.remaining = [self.game_options.start_points] * self.players
+
+    def throw(self, player: int, throw: Throw, throw_in_round: int) -> int:
+        # remaining score of player before the dart
+        score = self.remaining[player]
+        new_score, bust, _ = self.rules.lookup(score, throw)
+        self.remaining[player] = new_score
+        if throw_in_round < self.game_options.input_method.value - 1 and not bust:
+            self.visit = player, throw_in_round + 1
+        else:
+            self.visit = (player + 1) % self.players, 0
+        return score
+
+
+def encode_match(
+    scoreboard: Scoreboard, history: Optional[list[list[list[Turn]]]] = None
+) -> bytes:
+    # options, player names, darts per leg of every set and one byte per dart,
+    # of the history of the scoreboard or the given one
+    game_options = scoreboard.game_options
+    players = scoreboard.get_players()
+    history = scoreboard.get_history() if history is None else history
+    parts = [encode_options(game_options), bytes([len(players)])]
+    for player in players:
+        name = player.name.encode()
+        parts += [bytes([len(name)]), name]
+    legs_per_set = [len(dset) for dset in history]
+    darts_per_leg = [len(leg) for dset in history for leg in dset]
+    parts.append(struct.pack(f"<I{len(legs_per_set)}H", len(history), *legs_per_set))
+    parts.append(struct.pack(f"<{len(darts_per_leg)}I", *darts_per_leg))
+    darts = bytearray()
+    order = TurnOrder(game_options, len(players))
+    for set_nr, dset in enumerate(history):
+        for leg_nr, leg in enumerate(dset):
+            order.start_leg(set_nr, leg_nr)
+            for turn in leg:
+                visit = turn.player.idf, turn.throw_in_round
+                if visit != order.visit:
+                    darts += bytes([ESCAPE, *visit])
+                darts.append(BYTE_OF[turn.throw.code])
+                order.throw(turn.player.idf, turn.throw, turn.throw_in_round)
+    parts.append(bytes(darts))
+    return b"".join(parts)
+
+
+def decode_history(
+    data: bytes,
+) -> tuple[GameOptions, list[Player], list[list[list[Turn]]]]:
+    game_options = decode_options(data)
+    offset = HEADER.size
+    players: list[Player] = []
+    for idf in range(data[offset]):
+        length = data[offset + 1]
+        name = data[offset + 2 : offset + 2 + length].decode()
+        players.append(Player(idf, name))
+        offset += 1 + length
+    offset += 1
+    (sets,) = struct.unpack_from("<I", data, offset)
+    legs_per_set = struct.unpack_from(f"<{sets}H", data, offset + 4)
+    offset += 4 + 2 * sets
+    darts_per_leg = iter(struct.unpack_from(f"<{sum(legs_per_set)}I", data, offset))
+    offset += 4 * sum(legs_per_set)
+    codes = DART_CODES[game_options.input_method]
+    order = TurnOrder(game_options, len(players))
+    history: list[list[list[Turn]]] = []
+    for set_nr, legs in enumerate(legs_per_set):
+        dset: list[list[Turn]] = []
+        for leg_nr in range(legs):
+            order.start_leg(set_nr, leg_nr)
+            leg: list[Turn] = []
+            for _ in range(next(darts_per_leg)):
+                player, throw_in_round = order.visit
+                if data[offset] == ESCAPE:
+                    player, throw_in_round = data[offset + 1], data[offset + 2]
+                    offset += 3
+                throw = codes[data[offset]]
+                offset += 1
+                score = order.throw(player, throw, throw_in_round)
+                leg.append(Turn(players[player], score, throw, throw_in_round))
+            dset.append(leg)
+        history.append(dset)
+    return game_options, players, history
+
+
+def decode_match(data: bytes) -> Scoreboard:
+    # a scoreboard with the full state, as if the darts were thrown again
+    game_options, players, history = decode_history(data)
+    scoreboard = Scoreboard(game_options)
+    for player in players:
+        scoreboard.register_player(player.name)
+    for dset in history:
+        for leg in dset:
+            for turn in leg:
+                player = scoreboard.players[turn.player.idf]
+                scoreboard.add_throw(player, turn.throw, turn.throw_in_round)
+                if not scoreboard.was_overthrow(player):
+                    scoreboard.append_hist_if_winning_throw(player)
+    return scoreboard
+
+
+def encode_matches(scoreboards: Iterable[Scoreboard]) -> bytes:
+    # an archive of matches, each one prefixed with its length
+    parts = []
+    for scoreboard in scoreboards:
+        data = encode_match(scoreboard)
+        parts += [MATCH_LENGTH.pack(len(data)), data]
+    return b"".join(parts)
+
+
+def iter_matches(data: bytes) -> Iterator[bytes]:
+    offset = 0
+    while offset < len(data):
+        (length,) = MATCH_LENGTH.unpack_from(data, offset)
+        offset += MATCH_LENGTH.size
+        yield data[offset : offset + length]
+        offset += length
+
+
+def decode_matches(data: bytes) -> list[Scoreboard]:
+    return [decode_match(match) for match in iter_matches(data)]
@@ -0,0 +1,159 @@
+import os
+import json
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from src.journal import (
+    GAME_JOURNAL_FILE,
+    GameJournal,
+    apply_event,
+    read_game_events,
+    replace_file,
+)
+from src.folded_legs import BoundedScoreboard
+from src.match_codec import decode_history, encode_match
+from src.scoreboard import PlayerTally, Scoreboard, Turn
+from src.throw import Throw
+
+MATCH_SNAPSHOT_FILE = "match_snapshot.bin"
+SAVE_EVERY = 15  # darts, legs won are saved right away as well
+
+
+def snapshot_data(scoreboard: Scoreboard, game_id: str, events: int) -> bytes:
+    # a JSON line with the game, the journal events it contains and the running
+    # aggregates, followed by the match in the binary match encoding. Folded legs
+    # are saved by their counts, followed by the legs if kept in memory, and only
+    # the live leg is encoded.
+    header: dict[str, Any] = {
+        "game": game_id,
+        "events": events,
+        "leg_shifts": scoreboard.leg_shifts,
+        "redo": [
+            [turn.player.idf, turn.score, turn.throw.input_score, turn.throw_in_round]
+            for turn in scoreboard.timeline[scoreboard.position :]
+        ],
+    }
+    if not isinstance(scoreboard, BoundedScoreboard):
+        header["tallies"] = [vars(tally) for tally in scoreboard.tallies]
+        header["closed_leg_scores"] = scoreboard.closed_leg_scores
+        return json.dumps(header).encode() + b"\n" + encode_match(scoreboard)
+    header["folded"], stored = scoreboard.folded_state()
+    header["stored"] = len(stored)
+    match = encode_match(scoreboard, scoreboard.live_history())
+    return json.dumps(header).encode() + b"\n" + stored + match
+
+
+def save_snapshot(
+    scoreboard: Scoreboard,
+    game_id: str,
+    events: int,
+    file_name: str = MATCH_SNAPSHOT_FILE,
+) -> None:
+    replace_file(file_name, snapshot_data(scoreboard, game_id, events))
+
+
+def restore_scoreboard(data: bytes) -> tuple[Scoreboard, str, int]:
+    header_line, match = data.split(b"\n", 1)
+    header: dict[str, Any] = json.loads(header_line)
+    stored, match = match[: header.get("stored", 0)], match[header.get("stored", 0) :]
+    game_options, players, history = decode_history(match)
+    scoreboard = Scoreboard(game_options)
+    if "folded" in header:
+        scoreboard = BoundedScoreboard(game_options)
+    for player in players:
+        scoreboard.register_player(player.name)
+    start = scoreboard.take_snapshot()
+    scoreboard.players = players
+    scoreboard.leg_shifts = header["leg_shifts"]
+    redo = [
+        Turn(players[player], score, Throw(throw, game_options.input_method), dart)
+        for player, score, throw, dart in header["redo"]
+    ]
+    if isinstance(scoreboard, BoundedScoreboard):
+        scoreboard.restore_folded(header["folded"], stored, history[-1][-1], redo)
+    else:
+        scoreboard.history = history
+        scoreboard.tallies = [PlayerTally(**tally) for tally in header["tallies"]]
+        scoreboard.closed_leg_scores = header["closed_leg_scores"]
+        scoreboard.timeline = [turn for dset in history for leg in dset for turn in leg]
+        scoreboard.timeline += redo
+    scoreboard.position = len(scoreboard.timeline) - len(redo)
+    # seeking back before the resume starts from the beginning of the match
+    scoreboard.snapshots = {0: start, scoreboard.position: scoreboard.take_snapshot()}
+    scoreboard.update_visit()
+    return scoreboard, header["game"], header["events"]
+
+
+def load_snapshot(
+    file_name: str = MATCH_SNAPSHOT_FILE,
+) -> Optional[tuple[Scoreboard, str, int]]:
+    if not os.path.exists(file_name):
+        return None
+    with open(file_name, "rb") as file:
+        return restore_scoreboard(file.read())
+
+
+@dataclass
+class ResumedMatch:
+    scoreboard: Scoreboard
+    game_id: str
+    events: int  # seq of the last journal event in the snapshot or the tail
+    replayed: int
+
+
+def resume_match(
+    file_name: str = MATCH_SNAPSHOT_FILE,
+    journal_file: Optional[str] = GAME_JOURNAL_FILE,
+) -> Optional[ResumedMatch]:
+    # the latest snapshot plus the journal events written after it
+    snapshot = load_snapshot(file_name)
+    if not snapshot:
+        return None
+    scoreboard, game_id, events = snapshot
+    replayed = 0
+    tail = read_game_events(game_id, events, journal_file) if journal_file else []
+    for event in tail:
+        apply_event(scoreboard, event)
+        events = event["seq"]
+        replayed += 1
+    return ResumedMatch(scoreboard, game_id, events, replayed)
+
+
+class MatchSnapshots:
+    # Saves the match every SAVE_EVERY darts and after every won leg, a finished
+    # match is removed so there is nothing left to resume.
+    def __init__(
+        self, file_name: str = MATCH_SNAPSHOT_FILE, save_every: int = SAVE_EVERY
+    ) -> None:
+        self.file_name = file_name
+        self.save_every = save_every
+        self.saved_position = 0
+        self.saved_legs = 0  # closed
+
+    def save(self, scoreboard: Scoreboard, journal: Optional[GameJournal]) -> None:
+        # the journal events up to now are part of the snapshot, the writer thread
+        # of the journal puts them on disk before the snapshot that claims them
+        if journal:
+            data = snapshot_data(scoreboard, journal.game_id, journal.events)
+            journal.write_file(self.file_name, data)
+        else:
+            save_snapshot(scoreboard, "", 0, self.file_name)
+        self.saved_position = scoreboard.position
+        self.saved_legs = len(scoreboard.closed_leg_scores)
+
+    def after_input(
+        self, scoreboard: Scoreboard, journal: Optional[GameJournal]
+    ) -> None:
+        legs = len(scoreboard.closed_leg_scores)
+        if (
+            abs(scoreboard.position - self.saved_position) >= self.save_every
+            or legs != self.saved_legs
+        ):
+            self.save(scoreboard, journal)
+
+    def finish(self, journal: Optional[GameJournal] = None) -> None:
+        # after the snapshots still waiting to be written
+        if journal:
+            journal.write_file(self.file_name, None)
+        else:
+            replace_file(self.file_name, None)
@@ -0,0 +1,241 @@
+from dataclasses import dataclass
+from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+
+from src.game_archive import GameArchive
+from src.scoreboard import Scoreboard
+
+RATINGS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ratings (
+    player_id INTEGER PRIMARY KEY REFERENCES players (id),
+    rating REAL NOT NULL,
+    games INTEGER NOT NULL,
+    played_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rating_history (
+    player_id INTEGER NOT NULL REFERENCES players (id),
+    played_at REAL NOT NULL,
+    game_id INTEGER NOT NULL REFERENCES games (id),
+    rating REAL NOT NULL,
+    PRIMARY KEY (player_id, played_at, game_id)
+) WITHOUT ROWID;
+"""
+
+Result = tuple[int, int]  # sets and legs won, compared in this order
+RatedGame = tuple[int, float, list[tuple[int, Result]]]  # game, played at, players
+HistoryRow = tuple[int, float, int, float]  # player, played at, game, rating
+
+
+@dataclass(frozen=True)
+class EloFormula:
+    initial: float = 1500
+    k: float = 32
+    scale: float = 400  # rating difference for 10:1 odds
+
+    def expected(self, rating: float, opponent: float) -> float:
+        return 1 / (1 + 10 ** ((opponent - rating) / self.scale))
+
+    def rate(self, ratings: list[float], results: list[Result]) -> list[float]:
+        # every player plays a pairwise game against every other player of the
+        # match, the changes of a player are averaged over the opponents
+        changes = [0.0] * len(ratings)
+        for i in range(len(ratings)):
+            for j in range(i + 1, len(ratings)):
+                actual = 0.5
+                if results[i] != results[j]:
+                    actual = float(results[i] > results[j])
+                change = self.k * (actual - self.expected(ratings[i], ratings[j]))
+                changes[i] += change / (len(ratings) - 1)
+                changes[j] -= change / (len(ratings) - 1)
+        return [rating + change for rating, change in zip(ratings, changes)]
+
+
+def results_of(scoreboard: Scoreboard) -> list[Result]:
+    return [
+        (
+            scoreboard.get_won_sets_of(player),
+            sum(
+                scoreboard.get_won_legs_of(player, dset)
+                for dset in range(len(scoreboard.tallies[player.idf].legs_per_set))
+            ),
+        )
+        for player in scoreboard.get_players()
+    ]
+
+
+def rate_games(
+    formula: EloFormula, games: list[RatedGame]
+) -> tuple[dict[int, tuple[float, int, float]], list[HistoryRow]]:
+    # rates games ordered by the time they were played, returns the rating,
+    # games and last game time of every player and the rating after every game
+    current: dict[int, tuple[float, int, float]] = {}
+    history: list[HistoryRow] = []
+    for game_id, played_at, players in games:
+        before = [
+            current.get(player, (formula.initial, 0, 0))[0] for player, _ in players
+        ]
+        after = formula.rate(before, [result for _, result in players])
+        for (player, _), rating in zip(players, after):
+            current[player] = (rating, current.get(player, (0, 0, 0))[1] + 1, played_at)
+            history.append((player, played_at, game_id, rating))
+    return current, history
+
+
+def independent_groups(games: list[RatedGame]) -> list[list[RatedGame]]:
+    # games of players that never met each other, not even through common
+    # opponents, do not influence each other's ratings
+    parents: dict[int, int] = {}
+
+    def root(player: int) -> int:
+        while parents.setdefault(player, player) != player:
+            parents[player] = parents[parents[player]]
+            player = parents[player]
+        return player
+
+    for _, _, players in games:
+        first = root(players[0][0])
+        for player, _ in players[1:]:
+            parents[root(player)] = first
+    groups: dict[int, list[RatedGame]] = {}
+    for game in games:
+        groups.setdefault(root(game[2][0][0]), []).append(game)
+    return list(groups.values())
+
+
+class Ratings:
+    # Elo ratings of the players of a game archive, updated with every finished
+    # game. The rating after every game is kept for point in time queries.
+    def __init__(
+        self, archive: GameArchive, formula: EloFormula = EloFormula()
+    ) -> None:
+        self.archive = archive
+        self.connection = archive.connection
+        self.formula = formula
+        self.connection.executescript(RATINGS_SCHEMA)
+
+    def add_game(
+        self, scoreboard: Scoreboard, played_at: Optional[float] = None
+    ) -> int:
+        # the game and the new ratings are committed in the same transaction
+        with self.connection:
+            game_id = self.archive.insert_game(scoreboard, played_at)
+            row = self.connection.execute(
+                "SELECT played_at, winner_id FROM games WHERE id = ?", (game_id,)
+            ).fetchone()
+            if row[1] is None:  # not finished
+                return game_id
+            last = self.connection.execute(
+                "SELECT MAX(played_at) FROM ratings"
+            ).fetchone()[0]
+            if last is not None and row[0] < last:
+                # an older game changes every rating after it
+                self.rebuild_ratings(self.rated_games())
+                return game_id
+            ids = [self.archive.player_id(p.name) for p in scoreboard.get_players()]
+            self.rate_game(game_id, row[0], list(zip(ids, results_of(scoreboard))))
+        return game_id
+
+    def rate_game(
+        self, game_id: int, played_at: float, players: list[tuple[int, Result]]
+    ) -> None:
+        before = [
+            self.connection.execute(
+                "SELECT rating, games FROM ratings WHERE player_id = ?", (player,)
+            ).fetchone()
+            or (self.formula.initial, 0)
+            for player, _ in players
+        ]
+        after = self.formula.rate(
+            [rating for rating, _ in before], [result for _, result in players]
+        )
+        for (player, _), (_, games), rating in zip(players, before, after):
+            self.connection.execute(
+                "INSERT OR REPLACE INTO ratings (player_id, rating, games, played_at)"
+                " VALUES (?, ?, ?, ?)",
+                (player, rating, games + 1, played_at),
+            )
+            self.connection.execute(
+                "INSERT INTO rating_history (player_id, played_at, game_id, rating)"
+                " VALUES (?, ?, ?, ?)",
+                (player, played_at, game_id, rating),
+            )
+
+    def rated_games(self) -> list[RatedGame]:
+        games: dict[int, RatedGame] = {}
+        for game_id, played_at, player, sets, legs in self.connection.execute(
+            "SELECT games.id, games.played_at, game_players.player_id,"
+            " game_players.sets_won, game_players.legs_won"
+            " FROM games JOIN game_players ON game_players.game_id = games.id"
+            " WHERE games.winner_id IS NOT NULL"
+            " ORDER BY games.played_at, games.id, game_players.position"
+        ):
+            games.setdefault(game_id, (game_id, played_at, []))[2].append(
+                (player, (sets, legs))
+            )
+        return list(games.values())
+
+    def rebuild(
+        self, formula: Optional[EloFormula] = None, workers: Optional[int] = None
+    ) -> None:
+        # rates the whole archive again, e.g. with a new formula. Groups of
+        # players that never played each other are rated in parallel processes.
+        if formula:
+            self.formula = formula
+        groups = independent_groups(self.rated_games())
+        if workers == 0 or len(groups) < 2:
+            rated = [rate_games(self.formula, games) for games in groups]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                rated = list(
+                    executor.map(rate_games, [self.formula] * len(groups), groups)
+                )
+        with self.connection:
+            self.write_ratings(rated)
+
+    def rebuild_ratings(self, games: list[RatedGame]) -> None:
+        self.write_ratings([rate_games(self.formula, games)])
+
+    def write_ratings(
+        self, rated: list[tuple[dict[int, tuple[float, int, float]], list[HistoryRow]]]
+    ) -> None:
+        self.connection.execute("DELETE FROM ratings")
+        self.connection.execute("DELETE FROM rating_history")
+        for current, history in rated:
+            self.connection.executemany(
+                "INSERT INTO ratings (player_id, rating, games, played_at)"
+                " VALUES (?, ?, ?, ?)",
+                [(player, *values) for player, values in current.items()],
+            )
+            self.connection.executemany(
+                "INSERT INTO rating_history (player_id, played_at, game_id, rating)"
+                " VALUES (?, ?, ?, ?)",
+                history,
+            )
+
+    def rating(self, name: str, at: Optional[float] = None) -> float:
+        # the rating after the games played before at, the current one without
+        if at is None:
+            row = self.connection.execute(
+                "SELECT rating FROM ratings JOIN players ON players.id = player_id"
+                " WHERE players.name = ?",
+                (name,),
+            ).fetchone()
+        else:
+            row = self.connection.execute(
+                "SELECT rating FROM rating_history"
+                " WHERE player_id = (SELECT id FROM players WHERE name = ?)"
+                " AND played_at < ? ORDER BY played_at DESC, game_id DESC LIMIT 1",
+                (name, at),
+            ).fetchone()
+        return float(row[0]) if row else self.formula.initial
+
+    def leaderboard(self, limit: int = 10) -> list[tuple[str, float, int]]:
+        return [
+            (str(name), float(rating), int(games))
+            for name, rating, games in self.connection.execute(
+                "SELECT players.name, rating, games FROM ratings"
+                " JOIN players ON players.id = player_id"
+                " ORDER BY rating DESC, players.name LIMIT ?",
+                (limit,),
+            )
+        ]
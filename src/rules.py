@@ -0,0 +1,105 @@
+from array import array
+
+from src.game_options import CheckInOut, GameOptions
+from src.throw import Throw, THROWS
+
+BUST = 1
+LEG_WON = 2
+# rows above this score can neither bust nor win with a single input
+MIN_TABLE_ROWS = max(throw.score for throw in THROWS) + 2
+
+
+def is_checking_dart(throw: Throw, check_in_out: CheckInOut) -> bool:
+    if check_in_out == CheckInOut.DOUBLE:
+        return throw.is_double
+    elif check_in_out == CheckInOut.MASTER:
+        return throw.multiplier > 1
+    return True
+
+
+def evaluate(
+    score: int,
+    throw: Throw,
+    check_out: CheckInOut,
+    check_in: CheckInOut = CheckInOut.STRAIGHT,
+    start_points: int = 0,
+) -> tuple[int, int]:
+    if score == start_points and not is_checking_dart(throw, check_in):
+        return score, 0  # not checked in, the dart does not count
+    remaining = score - throw.score
+    if remaining < 0:
+        return score, BUST
+    if remaining == 0:
+        if is_checking_dart(throw, check_out):
+            return remaining, LEG_WON
+        return score, BUST
+    if remaining == 1 and check_out != CheckInOut.STRAIGHT:
+        return score, BUST
+    return remaining, 0
+
+
+class RuleTable:
+    # The X01 rules compiled into flat arrays indexed by
+    # remaining score * number of dart codes + dart code
+    def __init__(
+        self,
+        check_out: CheckInOut,
+        check_in: CheckInOut = CheckInOut.STRAIGHT,
+        start_points: int = 0,
+    ) -> None:
+        self.check_out = check_out
+        self.check_in = check_in
+        self.start_points = start_points
+        self.rows = max(start_points + 1, MIN_TABLE_ROWS)
+        self.width = len(THROWS)
+        self.new_scores = array("L")
+        self.flags = bytearray()
+        for score in range(self.rows):
+            for throw in THROWS:
+                new_score, flag = evaluate(
+                    score, throw, check_out, check_in, start_points
+                )
+                self.new_scores.append(new_score)
+                self.flags.append(flag)
+
+    def lookup(self, score: int, throw: Throw) -> tuple[int, bool, bool]:
+        if score >= self.rows:
+            return score - throw.score, False, False
+        index = score * self.width + throw.code
+        flag = self.flags[index]
+        return self.new_scores[index], bool(flag & BUST), bool(flag & LEG_WON)
+
+    def new_score(self, score: int, throw: Throw) -> int:
+        if score >= self.rows:
+            return score - throw.score
+        return self.new_scores[score * self.width + throw.code]
+
+    def is_bust(self, score: int, throw: Throw) -> bool:
+        if score >= self.rows:
+            return False
+        return bool(self.flags[score * self.width + throw.code] & BUST)
+
+    def is_leg_won(self, score: int, throw: Throw) -> bool:
+        if score >= self.rows:
+            return False
+        return bool(self.flags[score * self.width + throw.code] & LEG_WON)
+
+
+rule_tables: dict[tuple[CheckInOut, CheckInOut, int], RuleTable] = {}
+
+
+def get_rule_table(
+    check_out: CheckInOut,
+    check_in: CheckInOut = CheckInOut.STRAIGHT,
+    start_points: int = 0,
+) -> RuleTable:
+    key = (check_out, check_in, start_points)
+    if key not in rule_tables:
+        rule_tables[key] = RuleTable(check_out, check_in, start_points)
+    return rule_tables[key]
+
+
+def get_rules_of(game_options: GameOptions) -> RuleTable:
+    return get_rule_table(
+        game_options.check_out, game_options.check_in, game_options.start_points
+    )
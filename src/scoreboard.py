@@ -1,6 +1,7 @@
 from typing import Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
 from src.game_options import GameOptions, CheckInOut
+from src.rules import get_rule_table, get_rules_of
 from src.throw import Throw
 
 
@@ -20,6 +21,15 @@ class Stats:
     average: float = 0
 
 
+@dataclass
+class PlayerTally:
+    remaining: int
+    points: int = 0
+    darts: int = 0
+    sets: int = 0
+    legs_per_set: list[int] = field(default_factory=list)
+
+
 @dataclass
 class Turn:
     player: Player
@@ -28,82 +38,159 @@ class Turn:
     throw_in_round: int = 0
 
 
-def is_overthrow(score: int, throw: Throw, check_out: CheckInOut) -> bool:
+@dataclass
+class Snapshot:
+    tallies: list[PlayerTally]
+    closed_leg_scores: list[list[int]]
+    leg_shifts: int
+    leg_lengths: list[list[int]]  # turns of every leg per set
+
+
+SNAPSHOT_EVERY = 64  # darts
+
+
+def copy_tallies(tallies: list[PlayerTally]) -> list[PlayerTally]:
+    return [replace(tally, legs_per_set=list(tally.legs_per_set)) for tally in tallies]
+
+
+def is_overthrow(
+    score: int,
+    throw: Throw,
+    check_out: CheckInOut,
+    check_in: CheckInOut = CheckInOut.STRAIGHT,
+    start_points: int = 0,
+) -> bool:
     # subtracting with respect to the chosen game GameOptions
-    prefix, _ = throw.get_and_strip_prefix()
-    remaining = score - throw.calc_score()
-    if remaining < 0:
-        return True
-    if check_out == CheckInOut.DOUBLE:
-        if remaining == 0:
-            if prefix != "d":
-                return True
-        elif remaining == 1:
-            return True
-    elif check_out != CheckInOut.STRAIGHT:
-        raise NotImplementedError("Checkoutmethod not implemented")
-    return False
+    return get_rule_table(check_out, check_in, start_points).is_bust(score, throw)
 
 
-def subtract(score: int, throw: Throw, check_out: CheckInOut) -> int:
-    if is_overthrow(score, throw, check_out):
-        return score
-    return score - throw.calc_score()
+def subtract(
+    score: int,
+    throw: Throw,
+    check_out: CheckInOut,
+    check_in: CheckInOut = CheckInOut.STRAIGHT,
+    start_points: int = 0,
+) -> int:
+    return get_rule_table(check_out, check_in, start_points).new_score(score, throw)
 
 
 class Scoreboard:
     def __init__(self, game_options: GameOptions):
         self.game_options = game_options
+        self.rules = get_rules_of(game_options)
         self.players: list[Player] = []
         self.history: list[list[list[Turn]]] = [[[]]]
+        # running aggregates, kept in sync with the history on every change
+        self.tallies: list[PlayerTally] = []
+        self.closed_leg_scores: list[list[int]] = []
+        # legs and sets counted towards the rotation of the starting player
+        self.leg_shifts = 0
+        self.visit: Optional[tuple[Player, int]] = None
+        # every dart of the match in order, the darts after position were undone and
+        # can be redone until a new dart is thrown
+        self.timeline: list[Turn] = []
+        self.position = 0
+        self.snapshots: dict[int, Snapshot] = {}
 
     def register_player(self, name: str) -> Player:
         player = Player(len(self.players), name)
         self.players.append(player)
+        self.tallies.append(
+            PlayerTally(
+                remaining=self.game_options.start_points,
+                legs_per_set=[0] * len(self.history),
+            )
+        )
+        self.update_visit()
         return player
 
     def add_throw(self, player: Player, throw: Throw, throw_in_round: int) -> None:
-        self.history[-1][-1].append(
-            Turn(
-                player=player,
-                score=self.get_remaining_score_of(player),
-                throw=throw,
-                throw_in_round=throw_in_round,
-            )
+        if self.position < len(self.timeline):
+            del self.timeline[self.position :]
+            self.snapshots = {
+                position: snapshot
+                for position, snapshot in self.snapshots.items()
+                if position <= self.position
+            }
+        turn = Turn(
+            player=player,
+            score=self.get_remaining_score_of(player),
+            throw=throw,
+            throw_in_round=throw_in_round,
         )
+        self.timeline.append(turn)
+        self.push_turn(turn)
 
-    def start_player_of_leg(
-        self,
-    ) -> Player:
-        number_of_player_shifts = self.game_options.start_player
-        for player in self.players:
-            number_of_player_shifts += self.get_won_sets_of(player)
-            number_of_player_shifts += self.get_won_legs_of(player)
-        return self.players[number_of_player_shifts % len(self.players)]
+    def push_turn(self, turn: Turn) -> None:
+        if not self.position % SNAPSHOT_EVERY and self.position not in self.snapshots:
+            self.snapshots[self.position] = self.take_snapshot()
+        self.position += 1
+        leg = self.history[-1][-1]
+        if len(leg) and self.is_winning_turn(leg[-1]):
+            self.count_won_leg(leg[-1].player, -1)
+        leg.append(turn)
+        self.count_turn(turn, 1)
+        if self.is_winning_turn(turn):
+            self.count_won_leg(turn.player, 1)
+        self.update_visit()
 
-    def current_player(self) -> tuple[Player, int]:
+    def is_winning_turn(self, turn: Turn) -> bool:
+        return self.rules.is_leg_won(turn.score, turn.throw)
+
+    def count_won_leg(self, player: Player, sign: int) -> None:
+        tally = self.tallies[player.idf]
+        was_set_won = tally.legs_per_set[-1] >= self.game_options.legs
+        tally.legs_per_set[-1] += sign
+        set_won = (tally.legs_per_set[-1] >= self.game_options.legs) - was_set_won
+        tally.sets += set_won
+        self.leg_shifts += sign + set_won
+
+    def count_turn(self, turn: Turn, sign: int) -> None:
+        tally = self.tallies[turn.player.idf]
+        new_score, bust, _ = self.rules.lookup(turn.score, turn.throw)
+        tally.remaining = turn.score
+        if bust:
+            tally.darts += sign * (
+                self.game_options.input_method.value - turn.throw_in_round
+            )
+            return
+        tally.points += sign * (turn.score - new_score)
+        tally.darts += sign
+        if sign > 0:
+            tally.remaining = new_score
+
+    def update_visit(self) -> None:
         last_turn = next(
             reversed(self.history[-1][-1]),
             None,
         )
-        start_player = self.start_player_of_leg()
         if not last_turn:
-            return start_player, 0
-        if (
+            self.visit = self.start_player_of_leg(), 0
+        elif (
             last_turn.throw_in_round < self.game_options.input_method.value - 1
             and not self.was_overthrow(last_turn.player)
         ):
-            return last_turn.player, last_turn.throw_in_round + 1
-        last_player = self.players.index(last_turn.player)
-        return self.players[(last_player + 1) % len(self.players)], 0
+            self.visit = last_turn.player, last_turn.throw_in_round + 1
+        else:
+            next_player = (last_turn.player.idf + 1) % len(self.players)
+            self.visit = self.players[next_player], 0
+
+    def start_player_of_leg(
+        self,
+    ) -> Player:
+        number_of_player_shifts = self.game_options.start_player + self.leg_shifts
+        return self.players[number_of_player_shifts % len(self.players)]
+
+    def current_player(self) -> tuple[Player, int]:
+        if not self.visit:
+            raise ValueError("Cannot determine current player without players")
+        return self.visit
 
     def was_overthrow(self, player: Player) -> bool:
         last_turn = self.get_last_turn_of_leg(player)
         if not last_turn:
             return False
-        return is_overthrow(
-            last_turn.score, last_turn.throw, self.game_options.check_out
-        )
+        return self.rules.is_bust(last_turn.score, last_turn.throw)
 
     def is_win(self, asked: str, player: Player) -> bool:
         if asked == "leg":
@@ -118,7 +205,14 @@ class Scoreboard:
         if self.is_win("leg", player):
             if self.is_win("set", player):
                 self.history.append([])
+                for tally in self.tallies:
+                    self.leg_shifts -= tally.legs_per_set[-1]
+                    tally.legs_per_set.append(0)
             self.history[-1].append([])
+            self.closed_leg_scores.append([tally.remaining for tally in self.tallies])
+            for tally in self.tallies:
+                tally.remaining = self.game_options.start_points
+            self.update_visit()
             return True
         return False
 
@@ -131,11 +225,74 @@ class Scoreboard:
             return False
         if not len(self.history[-1][-1]):
             self.history[-1].pop()
+            for tally, remaining in zip(self.tallies, self.closed_leg_scores.pop()):
+                tally.remaining = remaining
         if not len(self.history[-1]):
             self.history.pop()
-        self.history[-1][-1].pop()
+            for tally in self.tallies:
+                tally.legs_per_set.pop()
+                self.leg_shifts += tally.legs_per_set[-1]
+        leg = self.history[-1][-1]
+        turn = leg.pop()
+        self.position -= 1
+        self.count_turn(turn, -1)
+        if self.is_winning_turn(turn):
+            self.count_won_leg(turn.player, -1)
+        if len(leg) and self.is_winning_turn(leg[-1]):
+            self.count_won_leg(leg[-1].player, 1)
+        self.update_visit()
         return True
 
+    def redo_throw(self) -> bool:
+        if self.position == len(self.timeline):
+            return False
+        turn = self.timeline[self.position]
+        self.push_turn(turn)
+        if not self.was_overthrow(turn.player):
+            self.append_hist_if_winning_throw(turn.player)
+        return True
+
+    def seek(self, dart_index: int) -> None:
+        # Moves to the state after dart_index darts of the timeline. Far jumps restore
+        # the closest snapshot before the target and redo the remaining darts, so
+        # seeking replays at most SNAPSHOT_EVERY darts.
+        if not 0 <= dart_index <= len(self.timeline):
+            raise ValueError(
+                f"Cannot seek to dart {dart_index} of {len(self.timeline)} darts"
+            )
+        if abs(dart_index - self.position) > SNAPSHOT_EVERY:
+            start = max(
+                position for position in self.snapshots if position <= dart_index
+            )
+            self.restore_snapshot(start)
+        while self.position > dart_index:
+            self.undo_throw()
+        while self.position < dart_index:
+            self.redo_throw()
+
+    def take_snapshot(self) -> Snapshot:
+        return Snapshot(
+            tallies=copy_tallies(self.tallies),
+            closed_leg_scores=list(self.closed_leg_scores),
+            leg_shifts=self.leg_shifts,
+            leg_lengths=[[len(leg) for leg in dset] for dset in self.history],
+        )
+
+    def restore_snapshot(self, position: int) -> None:
+        snapshot = self.snapshots[position]
+        self.tallies = copy_tallies(snapshot.tallies)
+        self.closed_leg_scores = list(snapshot.closed_leg_scores)
+        self.leg_shifts = snapshot.leg_shifts
+        self.history = []
+        start = 0
+        for leg_lengths in snapshot.leg_lengths:
+            self.history.append([])
+            for length in leg_lengths:
+                self.history[-1].append(self.timeline[start : start + length])
+                start += length
+        self.position = position
+        self.update_visit()
+
     def get_history(self) -> list[list[list[Turn]]]:
         return self.history
 
@@ -157,7 +314,7 @@ class Scoreboard:
                     break
                 if (
                     self.game_options.input_method.value - 1 == turn.throw_in_round
-                    or is_overthrow(turn.score, turn.throw, self.game_options.check_out)
+                    or self.rules.is_bust(turn.score, turn.throw)
                 ):
                     break
                 turns.append(turn)
@@ -187,52 +344,19 @@ class Scoreboard:
         return last_turn
 
     def get_remaining_score_of(self, player: Player) -> int:
-        last_turn = self.get_last_turn_of_leg(player)
-        if not last_turn:
-            return self.game_options.start_points
-        return subtract(last_turn.score, last_turn.throw, self.game_options.check_out)
+        return self.tallies[player.idf].remaining
 
     def get_won_sets_of(self, player: Player) -> int:
-        won_sets = 0
-        for i, dset in enumerate(self.history):
-            if not len(dset[0]):
-                continue
-            if self.get_won_legs_of(player, i) >= self.game_options.legs:
-                won_sets += 1
-        return won_sets
+        return self.tallies[player.idf].sets
 
     def get_won_legs_of(self, player: Player, dset: int = -1) -> int:
-        won_legs = 0
-        for leg in self.history[dset]:
-            if not len(leg):
-                continue
-
-            if leg[-1].player == player and not subtract(
-                leg[-1].score, leg[-1].throw, self.game_options.check_out
-            ):
-                won_legs += 1
-        return won_legs
+        return self.tallies[player.idf].legs_per_set[dset]
 
     def average_darts_of(self, player: Player) -> tuple[float, int]:
-        darts = 0
-        thrown_total = 0
-        for dset in self.history:
-            for leg in dset:
-                for turn in leg:
-                    if not turn.player == player:
-                        continue
-                    if not is_overthrow(
-                        turn.score, turn.throw, self.game_options.check_out
-                    ):
-                        thrown_total += turn.throw.calc_score()
-                        darts += 1
-                    else:
-                        darts += (
-                            self.game_options.input_method.value - turn.throw_in_round
-                        )
-        if not darts:
-            return 0, darts
-        return thrown_total / darts * 3, darts
+        tally = self.tallies[player.idf]
+        if not tally.darts:
+            return 0, tally.darts
+        return tally.points / tally.darts * 3, tally.darts
 
     def get_all_stats(self) -> list[Stats]:
         all_stats = []
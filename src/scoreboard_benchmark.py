@@ -0,0 +1,288 @@
+import sys
+import json
+import time
+import random
+import tracemalloc
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from src.checkout import get_checkout_table
+from src.game_options import CheckInOut, GameOptions, InputMethod
+from src.scoreboard import Scoreboard
+from src.throw import Throw, THROW_TABLE
+
+BASELINE_FILE = str(
+    Path(__file__).resolve().parent.parent / "tests" / "scoreboard_baseline.json"
+)
+OPERATIONS = [
+    "add_throw",
+    "undo_throw",
+    "current_player",
+    "turns_of_current_round",
+    "get_all_stats",
+]
+REPEATS = 3  # the fastest run counts, the others are noise
+CALIBRATION_RUNS = 5
+CALIBRATION = "calibration_ns"
+TIME_TOLERANCE = 1.5
+MEMORY_TOLERANCE = 1.2
+# per call costs may not grow with the length of the match, the tolerance only
+# absorbs noise of the machine
+SCALING_TOLERANCE = 3
+SHORT_LEGS = 10
+
+
+@dataclass
+class BenchmarkCase:
+    players: int
+    legs: int
+    input_method: InputMethod = InputMethod.THREEDARTS
+    seed: int = 0
+
+    @property
+    def name(self) -> str:
+        return f"{self.players}p-{self.legs}l-{self.input_method.name.lower()}"
+
+
+@dataclass
+class CaseResult:
+    case: str
+    darts: int
+    ns_per_call: dict[str, int] = field(default_factory=dict)
+    peak_memory: int = 0
+    calibration: int = 0  # ns of the calibration workload right before the case
+
+
+# every player count with short and long matches, up to hundreds of legs
+DEFAULT_CASES = [
+    BenchmarkCase(players, legs, input_method)
+    for input_method in InputMethod
+    for players in [1, 2, 4, 8, 16]
+    for legs in [1, 10, 100]
+] + [
+    BenchmarkCase(players, 300, input_method)
+    for input_method in InputMethod
+    for players in [1, 2]
+]
+
+
+def options_of(case: BenchmarkCase) -> GameOptions:
+    check_out = CheckInOut.DOUBLE
+    if case.input_method == InputMethod.ROUND:
+        check_out = CheckInOut.STRAIGHT  # visits are not doubles
+    return GameOptions(
+        sets=case.legs, legs=1, check_out=check_out, input_method=case.input_method
+    )
+
+
+def aim(
+    rng: random.Random, remaining: int, darts_left: int, case: BenchmarkCase
+) -> str:
+    # a club player: finishes when a route is on, scores around the treble otherwise
+    if case.input_method == InputMethod.ROUND:
+        if str(remaining) in THROW_TABLE[InputMethod.ROUND] and rng.random() < 0.5:
+            return str(remaining)
+        return str(rng.choice([26, 41, 45, 60, 81, 85, 100, 140]))
+    routes = get_checkout_table(CheckInOut.DOUBLE, 501).routes_for(
+        remaining, darts_left
+    )
+    if routes and rng.random() < 0.4:
+        return routes[0][0]
+    return rng.choice(["t20", "t20", "20", "20", "1", "5", "t19", "19", "0"])
+
+
+def synthetic_match(case: BenchmarkCase) -> list[Throw]:
+    # darts in order until case.legs legs are won
+    rng = random.Random(case.seed)
+    scoreboard = Scoreboard(options_of(case))
+    for player in range(case.players):
+        scoreboard.register_player(f"player {player + 1}")
+    throws: list[Throw] = []
+    legs = 0
+    while legs < case.legs:
+        player, throw_in_round = scoreboard.current_player()
+        darts_left = case.input_method.value - throw_in_round
+        remaining = scoreboard.get_remaining_score_of(player)
+        throw = Throw(aim(rng, remaining, darts_left, case), case.input_method)
+        throws.append(throw)
+        scoreboard.add_throw(player, throw, throw_in_round)
+        if not scoreboard.was_overthrow(player):
+            legs += scoreboard.append_hist_if_winning_throw(player)
+    return throws
+
+
+def calibration_workload() -> None:
+    # plain interpreter work similar to the scoreboard: objects, lists and dicts
+    rows: list[dict[str, int]] = []
+    for i in range(20000):
+        rows.append({"score": i % 501, "darts": i % 3})
+        if len(rows) > 64:
+            rows.pop(0)
+
+
+def calibrate() -> int:
+    # speed of this machine right now, results are compared relative to it
+    return min(timed(calibration_workload) for _ in range(CALIBRATION_RUNS))
+
+
+def timed(function: Callable[[], object]) -> int:
+    started = time.perf_counter_ns()
+    function()
+    return time.perf_counter_ns() - started
+
+
+def play(case: BenchmarkCase, throws: list[Throw]) -> tuple[Scoreboard, dict[str, int]]:
+    scoreboard = Scoreboard(options_of(case))
+    for player in range(case.players):
+        scoreboard.register_player(f"player {player + 1}")
+    totals = dict.fromkeys(OPERATIONS, 0)
+    for throw in throws:
+        totals["current_player"] += timed(scoreboard.current_player)
+        totals["turns_of_current_round"] += timed(scoreboard.turns_of_current_round)
+        totals["get_all_stats"] += timed(scoreboard.get_all_stats)
+        player, throw_in_round = scoreboard.current_player()
+        started = time.perf_counter_ns()
+        scoreboard.add_throw(player, throw, throw_in_round)
+        totals["add_throw"] += time.perf_counter_ns() - started
+        if not scoreboard.was_overthrow(player):
+            scoreboard.append_hist_if_winning_throw(player)
+    return scoreboard, totals
+
+
+def run_case(case: BenchmarkCase, repeats: int = REPEATS) -> CaseResult:
+    throws = synthetic_match(case)
+    play(case, throws)  # warm-up, the first run pays for caches and allocations
+    calibration = calibrate()
+    totals: dict[str, int] = {}
+    for _ in range(repeats):
+        scoreboard, run_totals = play(case, throws)
+        while scoreboard.position:
+            run_totals["undo_throw"] += timed(scoreboard.undo_throw)
+        for operation, total in run_totals.items():
+            totals[operation] = min(total, totals.get(operation, total))
+    tracemalloc.start()
+    play(case, throws)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return CaseResult(
+        case=case.name,
+        darts=len(throws),
+        ns_per_call={
+            operation: round(total / len(throws)) for operation, total in totals.items()
+        },
+        peak_memory=peak_memory,
+        calibration=calibration,
+    )
+
+
+def run_suite(cases: list[BenchmarkCase] = DEFAULT_CASES) -> list[CaseResult]:
+    return [run_case(case) for case in cases]
+
+
+def save_baseline(results: list[CaseResult], file_name: str = BASELINE_FILE) -> None:
+    with open(file_name, "w+") as file:
+        json.dump(
+            {
+                result.case: {
+                    **result.ns_per_call,
+                    "peak_memory": result.peak_memory,
+                    CALIBRATION: result.calibration,
+                }
+                for result in results
+            },
+            file,
+            indent=1,
+        )
+
+
+def load_baseline(file_name: str = BASELINE_FILE) -> dict[str, dict[str, int]]:
+    with open(file_name, "r") as file:
+        return json.load(file)
+
+
+def find_regressions(
+    results: list[CaseResult],
+    baseline: dict[str, dict[str, int]],
+    time_tolerance: float = TIME_TOLERANCE,
+    memory_tolerance: float = MEMORY_TOLERANCE,
+) -> list[str]:
+    regressions = []
+    for result in results:
+        if result.case not in baseline:
+            continue
+        expected = baseline[result.case]
+        # times are scaled by how much faster or slower the machine is right now
+        speed = result.calibration / expected[CALIBRATION]
+        for operation, ns in result.ns_per_call.items():
+            if ns > expected[operation] * speed * time_tolerance:
+                regressions.append(
+                    f"{result.case} {operation}: {ns} ns"
+                    f" (baseline {expected[operation] * speed:.0f} ns)"
+                )
+        if result.peak_memory > expected["peak_memory"] * memory_tolerance:
+            regressions.append(
+                f"{result.case} peak memory: {result.peak_memory} B"
+                f" (baseline {expected['peak_memory']:.0f} B)"
+            )
+    return regressions
+
+
+def find_scaling_regressions(
+    cases: list[BenchmarkCase],
+    results: list[CaseResult],
+    tolerance: float = SCALING_TOLERANCE,
+) -> list[str]:
+    # longer matches against the short match of the same players and input method
+    short = {
+        (case.players, case.input_method): result
+        for case, result in zip(cases, results)
+        if case.legs == SHORT_LEGS
+    }
+    regressions = []
+    for case, result in zip(cases, results):
+        reference = short.get((case.players, case.input_method))
+        if reference is None or case.legs <= SHORT_LEGS:
+            continue
+        for operation, ns in result.ns_per_call.items():
+            if ns > reference.ns_per_call[operation] * tolerance:
+                regressions.append(
+                    f"{result.case} {operation}: {ns} ns"
+                    f" ({reference.case} {reference.ns_per_call[operation]} ns)"
+                )
+    return regressions
+
+
+def report(results: list[CaseResult]) -> str:
+    columns = ["darts"] + OPERATIONS + ["peak kB"]
+    widths = [len(column) + 2 for column in columns]
+    lines = [
+        f"{'ns per call':20}" + "".join(f"{c:>{w}}" for c, w in zip(columns, widths))
+    ]
+    for result in results:
+        values = [f"{result.darts}"]
+        values += [f"{result.ns_per_call[operation]}" for operation in OPERATIONS]
+        values.append(f"{result.peak_memory / 1e3:.0f}")
+        lines.append(
+            f"{result.case:20}" + "".join(f"{v:>{w}}" for v, w in zip(values, widths))
+        )
+    return "\n".join(lines)
+
+
+def main(arguments: list[str], baseline_file: Optional[str] = None) -> int:
+    # --save stores the results as the new baseline, otherwise they are compared
+    results = run_suite()
+    print(report(results))
+    if "--save" in arguments:
+        save_baseline(results, baseline_file or BASELINE_FILE)
+        return 0
+    regressions = find_regressions(
+        results, load_baseline(baseline_file or BASELINE_FILE)
+    ) + find_scaling_regressions(DEFAULT_CASES, results)
+    for regression in regressions:
+        print(f"Regression: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,253 @@
+import sys
+import json
+import time
+import asyncio
+from uuid import uuid4
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from src.cli import parse_input
+from src.darts import XOhOneGame
+from src.game_options import GameOptions, ThrowReturn
+from src.scoreboard import Stats, Turn
+from src.throw import Throw
+from src.ui import AsyncUI
+
+HOST = "127.0.0.1"
+PORT = 8501
+
+BoardState = dict[str, Any]
+BoardInput = tuple[tuple[ThrowReturn, Throw], "asyncio.Future[BoardState]"]
+
+
+class BoardUI:
+    # Async UI of one board. Inputs are queued by the host and every input is
+    # answered with the state of the board when the game asks for the next throw.
+    def __init__(self, game_id: str) -> None:
+        self.game_id = game_id
+        self.inputs: asyncio.Queue[BoardInput] = asyncio.Queue()
+        self.answer: Optional[asyncio.Future[BoardState]] = None
+        self.stats: list[Stats] = []
+        self.state: BoardState = {"game": game_id}
+        self.closed = False
+
+    async def display_game_start(self, game_opt: GameOptions) -> None:
+        pass
+
+    async def display_scoreboard(
+        self,
+        stats: list[Stats],
+        last_turns: list[Turn],
+        game_options: GameOptions,
+        clear_screen: bool = True,
+    ) -> None:
+        self.stats = stats
+
+    async def read_throw(
+        self, player: str, remaining_score: int, dart: int
+    ) -> tuple[ThrowReturn, Throw]:
+        self.reply(
+            {
+                "game": self.game_id,
+                "player": player,
+                "remaining": remaining_score,
+                "dart": dart,
+                "stats": [vars(stats) for stats in self.stats],
+            }
+        )
+        board_input, self.answer = await self.inputs.get()
+        return board_input
+
+    def reply(self, state: BoardState) -> None:
+        self.state = state
+        if self.answer and not self.answer.done():
+            self.answer.set_result(state)
+        self.answer = None
+
+    def close(self, state: BoardState) -> None:
+        # answers the input the game read last with state and every input still
+        # queued with an error, no client waits for a game that ended
+        self.closed = True
+        self.reply(state)
+        while not self.inputs.empty():
+            _, answer = self.inputs.get_nowait()
+            if not answer.done():
+                answer.set_result({"game": self.game_id, "error": "game finished"})
+
+    async def submit(self, throw_return: ThrowReturn, throw: Throw) -> BoardState:
+        if self.closed:
+            return {"game": self.game_id, "error": "game finished"}
+        answer: asyncio.Future[BoardState] = asyncio.get_running_loop().create_future()
+        await self.inputs.put(((throw_return, throw), answer))
+        return await answer
+
+
+class AsyncXOhOne(XOhOneGame):
+    def __init__(
+        self,
+        ui: AsyncUI,
+        players: list[str],
+        game_options: GameOptions,
+    ) -> None:
+        super().__init__(players, game_options)
+        self.ui = ui
+
+    async def play(self) -> None:
+        self.start_game()
+        await self.ui.display_game_start(self.game_options)
+        while not await self.do_player_round():  # game not won
+            ...
+
+    async def do_player_round(self) -> bool:
+        player, throw_in_round = self.scoreboard.current_player()
+        await self.ui.display_scoreboard(
+            self.scoreboard.get_all_stats(),
+            self.scoreboard.turns_of_current_round(),
+            self.game_options,
+        )
+        throw_return, throw = await self.ui.read_throw(
+            player.name,
+            self.scoreboard.get_remaining_score_of(player),
+            throw_in_round,
+        )
+        if throw_return == ThrowReturn.EXIT:
+            return True  # only this board is closed
+        return self.apply_input(throw_return, throw)
+
+
+@dataclass
+class Board:
+    ui: BoardUI
+    game: AsyncXOhOne
+    task: "asyncio.Task[None]"
+
+
+class GameHost:
+    # Runs the games of many boards in one event loop. Clients send one JSON
+    # request per line and get one JSON reply per line:
+    #   {"op": "new", "players": [...], "options": {...}} -> {"game": id}
+    #   {"op": "throw", "game": id, "throw": "t20"} -> state after the throw
+    #   {"op": "state", "game": id} -> current state
+    # A throw can also be "undo", "redo" or "exit" like on the command line.
+    def __init__(self) -> None:
+        self.boards: dict[str, Board] = {}
+        self.finished_games = 0
+        self.throws = 0
+
+    def new_game(self, players: list[str], game_options: GameOptions) -> str:
+        game_id = uuid4().hex
+        ui = BoardUI(game_id)
+        game = AsyncXOhOne(ui, players, game_options)
+        task = asyncio.create_task(self.run(game_id, ui, game))
+        self.boards[game_id] = Board(ui, game, task)
+        return game_id
+
+    async def run(self, game_id: str, ui: BoardUI, game: AsyncXOhOne) -> None:
+        final: BoardState = {"game": game_id, "error": "game finished"}
+        try:
+            await game.play()
+            self.finished_games += 1
+            final = {
+                "game": game_id,
+                "finished": True,
+                "stats": [vars(stats) for stats in game.scoreboard.get_all_stats()],
+            }
+        finally:
+            del self.boards[game_id]
+            ui.close(final)
+
+    async def submit(self, game_id: str, user_input: str) -> BoardState:
+        if game_id not in self.boards:
+            return {"error": f"No running game '{game_id}'"}
+        try:
+            throw_return, throw = parse_input(
+                user_input, self.boards[game_id].game.game_options.input_method
+            )
+        except ValueError as err:
+            return {"error": f"Wrong input: {err}"}
+        self.throws += 1
+        return await self.boards[game_id].ui.submit(throw_return, throw)
+
+    async def handle_request(self, request: dict[str, Any]) -> BoardState:
+        op = request.get("op")
+        if op == "new":
+            if not request.get("players"):
+                return {"error": "A game needs players"}
+            game_options = GameOptions.from_dict(request.get("options", {}))
+            return {"game": self.new_game(request["players"], game_options)}
+        elif op == "throw":
+            return await self.submit(request.get("game", ""), request.get("throw", ""))
+        elif op == "state":
+            if request.get("game") not in self.boards:
+                return {"error": f"No running game '{request.get('game')}'"}
+            return self.boards[request["game"]].ui.state
+        return {"error": f"Unknown op '{op}'"}
+
+    async def handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        while line := await reader.readline():
+            try:
+                reply = await self.handle_request(json.loads(line))
+            except (json.JSONDecodeError, AttributeError, KeyError, ValueError) as err:
+                reply = {"error": f"Bad request: {err}"}
+            writer.write(json.dumps(reply).encode() + b"\n")
+            await writer.drain()
+        writer.close()
+
+    async def serve(self, host: str = HOST, port: int = PORT) -> asyncio.Server:
+        return await asyncio.start_server(self.handle_client, host, port)
+
+
+# two players, the first one wins the leg with a nine darter
+BENCHMARK_THROWS = ["t20"] * 12 + ["t20", "t19", "d12"]
+BENCHMARK_OPTIONS = {"sets": 1, "legs": 1}
+
+
+async def play_benchmark_game(host: str, port: int) -> int:
+    reader, writer = await asyncio.open_connection(host, port)
+
+    async def request(**values: Any) -> BoardState:
+        writer.write(json.dumps(values).encode() + b"\n")
+        await writer.drain()
+        return json.loads(await reader.readline())
+
+    game = await request(op="new", players=["a", "b"], options=BENCHMARK_OPTIONS)
+    throws = 0
+    for throw in BENCHMARK_THROWS:
+        state = await request(op="throw", game=game["game"], throw=throw)
+        throws += 1
+        if state.get("finished"):
+            break
+    writer.close()
+    await writer.wait_closed()
+    return throws
+
+
+async def benchmark(games: int, host: str = HOST) -> tuple[float, float]:
+    # games and throws per second of concurrent localhost clients, one per board
+    game_host = GameHost()
+    server = await game_host.serve(host, 0)
+    port = server.sockets[0].getsockname()[1]
+    started = time.perf_counter()
+    throws = await asyncio.gather(
+        *(play_benchmark_game(host, port) for _ in range(games))
+    )
+    elapsed = time.perf_counter() - started
+    server.close()
+    await server.wait_closed()
+    return games / elapsed, sum(throws) / elapsed
+
+
+async def main(host: str = HOST, port: int = PORT) -> None:
+    server = await GameHost().serve(host, port)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["benchmark"]:
+        games_per_second, throws_per_second = asyncio.run(benchmark(1000))
+        print(f"{games_per_second:.0f} games/s, {throws_per_second:.0f} throws/s")
+    else:
+        asyncio.run(main())
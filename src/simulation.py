@@ -0,0 +1,323 @@
+import math
+from typing import Optional
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.checkout import get_checkout_table
+from src.game_options import GameOptions, InputMethod
+from src.rules import get_rules_of, is_checking_dart, LEG_WON
+from src.throw import Throw, THROWS
+
+# dartboard geometry in mm, segments clockwise starting at the top
+BOARD_SEGMENTS = [20, 1, 18, 4, 13, 6, 10, 15, 2, 17, 3, 19, 7, 16, 8, 11, 14, 9, 12, 5]
+BULL_RADIUS = 6.35
+OUTER_BULL_RADIUS = 15.9
+TRIPLE_RADII = (99.0, 107.0)
+DOUBLE_RADII = (162.0, 170.0)
+SINGLE_AIM_RADIUS = (TRIPLE_RADII[1] + DOUBLE_RADII[0]) / 2
+SECTOR_ANGLE = 2 * math.pi / len(BOARD_SEGMENTS)
+
+DARTS_IN_VISIT = InputMethod.THREEDARTS.value
+MAX_VISITS = 200
+MAX_DARTS_PER_LEG = DARTS_IN_VISIT * MAX_VISITS
+# dart codes of the single, double and triple ring of every sector
+RING_CODES = np.array(
+    [
+        [Throw(f"{prefix}{segment}").code for segment in BOARD_SEGMENTS]
+        for prefix in ["", "d", "t"]
+    ]
+)
+
+
+@dataclass
+class PlayerModel:
+    name: str
+    sigma: float = 20.0  # standard deviation of the scatter around the aim in mm
+    aim: str = "t20"  # scoring target while no finish is on
+
+
+@dataclass
+class SimulationResult:
+    players: list[str]
+    matches: int = 0
+    legs: int = 0
+    match_wins: list[int] = field(default_factory=list)
+    leg_wins: list[int] = field(default_factory=list)
+    points: list[int] = field(default_factory=list)
+    darts: list[int] = field(default_factory=list)
+    darts_per_leg: list[list[int]] = field(default_factory=list)
+
+    def merge(self, other: "SimulationResult") -> None:
+        self.matches += other.matches
+        self.legs += other.legs
+        for mine, theirs in [
+            (self.match_wins, other.match_wins),
+            (self.leg_wins, other.leg_wins),
+            (self.points, other.points),
+            (self.darts, other.darts),
+        ]:
+            for i, value in enumerate(theirs):
+                mine[i] += value
+        for mine_hist, theirs_hist in zip(self.darts_per_leg, other.darts_per_leg):
+            for darts, count in enumerate(theirs_hist):
+                mine_hist[darts] += count
+
+    def win_probabilities(self) -> list[float]:
+        return [wins / self.matches if self.matches else 0 for wins in self.match_wins]
+
+    def leg_win_probabilities(self) -> list[float]:
+        return [wins / self.legs if self.legs else 0 for wins in self.leg_wins]
+
+    def averages(self) -> list[float]:
+        return [
+            points / darts * 3 if darts else 0
+            for points, darts in zip(self.points, self.darts)
+        ]
+
+    def mean_darts_per_leg(self) -> list[float]:
+        means = []
+        for hist in self.darts_per_leg:
+            legs = sum(hist)
+            means.append(
+                sum(darts * count for darts, count in enumerate(hist)) / legs
+                if legs
+                else 0
+            )
+        return means
+
+
+def aim_point(throw: Throw) -> tuple[float, float]:
+    if throw.segment == 25:
+        return 0.0, 0.0
+    if throw.segment not in BOARD_SEGMENTS:  # misses and visit scores
+        return 0.0, 2 * DOUBLE_RADII[1]
+    radius = SINGLE_AIM_RADIUS
+    if throw.multiplier == 3:
+        radius = sum(TRIPLE_RADII) / 2
+    elif throw.multiplier == 2:
+        radius = sum(DOUBLE_RADII) / 2
+    angle = BOARD_SEGMENTS.index(throw.segment) * SECTOR_ANGLE
+    return radius * math.sin(angle), radius * math.cos(angle)
+
+
+def hit_codes(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    radius = np.hypot(x, y)
+    sector = np.floor(np.arctan2(x, y) / SECTOR_ANGLE + 0.5).astype(np.int64)
+    sector %= len(BOARD_SEGMENTS)
+    ring = np.zeros(len(x), dtype=np.int64)
+    ring[(radius >= TRIPLE_RADII[0]) & (radius < TRIPLE_RADII[1])] = 2
+    ring[(radius >= DOUBLE_RADII[0]) & (radius <= DOUBLE_RADII[1])] = 1
+    codes = RING_CODES[ring, sector]
+    codes[radius > DOUBLE_RADII[1]] = Throw("0").code
+    codes[radius < OUTER_BULL_RADIUS] = Throw("25").code
+    codes[radius < BULL_RADIUS] = Throw("d25").code
+    return codes
+
+
+def aim_table(game_options: GameOptions, model: PlayerModel) -> np.ndarray:
+    # dart code to aim at for every remaining score and number of darts left
+    checkout = get_checkout_table(game_options.check_out, game_options.start_points)
+    setup_throws = [Throw(str(segment)) for segment in range(1, 21)] + [
+        Throw("25"),
+        Throw(model.aim),
+    ]
+    table = np.full(
+        (game_options.start_points + 1, DARTS_IN_VISIT + 1), Throw(model.aim).code
+    )
+    for score in range(1, game_options.start_points + 1):
+        for darts_left in range(1, DARTS_IN_VISIT + 1):
+            routes = checkout.routes_for(score, darts_left)
+            if routes:
+                table[score, darts_left] = Throw(routes[0][0]).code
+                continue
+            if score - Throw(model.aim).score > 1:
+                continue
+            # no finish on, leave the score that is the quickest to finish
+            leaves = [
+                (checkout.darts_needed(score - throw.score), -throw.score, throw.code)
+                for throw in setup_throws
+                if checkout.darts_needed(score - throw.score)
+            ]
+            if leaves:
+                table[score, darts_left] = min(leaves)[2]
+    # on the start points only a checking dart counts, e.g. a double for double in
+    check_in = Throw(model.aim)
+    if not is_checking_dart(check_in, game_options.check_in):
+        check_in = Throw("d20")
+    for darts_left in range(1, DARTS_IN_VISIT + 1):
+        aim = THROWS[table[game_options.start_points, darts_left]]
+        if not is_checking_dart(aim, game_options.check_in):
+            table[game_options.start_points, darts_left] = check_in.code
+    return table
+
+
+compiled_tables: dict[tuple, tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+
+
+def compile_tables(
+    game_options: GameOptions, model: PlayerModel
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # rule transitions as 2d arrays and the aim point per remaining score and darts
+    key = (
+        game_options.check_in,
+        game_options.check_out,
+        game_options.start_points,
+        model.aim,
+    )
+    if key not in compiled_tables:
+        rules = get_rules_of(game_options)
+        new_scores = np.array(rules.new_scores, dtype=np.int64)
+        flags = np.frombuffer(bytes(rules.flags), dtype=np.uint8)
+        aims = np.array([aim_point(throw) for throw in THROWS])
+        compiled_tables[key] = (
+            new_scores.reshape(rules.rows, rules.width),
+            flags.reshape(rules.rows, rules.width),
+            aims[aim_table(game_options, model)],
+        )
+    return compiled_tables[key]
+
+
+def simulate_solo_legs(
+    game_options: GameOptions,
+    model: PlayerModel,
+    legs: int,
+    rng: np.random.Generator,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # returns visits and darts needed per leg and the remaining score after each visit
+    new_scores, flags, targets = compile_tables(game_options, model)
+
+    remaining = np.full(legs, game_options.start_points, dtype=np.int64)
+    visits = np.full(legs, MAX_VISITS + 1, dtype=np.int64)
+    darts = np.full(legs, MAX_DARTS_PER_LEG + 1, dtype=np.int64)
+    trace = np.empty((MAX_VISITS + 1, legs), dtype=np.int32)
+    trace[0] = remaining
+    playing = np.ones(legs, dtype=bool)
+    for visit in range(1, MAX_VISITS + 1):
+        in_visit = playing.copy()
+        for dart in range(DARTS_IN_VISIT):
+            index = np.flatnonzero(in_visit)
+            if not len(index):
+                break
+            score = remaining[index]
+            aim = targets[score, DARTS_IN_VISIT - dart]
+            scatter = rng.normal(0.0, model.sigma, size=(len(index), 2))
+            codes = hit_codes(aim[:, 0] + scatter[:, 0], aim[:, 1] + scatter[:, 1])
+            remaining[index] = new_scores[score, codes]
+            flag = flags[score, codes]
+            won = index[(flag & LEG_WON) > 0]
+            visits[won] = visit
+            darts[won] = (visit - 1) * DARTS_IN_VISIT + dart + 1
+            playing[won] = False
+            in_visit[index[flag > 0]] = False
+        trace[visit] = remaining
+        if not playing.any():
+            trace[visit + 1 :] = remaining
+            break
+    return visits, darts, trace
+
+
+def simulate_batch(
+    game_options: GameOptions,
+    models: list[PlayerModel],
+    matches: int,
+    seed: np.random.SeedSequence,
+) -> SimulationResult:
+    rng = np.random.default_rng(seed)
+    players = len(models)
+    legs_won = np.zeros((matches, players), dtype=np.int64)
+    sets_won = np.zeros((matches, players), dtype=np.int64)
+    playing = np.ones(matches, dtype=bool)
+    result = empty_result(models)
+    result.matches = matches
+    rows = np.arange(matches)
+    while playing.any():
+        index = rows[playing]
+        shifts = sets_won[index].sum(axis=1) + legs_won[index].sum(axis=1)
+        start = (game_options.start_player + shifts) % players
+        solo = [
+            simulate_solo_legs(game_options, model, len(index), rng) for model in models
+        ]
+        visits = np.stack([visit for visit, _, _ in solo], axis=1)
+        order = (np.arange(players)[None, :] - start[:, None]) % players
+        winner = np.argmin(visits * players + order, axis=1)
+        legs = np.arange(len(index))
+        winning_visit = visits[legs, winner]
+        if (winning_visit > MAX_VISITS).any():
+            raise ValueError(f"No player finished a leg in {MAX_VISITS} visits")
+        winning_order = order[legs, winner]
+        result.legs += len(index)
+        for player, (_, darts, trace) in enumerate(solo):
+            won = winner == player
+            thrown_visits = np.minimum(
+                winning_visit - (order[:, player] > winning_order), MAX_VISITS
+            )
+            points = game_options.start_points - trace[thrown_visits, legs]
+            player_darts = np.where(won, darts, thrown_visits * DARTS_IN_VISIT)
+            result.points[player] += int(points.sum())
+            result.darts[player] += int(player_darts.sum())
+            result.leg_wins[player] += int(won.sum())
+            hist = np.bincount(
+                np.minimum(darts[won], MAX_DARTS_PER_LEG + 1),
+                minlength=MAX_DARTS_PER_LEG + 2,
+            )
+            for leg_darts, count in enumerate(hist):
+                result.darts_per_leg[player][leg_darts] += int(count)
+
+        legs_won[index, winner] += 1
+        set_won = legs_won[index, winner] >= game_options.legs
+        sets_won[index[set_won], winner[set_won]] += 1
+        legs_won[index[set_won]] = 0
+        match_won = sets_won[index, winner] >= game_options.sets
+        for player in range(players):
+            result.match_wins[player] += int((winner[match_won] == player).sum())
+        playing[index[match_won]] = False
+    return result
+
+
+def empty_result(models: list[PlayerModel]) -> SimulationResult:
+    return SimulationResult(
+        players=[model.name for model in models],
+        match_wins=[0] * len(models),
+        leg_wins=[0] * len(models),
+        points=[0] * len(models),
+        darts=[0] * len(models),
+        darts_per_leg=[[0] * (MAX_DARTS_PER_LEG + 2) for _ in models],
+    )
+
+
+def simulate_matches(
+    game_options: GameOptions,
+    models: list[PlayerModel],
+    matches: int,
+    batch_size: int = 10000,
+    workers: Optional[int] = None,
+    seed: int = 0,
+) -> SimulationResult:
+    # batches are seeded from one SeedSequence, so the result only depends on the
+    # seed and the batch size but not on the number of workers
+    batches = [batch_size] * (matches // batch_size)
+    if matches % batch_size:
+        batches.append(matches % batch_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(batches))
+    result = empty_result(models)
+    if workers == 0:
+        batch_results = [
+            simulate_batch(game_options, models, batch, batch_seed)
+            for batch, batch_seed in zip(batches, seeds)
+        ]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            batch_results = list(
+                executor.map(
+                    simulate_batch,
+                    [game_options] * len(batches),
+                    [models] * len(batches),
+                    batches,
+                    seeds,
+                )
+            )
+    for batch_result in batch_results:
+        result.merge(batch_result)
+    return result
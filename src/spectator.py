@@ -0,0 +1,174 @@
+import json
+import asyncio
+import threading
+from typing import Any, Optional
+
+from src.scoreboard import Scoreboard
+
+HOST = "127.0.0.1"
+PORT = 8502
+QUEUE_SIZE = 256  # messages a viewer may fall behind before it gets the state
+
+Message = dict[str, Any]
+
+
+class ScoreboardDeltas:
+    # What changed on a scoreboard since the last call. Stats are compared field by
+    # field and a message only carries the fields that changed:
+    #   {"throws": [[player, "t20", dart], ...]}  darts added or redone
+    #   {"undo": 2}  darts undone
+    #   {"won": ["leg" or "set", player]}
+    #   {"stats": [[player, {"score": 441, ...}], ...]}
+    def __init__(self) -> None:
+        self.players: list[str] = []
+        self.stats: list[dict[str, Any]] = []
+        self.position = 0
+        self.legs = 1
+        self.sets = 1
+
+    def reset(self, scoreboard: Scoreboard) -> Message:
+        self.players = [player.name for player in scoreboard.get_players()]
+        self.stats = [vars(stats) for stats in scoreboard.get_all_stats()]
+        self.position = scoreboard.position
+        self.sets = len(scoreboard.history)
+        self.legs = len(scoreboard.closed_leg_scores) + 1
+        return self.state()
+
+    def state(self) -> Message:
+        return {"state": {"players": self.players, "stats": self.stats}}
+
+    def changes(self, scoreboard: Scoreboard) -> Message:
+        message: Message = {}
+        position = scoreboard.position
+        if position > self.position:
+            message["throws"] = [
+                [turn.player.idf, turn.throw.input_score, turn.throw_in_round]
+                for turn in scoreboard.timeline[self.position : position]
+            ]
+        elif position < self.position:
+            message["undo"] = self.position - position
+        sets = len(scoreboard.history)
+        legs = len(scoreboard.closed_leg_scores) + 1
+        if legs > self.legs:
+            winner = scoreboard.timeline[position - 1].player.idf
+            message["won"] = ["set" if sets > self.sets else "leg", winner]
+        # a new list every time, a state built from an older one stays valid
+        stats = [vars(stats) for stats in scoreboard.get_all_stats()]
+        changed = [
+            [idf, {key: value for key, value in new.items() if old.get(key) != value}]
+            for idf, (old, new) in enumerate(zip(self.stats, stats))
+            if old != new
+        ]
+        if changed:
+            message["stats"] = changed
+        self.stats = stats
+        self.position, self.legs, self.sets = position, legs, sets
+        return message
+
+
+def encode(message: Message) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+class Subscriber:
+    def __init__(self, writer: Optional[asyncio.StreamWriter], queue_size: int):
+        self.writer = writer
+        self.queue: asyncio.Queue[bytes] = asyncio.Queue(queue_size)
+
+    async def send(self) -> None:
+        # the queue fills up while drain waits for a slow viewer
+        assert self.writer
+        while True:
+            self.writer.write(await self.queue.get())
+            await self.writer.drain()
+
+
+class SpectatorFeed:
+    # Publishes the changes of a game to every viewer connected to a local socket,
+    # one JSON line per message. A message is serialized once and the same bytes
+    # are queued for every viewer. A viewer whose queue is full gets the current
+    # state instead of the queued deltas and continues from there. The game may
+    # publish from another thread than the one running the feed.
+    def __init__(self, queue_size: int = QUEUE_SIZE) -> None:
+        self.queue_size = queue_size
+        self.deltas = ScoreboardDeltas()
+        self.subscribers: set[Subscriber] = set()
+        self.seq = 0
+        self.latest: Message = {"seq": 0, **self.deltas.state()}
+        self.latest_state: Optional[bytes] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.server: Optional[asyncio.Server] = None
+
+    def start(self, scoreboard: Scoreboard) -> None:
+        self.send(self.deltas.reset(scoreboard))
+
+    def publish_changes(self, scoreboard: Scoreboard) -> None:
+        message = self.deltas.changes(scoreboard)
+        if message:
+            self.send(message)
+
+    def send(self, message: Message) -> None:
+        self.seq += 1
+        data = encode({"seq": self.seq, **message})
+        state = {"seq": self.seq, **self.deltas.state()}
+        if self.loop:
+            self.loop.call_soon_threadsafe(self.fan_out, data, state)
+        else:
+            self.fan_out(data, state)
+
+    def state_data(self) -> bytes:
+        # serialized once for all viewers that need it
+        if self.latest_state is None:
+            self.latest_state = encode(self.latest)
+        return self.latest_state
+
+    def fan_out(self, data: bytes, state: Message) -> None:
+        self.latest, self.latest_state = state, None
+        for subscriber in self.subscribers:
+            try:
+                subscriber.queue.put_nowait(data)
+            except asyncio.QueueFull:
+                while not subscriber.queue.empty():
+                    subscriber.queue.get_nowait()
+                subscriber.queue.put_nowait(self.state_data())
+
+    def subscribe(self, writer: Optional[asyncio.StreamWriter] = None) -> Subscriber:
+        subscriber = Subscriber(writer, self.queue_size)
+        subscriber.queue.put_nowait(self.state_data())
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    async def handle_viewer(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        subscriber = self.subscribe(writer)
+        sending = asyncio.create_task(subscriber.send())
+        try:
+            await asyncio.wait(
+                [sending, asyncio.create_task(reader.read())],
+                return_when=asyncio.FIRST_COMPLETED,
+            )  # the viewer closed the connection or could not be written to
+        finally:
+            self.subscribers.discard(subscriber)
+            sending.cancel()
+            writer.close()
+
+    async def serve(self, host: str = HOST, port: int = PORT) -> asyncio.Server:
+        self.loop = asyncio.get_running_loop()
+        self.server = await asyncio.start_server(self.handle_viewer, host, port)
+        return self.server
+
+    def start_in_thread(self, host: str = HOST, port: int = PORT) -> int:
+        # for the blocking game, returns the port the feed listens on
+        started = threading.Event()
+
+        async def run() -> None:
+            server = await self.serve(host, port)
+            started.set()
+            async with server:
+                await server.serve_forever()
+
+        threading.Thread(target=asyncio.run, args=(run(),), daemon=True).start()
+        started.wait()
+        assert self.server
+        return int(self.server.sockets[0].getsockname()[1])
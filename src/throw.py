@@ -1,56 +1,115 @@
+from typing import Any
 from src.game_options import InputMethod, IMPOSSIBLE_SCORES, SEGMENTS
 
+PREFIX_MULTIPLIERS = {"": 1, "d": 2, "t": 3}
+
+
+def validate_input(input_score: str, input_methode: InputMethod) -> tuple[str, int]:
+    prefix = ""
+    stripped_input_score = input_score
+    if len(input_score.split()) != 1:
+        raise ValueError(
+            f"Number of input darts: {len(input_score.split())} not equal to 1"
+        )
+    if not input_score.isdecimal():
+        if input_methode == InputMethod.ROUND:
+            raise ValueError(f"Input {input_score} is not decimal")
+        elif input_methode == InputMethod.THREEDARTS:
+            if not input_score.startswith("d") and not input_score.startswith("t"):
+                raise ValueError(f"Prefix {input_score[:1]} does not exist")
+        prefix, stripped_input_score = input_score[:1], input_score[1:]
+    if stripped_input_score.isdecimal():
+        int_score = int(stripped_input_score)
+        if input_methode == InputMethod.ROUND:
+            if int_score in IMPOSSIBLE_SCORES or int_score > 180:
+                raise ValueError(f"Input {input_score} is impossible to score")
+        elif input_methode == InputMethod.THREEDARTS:
+            if int_score not in SEGMENTS:
+                raise ValueError(f"Input {input_score} is not a segment")
+            if prefix == "t" and int_score == 25:
+                raise ValueError(f"Input {input_score} is not a segment")
+    else:  # fail if rest after prefix is not decimal
+        raise ValueError(f"Input {input_score} does not match pattern")
+    return prefix, int_score
+
 
 class Throw:
     # Eventually meeds a dart variable to safe the thrown dart 1, 2 or 3
-    def __init__(
-        self, input_score: str, input_methode: InputMethod = InputMethod.THREEDARTS
-    ) -> None:
-        self.input_score = input_score.strip().lower()
-        self.input_methode = input_methode
-        self.is_valid_input()
+    # Throws are interned: every legal input of an input method maps to one shared,
+    # immutable instance with its score computed once when the table is built.
+    __slots__ = (
+        "input_score",
+        "input_methode",
+        "segment",
+        "multiplier",
+        "score",
+        "is_double",
+        "code",
+    )
+
+    def __new__(
+        cls, input_score: str, input_methode: InputMethod = InputMethod.THREEDARTS
+    ) -> "Throw":
+        input_score = input_score.strip().lower()
+        throw = THROW_TABLE[input_methode].get(input_score)
+        if throw is None:  # e.g. leading zeros, raises for invalid input
+            prefix, int_score = validate_input(input_score, input_methode)
+            throw = THROW_TABLE[input_methode][f"{prefix}{int_score}"]
+        return throw
+
+    @classmethod
+    def create(cls, input_score: str, input_methode: InputMethod) -> "Throw":
+        prefix, int_score = validate_input(input_score, input_methode)
+        throw = object.__new__(cls)
+        multiplier = PREFIX_MULTIPLIERS[prefix]
+        for attr, value in [
+            ("input_score", input_score),
+            ("input_methode", input_methode),
+            ("segment", int_score),
+            ("multiplier", multiplier),
+            ("score", multiplier * int_score),
+            ("is_double", prefix == "d"),
+            ("code", -1),
+        ]:
+            object.__setattr__(throw, attr, value)
+        return throw
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"Throw is immutable, cannot set '{name}'")
+
+    def __reduce__(self) -> tuple[type, tuple[str, InputMethod]]:
+        return Throw, (self.input_score, self.input_methode)
 
     def __repr__(self) -> str:
-        list_of_items = [f"{key}: {value}" for key, value in self.__dict__.items()]
+        list_of_items = [f"{key}: {getattr(self, key)}" for key in self.__slots__]
         return " ".join(list_of_items)
 
-    def is_valid_input(self) -> None:
-        prefix = ""
-        stripped_input_score = self.input_score
-        if len(self.input_score.split()) != 1:
-            raise ValueError(
-                f"Number of input darts: {len(self.input_score.split())} not equal to 1"
-            )
-        if not self.input_score.isdecimal():
-            if self.input_methode == InputMethod.ROUND:
-                raise ValueError(f"Input {self.input_score} is not decimal")
-            elif self.input_methode == InputMethod.THREEDARTS:
-                if not self.input_score.startswith(
-                    "d"
-                ) and not self.input_score.startswith("t"):
-                    raise ValueError(f"Prefix {self.input_score[:1]} does not exist")
-            prefix, stripped_input_score = self.get_and_strip_prefix()
-        if stripped_input_score.isdecimal():
-            int_score = int(stripped_input_score)
-            if self.input_methode == InputMethod.ROUND:
-                if int_score in IMPOSSIBLE_SCORES or int_score > 180:
-                    raise ValueError(f"Input {self.input_score} is impossible to score")
-            elif self.input_methode == InputMethod.THREEDARTS:
-                if int_score not in SEGMENTS:
-                    raise ValueError(f"Input {self.input_score} is not a segment")
-                if prefix == "t" and int_score == 25:
-                    raise ValueError(f"Input {self.input_score} is not a segment")
-        else:  # fail if rest after prefix is not decimal
-            raise ValueError(f"Input {self.input_score} does not match pattern")
-
     def calc_score(self) -> int:
-        if self.input_score.isdecimal():
-            return int(self.input_score)
-        else:
-            prefix, stripped_input_score = self.get_and_strip_prefix()
-            if prefix == "d":
-                return 2 * int(stripped_input_score)
-            return 3 * int(stripped_input_score)
+        return self.score
 
     def get_and_strip_prefix(self) -> tuple[str, str]:
         return self.input_score[:1], self.input_score[1:]
+
+
+def build_throw_table(input_methode: InputMethod) -> dict[str, Throw]:
+    if input_methode == InputMethod.ROUND:
+        inputs = [str(score) for score in range(181) if score not in IMPOSSIBLE_SCORES]
+    else:
+        inputs = [
+            f"{prefix}{segment}"
+            for prefix in PREFIX_MULTIPLIERS
+            for segment in SEGMENTS
+            if not (prefix == "t" and segment == 25)
+        ]
+    return {
+        input_score: Throw.create(input_score, input_methode) for input_score in inputs
+    }
+
+
+THROW_TABLE = {
+    input_methode: build_throw_table(input_methode) for input_methode in InputMethod
+}
+# every interned throw of all input methods gets a unique dart code
+THROWS = [throw for table in THROW_TABLE.values() for throw in table.values()]
+for code, throw in enumerate(THROWS):
+    object.__setattr__(throw, "code", code)
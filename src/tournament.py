@@ -0,0 +1,457 @@
+import heapq
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Optional
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from src.cli import parse_input
+from src.darts import XOhOne
+from src.game_options import GameOptions, ThrowReturn
+from src.scoreboard import Scoreboard, Stats, Turn
+from src.simulation import PlayerModel, simulate_batch
+from src.throw import Throw
+from src.ui import UI
+
+BYE = "<bye>"
+WINNER = 0
+LOSER = 1
+ROUND_ROBIN = "round robin"
+KNOCKOUT = "knockout"
+WINNERS = "winners"
+LOSERS = "losers"
+FINAL = "final"
+
+Slot = tuple[int, int]  # match id and home (0) or away (1)
+
+
+@dataclass
+class MatchResult:
+    winner: str
+    loser: str
+    winner_legs: int = 0
+    loser_legs: int = 0
+
+
+@dataclass
+class Match:
+    idf: int
+    stage: str
+    round: int
+    players: list[Optional[str]] = field(default_factory=lambda: [None, None])
+    # where the winner and the loser of the match continue
+    advances: list[Optional[Slot]] = field(default_factory=lambda: [None, None])
+    board: Optional[int] = None
+    result: Optional[MatchResult] = None
+
+    def is_ready(self) -> bool:
+        return None not in self.players and not self.result
+
+    def pairing(self) -> tuple[str, str]:
+        home, away = self.players
+        if home is None or away is None:
+            raise ValueError(f"Match {self.idf} has an open slot")
+        return home, away
+
+
+@dataclass
+class Standing:
+    player: str
+    played: int = 0
+    won: int = 0
+    lost: int = 0
+    legs_for: int = 0
+    legs_against: int = 0
+
+    def rank_key(self) -> tuple[int, int, int, str]:
+        return (
+            -self.won,
+            self.legs_against - self.legs_for,
+            -self.legs_for,
+            self.player,
+        )
+
+
+PlayMatch = Callable[[GameOptions, str, str, int], MatchResult]
+
+
+def bracket_order(size: int) -> list[int]:
+    # seed positions of a bracket, the best seeds meet as late as possible
+    order = [0]
+    while len(order) < size:
+        order = [
+            seed
+            for position in order
+            for seed in (position, 2 * len(order) - 1 - position)
+        ]
+    return order
+
+
+def circle_rounds(players: list[str]) -> list[list[tuple[str, str]]]:
+    # round robin pairings with the circle method, a bye sits out every round
+    circle = players + [BYE] if len(players) % 2 else list(players)
+    rounds = []
+    for _ in range(len(circle) - 1):
+        half = len(circle) // 2
+        rounds.append(
+            [
+                (circle[i], circle[-1 - i])
+                for i in range(half)
+                if BYE not in (circle[i], circle[-1 - i])
+            ]
+        )
+        circle = [circle[0], circle[-1]] + circle[1:-1]
+    return rounds
+
+
+class Tournament:
+    # Matches are created with open slots and filled when the matches before them
+    # are decided. Standings, the ready queue and the open matches per stage are
+    # updated with every result, nothing is recomputed from all results.
+    def __init__(self, game_options: GameOptions, boards: int = 1) -> None:
+        self.game_options = game_options
+        self.matches: list[Match] = []
+        self.boards: list[Optional[int]] = [None] * boards
+        self.ready: list[tuple[int, int]] = []  # heap of round and match id
+        self.busy: set[str] = set()
+        self.standings: dict[str, dict[str, Standing]] = {}
+        self.open_matches: dict[str, int] = {}
+        # knockout slots filled with the ranks of groups once all groups are played
+        self.qualifiers: list[tuple[Slot, str, int]] = []
+        self.champion: Optional[str] = None
+
+    def add_match(
+        self,
+        stage: str,
+        round: int,
+        players: Optional[list[Optional[str]]] = None,
+    ) -> Match:
+        match = Match(idf=len(self.matches), stage=stage, round=round)
+        self.matches.append(match)
+        self.open_matches[stage] = self.open_matches.get(stage, 0) + 1
+        for slot, player in enumerate(players or []):
+            if player is not None:
+                self.fill_slot((match.idf, slot), player)
+        return match
+
+    def fill_slot(self, slot: Slot, player: str) -> None:
+        match = self.matches[slot[0]]
+        match.players[slot[1]] = player
+        if not match.is_ready():
+            return
+        if BYE in match.players:
+            home, away = match.pairing()
+            winner, loser = (away, home) if home == BYE else (home, away)
+            result = MatchResult(winner=winner, loser=loser)
+            self.report_result(match.idf, result)
+        else:
+            heapq.heappush(self.ready, (match.round, match.idf))
+
+    def add_round_robin(self, players: list[str], stage: str = ROUND_ROBIN) -> None:
+        self.standings[stage] = {player: Standing(player) for player in players}
+        for round, pairings in enumerate(circle_rounds(players)):
+            for home, away in pairings:
+                self.add_match(stage, round, [home, away])
+
+    def add_single_elimination(
+        self, players: list[Optional[str]], stage: str = KNOCKOUT, first_round: int = 0
+    ) -> list[Match]:
+        # players in seeding order, None for slots that are filled later
+        size = 2
+        while size < len(players):
+            size *= 2
+        seeded = players + [BYE] * (size - len(players))
+        rounds = self.add_bracket(stage, first_round, size)
+        for position, seed in enumerate(bracket_order(size)):
+            player = seeded[seed]
+            if player is not None:
+                self.fill_slot((rounds[0][position // 2].idf, position % 2), player)
+        return rounds[0]
+
+    def add_bracket(self, stage: str, first_round: int, size: int) -> list[list[Match]]:
+        rounds: list[list[Match]] = []
+        matches = size // 2
+        while matches:
+            rounds.append(
+                [
+                    self.add_match(stage, first_round + len(rounds))
+                    for _ in range(matches)
+                ]
+            )
+            matches //= 2
+        for previous, following in zip(rounds, rounds[1:]):
+            for i, match in enumerate(previous):
+                match.advances[WINNER] = following[i // 2].idf, i % 2
+        return rounds
+
+    def add_double_elimination(self, players: list[str]) -> None:
+        # winners bracket, losers bracket fed by every winners round and a single
+        # grand final without a bracket reset
+        size = 2
+        while size < len(players):
+            size *= 2
+        seeded: list[str] = players + [BYE] * (size - len(players))
+        winners = self.add_bracket(WINNERS, 0, size)
+        final = self.add_match(FINAL, 2 * len(winners))
+        winners[-1][0].advances[WINNER] = final.idf, 0
+        if len(winners) == 1:
+            winners[0][0].advances[LOSER] = final.idf, 1
+        else:
+            losers = [self.add_match(LOSERS, 1) for _ in winners[1]]
+            for i, match in enumerate(winners[0]):
+                match.advances[LOSER] = losers[i // 2].idf, i % 2
+            for wb_round, wb_matches in enumerate(winners[1:], start=1):
+                dropped = [self.add_match(LOSERS, 2 * wb_round) for _ in wb_matches]
+                for i, match in enumerate(losers):
+                    match.advances[WINNER] = dropped[i].idf, 0
+                for i, match in enumerate(wb_matches):
+                    match.advances[LOSER] = dropped[i].idf, 1
+                if len(dropped) == 1:
+                    dropped[0].advances[WINNER] = final.idf, 1
+                    break
+                losers = [
+                    self.add_match(LOSERS, 2 * wb_round + 1)
+                    for _ in range(len(dropped) // 2)
+                ]
+                for i, match in enumerate(dropped):
+                    match.advances[WINNER] = losers[i // 2].idf, i % 2
+        for position, seed in enumerate(bracket_order(size)):
+            self.fill_slot((winners[0][position // 2].idf, position % 2), seeded[seed])
+
+    def add_groups_then_knockout(
+        self, players: list[str], groups: int, advance: int = 2
+    ) -> None:
+        # players in seeding order are dealt to the groups like a snake
+        names = [f"group {chr(ord('A') + group)}" for group in range(groups)]
+        members: list[list[str]] = [[] for _ in names]
+        for i, player in enumerate(players):
+            row, column = divmod(i, groups)
+            members[column if not row % 2 else groups - 1 - column].append(player)
+        for name, group_players in zip(names, members):
+            self.add_round_robin(group_players, name)
+        group_rounds = max(len(group) for group in members)
+        first_round = self.add_single_elimination(
+            [None] * (groups * advance), KNOCKOUT, group_rounds
+        )
+        size = len(first_round) * 2
+        seeds = [(name, rank) for rank in range(advance) for name in names]
+        for position, seed in enumerate(bracket_order(size)):
+            slot = first_round[position // 2].idf, position % 2
+            if seed < len(seeds):
+                self.qualifiers.append((slot, *seeds[seed]))
+
+    def report_result(self, match_id: int, result: MatchResult) -> None:
+        match = self.matches[match_id]
+        match.result = result
+        if match.board is not None:
+            self.boards[match.board] = None
+            self.busy.difference_update(match.pairing())
+        self.update_standings(match.stage, result)
+        self.open_matches[match.stage] -= 1
+        for outcome, player in [(WINNER, result.winner), (LOSER, result.loser)]:
+            slot = match.advances[outcome]
+            if slot:
+                self.fill_slot(slot, player)
+            elif outcome == WINNER and match.stage in (KNOCKOUT, FINAL):
+                self.champion = player
+        if self.qualifiers and not any(
+            self.open_matches[stage] for stage in self.standings
+        ):
+            qualifiers, self.qualifiers = self.qualifiers, []
+            for slot, stage, rank in qualifiers:
+                self.fill_slot(slot, self.table(stage)[rank].player)
+
+    def update_standings(self, stage: str, result: MatchResult) -> None:
+        if stage not in self.standings or BYE in (result.winner, result.loser):
+            return
+        for player, won, legs_for, legs_against in [
+            (result.winner, 1, result.winner_legs, result.loser_legs),
+            (result.loser, 0, result.loser_legs, result.winner_legs),
+        ]:
+            standing = self.standings[stage][player]
+            standing.played += 1
+            standing.won += won
+            standing.lost += 1 - won
+            standing.legs_for += legs_for
+            standing.legs_against += legs_against
+
+    def table(self, stage: str = ROUND_ROBIN) -> list[Standing]:
+        return sorted(self.standings[stage].values(), key=Standing.rank_key)
+
+    def assign_boards(self) -> list[Match]:
+        # ready matches to free boards, earlier rounds first and nobody twice at once
+        assigned: list[Match] = []
+        waiting: list[tuple[int, int]] = []
+        for board, match_id in enumerate(self.boards):
+            if match_id is not None:
+                continue
+            while self.ready:
+                _, ready_id = heapq.heappop(self.ready)
+                match = self.matches[ready_id]
+                if self.busy.intersection(match.pairing()):
+                    waiting.append((match.round, match.idf))
+                    continue
+                match.board = board
+                self.boards[board] = match.idf
+                self.busy.update(match.pairing())
+                assigned.append(match)
+                break
+        for ready in waiting:
+            heapq.heappush(self.ready, ready)
+        return assigned
+
+    def is_finished(self) -> bool:
+        return not any(self.open_matches.values())
+
+    def start_match(self, match: Match, ui: UI) -> XOhOne:
+        if match.board is None:
+            raise ValueError(f"Match {match.idf} has no board")
+        return XOhOne(ui, list(match.pairing()), self.game_options)
+
+    def play_on_board(self, match: Match, ui: UI) -> MatchResult:
+        # the match is played through the game on the UI of its board
+        game = self.start_match(match, ui)
+        game.play()
+        result = result_of(game.scoreboard)
+        self.report_result(match.idf, result)
+        return result
+
+
+def result_of(scoreboard: Scoreboard) -> MatchResult:
+    if len(scoreboard.players) != 2:
+        raise ValueError(
+            f"A tournament match has 2 players, not {len(scoreboard.players)}"
+        )
+    winners = [
+        player.idf for player in scoreboard.players if scoreboard.is_win("game", player)
+    ]
+    if not winners:
+        raise ValueError("The match is not finished, nobody won the sets needed")
+    legs = [sum(tally.legs_per_set) for tally in scoreboard.tallies]
+    winner = winners[0]
+    loser = 1 - winner
+    return MatchResult(
+        winner=scoreboard.players[winner].name,
+        loser=scoreboard.players[loser].name,
+        winner_legs=legs[winner],
+        loser_legs=legs[loser],
+    )
+
+
+@dataclass
+class SimulatedMatch:
+    models: dict[str, PlayerModel]
+
+    def __call__(
+        self, game_options: GameOptions, home: str, away: str, seed: int
+    ) -> MatchResult:
+        result = simulate_batch(
+            game_options,
+            [self.models[home], self.models[away]],
+            1,
+            np.random.SeedSequence(seed),
+        )
+        winner = result.match_wins.index(1)
+        return MatchResult(
+            winner=result.players[winner],
+            loser=result.players[1 - winner],
+            winner_legs=result.leg_wins[winner],
+            loser_legs=result.leg_wins[1 - winner],
+        )
+
+
+@dataclass
+class ReplayedMatch:
+    # recorded darts of every pairing in the order they were thrown
+    throws: dict[tuple[str, str], list[str]]
+
+    def __call__(
+        self, game_options: GameOptions, home: str, away: str, seed: int
+    ) -> MatchResult:
+        ui = RecordedUI(self.throws[(home, away)], game_options)
+        game = XOhOne(ui, [home, away], game_options)
+        game.play()
+        return result_of(game.scoreboard)
+
+
+class RecordedUI:
+    # a board that reads the recorded inputs instead of a player, they are
+    # validated like typed inputs
+    def __init__(self, inputs: list[str], game_options: GameOptions) -> None:
+        self.inputs: Iterator[str] = iter(inputs)
+        self.game_options = game_options
+
+    def display_game_start(self, game_opt: GameOptions) -> None:
+        pass
+
+    def display_scoreboard(
+        self,
+        stats: list[Stats],
+        last_turns: list[Turn],
+        game_options: GameOptions,
+        clear_screen: bool = True,
+    ) -> None:
+        pass
+
+    def display_game_options(self, game_opt: GameOptions) -> None:
+        pass
+
+    def read_throw(
+        self, player: str, remaining_score: int, dart: int
+    ) -> tuple[ThrowReturn, Throw]:
+        user_input = next(self.inputs, None)
+        if user_input is None:
+            raise ValueError("The recorded inputs end before the match is won")
+        return parse_input(user_input, self.game_options.input_method)
+
+    def read_players(self) -> list[str]:
+        raise NotImplementedError("The players come from the tournament")
+
+    def read_game_options(self, players: list[str]) -> GameOptions:
+        return self.game_options
+
+
+def run_tournament(
+    tournament: Tournament,
+    play_match: PlayMatch,
+    workers: Optional[int] = None,
+    seed: int = 0,
+) -> Tournament:
+    # Plays all matches on a process pool as boards become free. Every match is
+    # seeded by its id, so the results do not depend on the order they finish in.
+    def seed_of(match: Match) -> int:
+        return int(np.random.SeedSequence([seed, match.idf]).generate_state(1)[0])
+
+    if workers == 0:
+        while matches := tournament.assign_boards():
+            for match in matches:
+                home, away = match.pairing()
+                result = play_match(tournament.game_options, home, away, seed_of(match))
+                tournament.report_result(match.idf, result)
+        return tournament
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        running: dict[Future[MatchResult], Match] = {}
+        while True:
+            for match in tournament.assign_boards():
+                home, away = match.pairing()
+                future = executor.submit(
+                    play_match, tournament.game_options, home, away, seed_of(match)
+                )
+                running[future] = match
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                tournament.report_result(running.pop(future).idf, future.result())
+    return tournament
+
+
+def run_on_boards(tournament: Tournament, uis: list[UI]) -> Tournament:
+    # plays all matches through the game, every board reads its own UI
+    if len(uis) != len(tournament.boards):
+        raise ValueError(f"{len(tournament.boards)} boards need as many UIs")
+    while tournament.assign_boards():
+        for board, match_id in enumerate(tournament.boards):
+            if match_id is not None:
+                tournament.play_on_board(tournament.matches[match_id], uis[board])
+    return tournament
@@ -32,3 +32,22 @@ class UI(Protocol):
 
     def read_game_options(self, players: list[str]) -> GameOptions:
         ...
+
+
+class AsyncUI(Protocol):
+    async def display_game_start(self, game_opt: GameOptions) -> None:
+        ...
+
+    async def display_scoreboard(
+        self,
+        stats: list[Stats],
+        last_turns: list[Turn],
+        game_options: GameOptions,
+        clear_screen: bool = True,
+    ) -> None:
+        ...
+
+    async def read_throw(
+        self, player: str, remaining_score: int, dart: int
+    ) -> tuple[ThrowReturn, Throw]:
+        ...
@@ -0,0 +1,101 @@
+import random
+from typing import Optional, Sequence, TypeVar, Union
+
+from src.game_options import CheckInOut, GameOptions, InputMethod
+from src.rules import is_checking_dart
+from src.scoreboard import Scoreboard
+from src.throw import THROW_TABLE, Throw
+
+AnyScoreboard = TypeVar("AnyScoreboard", bound=Scoreboard)
+
+
+def with_players(
+    scoreboard: AnyScoreboard, players: Sequence[str] = ("a", "b")
+) -> AnyScoreboard:
+    for name in players:
+        scoreboard.register_player(name)
+    return scoreboard
+
+
+def play(
+    scoreboard: AnyScoreboard, throws: Sequence[Union[str, Throw]]
+) -> AnyScoreboard:
+    # the darts as the game adds them, inputs in the input method of the game
+    for throw in throws:
+        if isinstance(throw, str):
+            throw = Throw(throw, scoreboard.game_options.input_method)
+        player, throw_in_round = scoreboard.current_player()
+        scoreboard.add_throw(player, throw, throw_in_round)
+        if not scoreboard.was_overthrow(player):
+            scoreboard.append_hist_if_winning_throw(player)
+    return scoreboard
+
+
+def play_match(
+    game_options: GameOptions,
+    players: Sequence[str],
+    throws: Sequence[Union[str, Throw]],
+) -> Scoreboard:
+    return play(with_players(Scoreboard(game_options), players), throws)
+
+
+def state_of(scoreboard: Scoreboard) -> tuple:
+    return (
+        scoreboard.get_history(),
+        scoreboard.get_all_stats(),
+        scoreboard.tallies,
+        scoreboard.closed_leg_scores,
+        scoreboard.leg_shifts,
+        scoreboard.current_player(),
+        scoreboard.turns_of_current_round(),
+        list(scoreboard.timeline),
+        scoreboard.position,
+    )
+
+
+SCORING_INPUTS = {
+    InputMethod.THREEDARTS: ["t20", "t20", "20", "20", "1", "5", "t19", "19", "0"],
+    InputMethod.ROUND: ["26", "41", "45", "60", "81", "85", "100", "140"],
+}
+
+
+def match_options(
+    legs: int, input_method: InputMethod = InputMethod.THREEDARTS
+) -> GameOptions:
+    # one leg per set, visit totals can only check out straight
+    check_out = CheckInOut.DOUBLE
+    if input_method == InputMethod.ROUND:
+        check_out = CheckInOut.STRAIGHT
+    return GameOptions(
+        sets=legs, legs=1, check_out=check_out, input_method=input_method
+    )
+
+
+def finishing_throw(game_options: GameOptions, remaining: int) -> Optional[Throw]:
+    for throw in THROW_TABLE[game_options.input_method].values():
+        if throw.score == remaining and is_checking_dart(throw, game_options.check_out):
+            return throw
+    return None
+
+
+def random_throws(
+    game_options: GameOptions, players: int, legs: int, seed: int = 0
+) -> list[Throw]:
+    # darts in order until legs legs are won, finishing on every other chance
+    rng = random.Random(seed)
+    names = [str(player) for player in range(players)]
+    scoreboard = with_players(Scoreboard(game_options), names)
+    throws: list[Throw] = []
+    won = 0
+    while won < legs:
+        player, throw_in_round = scoreboard.current_player()
+        remaining = scoreboard.get_remaining_score_of(player)
+        throw = finishing_throw(game_options, remaining)
+        if throw is None or rng.random() < 0.5:
+            input_score = rng.choice(SCORING_INPUTS[game_options.input_method])
+            throw = Throw(input_score, game_options.input_method)
+        throws.append(throw)
+        scoreboard.add_throw(player, throw, throw_in_round)
+        if not scoreboard.was_overthrow(player):
+            won += scoreboard.append_hist_if_winning_throw(player)
+    return throws
@@ -0,0 +1,117 @@
+from unittest.mock import Mock
+
+import pytest
+
+from src.analytics import LiveAnalytics, PlayerAnalytics, analyze_scoreboard
+from src.game_options import GameOptions, InputMethod
+from src.scoreboard import Scoreboard
+from src.throw import Throw
+from tests.helpers import match_options, play, random_throws, with_players
+
+
+def new_scoreboard(game_options: GameOptions, players: int = 2) -> Scoreboard:
+    names = ["a", "b"] if players <= 2 else [f"p{player}" for player in range(players)]
+    return with_players(Scoreboard(game_options), names[:players])
+
+
+def play_live(scoreboard: Scoreboard, throws: list[Throw], live: LiveAnalytics) -> None:
+    for throw in throws:
+        play(scoreboard, [throw])
+        live.update()
+
+
+# a: 180, 112, 2 and the 8 finish with attempts at 10 and 8, b: 60, 140, 0
+LEG = [
+    ["t20", "t20", "t20"],
+    ["20", "20", "20"],
+    ["t20", "t17", "1"],
+    ["t20", "t20", "20"],
+    ["1", "0", "1"],
+    ["0", "0", "0"],
+    ["d4"],
+]
+
+
+def test_hand_counted_leg() -> None:
+    scoreboard = new_scoreboard(GameOptions(sets=1, legs=2, start_points=302))
+    live = LiveAnalytics(scoreboard)
+    play_live(scoreboard, [Throw(throw) for visit in LEG for throw in visit], live)
+    a, b = analyze_scoreboard(scoreboard)
+    assert a == PlayerAnalytics(
+        "a",
+        first_nine_points=294,
+        first_nine_visits=3,
+        checkout_attempts=2,
+        checkouts=1,
+        highest_finish=8,
+        tons=1,
+        one_eighties=1,
+        best_leg=10,
+        worst_leg=10,
+    )
+    assert a.first_nine_average() == pytest.approx(294 / 3)
+    assert a.checkout_percentage() == 50
+    assert b == PlayerAnalytics(
+        "b", first_nine_points=200, first_nine_visits=3, ton_forties=1
+    )
+    assert b.checkout_percentage() == 0
+    assert live.analytics == [a, b]
+
+
+def test_bust_counts_rest_of_visit() -> None:
+    scoreboard = new_scoreboard(GameOptions(sets=1, legs=1, start_points=41), 1)
+    live = LiveAnalytics(scoreboard)
+    play_live(scoreboard, [Throw(throw) for throw in ["1", "t20", "0", "d20"]], live)
+    (a,) = analyze_scoreboard(scoreboard)
+    assert a.best_leg == 5  # 1, bust counted as two darts, 0, d20
+    assert a.first_nine_visits == 2
+    assert a.first_nine_points == 41
+    assert a.checkout_attempts == 3
+    assert a.highest_finish == 40
+    assert live.analytics == [a]
+
+
+@pytest.mark.parametrize("seed", range(2))
+@pytest.mark.parametrize("players, legs", [(1, 3), (2, 10), (5, 7)])
+@pytest.mark.parametrize("input_method", list(InputMethod))
+def test_live_matches_batch(
+    input_method: InputMethod, players: int, legs: int, seed: int
+) -> None:
+    game_options = match_options(legs, input_method)
+    scoreboard = new_scoreboard(game_options, players)
+    live = LiveAnalytics(scoreboard)
+    play_live(scoreboard, random_throws(game_options, players, legs, seed), live)
+    batch = analyze_scoreboard(scoreboard)
+    assert live.analytics == batch
+    assert sum(player.checkouts for player in batch) == legs
+
+
+def test_live_after_undo() -> None:
+    scoreboard = new_scoreboard(match_options(3))
+    live = LiveAnalytics(scoreboard)
+    play_live(scoreboard, random_throws(match_options(3), 2, 3, seed=1), live)
+    for _ in range(20):
+        scoreboard.undo_throw()
+        assert live.update() == analyze_scoreboard(scoreboard)
+    rolled_back = [undo.turn for undo in live.undo]
+    scoreboard.undo_throw()
+    player, throw_in_round = scoreboard.current_player()
+    scoreboard.add_throw(player, Throw("t20"), throw_in_round)  # replaces a dart
+    live.update()
+    assert [undo.turn for undo in live.undo[:-1]] == rolled_back[:-1]
+    assert live.analytics == analyze_scoreboard(scoreboard)
+    live.add_turn = Mock(wraps=live.add_turn)  # type: ignore[method-assign]
+    for _ in range(40):  # back over won legs in one update
+        scoreboard.undo_throw()
+    assert live.update() == analyze_scoreboard(scoreboard)
+    assert not live.add_turn.call_count  # rolled back, not replayed
+    assert len(live.undo) == scoreboard.position
+
+
+def test_empty_match() -> None:
+    scoreboard = new_scoreboard(GameOptions())
+    assert analyze_scoreboard(scoreboard) == [
+        PlayerAnalytics("a"),
+        PlayerAnalytics("b"),
+    ]
+    assert LiveAnalytics(scoreboard).update() == analyze_scoreboard(scoreboard)
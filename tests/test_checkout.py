@@ -0,0 +1,75 @@
+from pathlib import Path
+
+import pytest
+
+from src.checkout import (
+    CheckoutTable,
+    building,
+    get_checkout_table,
+    load_checkout_table_from_file,
+    prepare_checkout_table,
+)
+from src.rules import is_checking_dart
+from src.game_options import CheckInOut
+from src.throw import Throw
+
+checkout_data: list[tuple[CheckInOut, int, int, str]] = [
+    (CheckInOut.DOUBLE, 170, 3, "T20 T20 D25"),
+    (CheckInOut.DOUBLE, 100, 2, "T20 D20"),
+    (CheckInOut.DOUBLE, 50, 1, "D25"),
+    (CheckInOut.DOUBLE, 32, 1, "D16"),
+    (CheckInOut.DOUBLE, 3, 2, "1 D1"),
+    (CheckInOut.DOUBLE, 1, 0, ""),
+    (CheckInOut.DOUBLE, 169, 4, ""),
+    (CheckInOut.DOUBLE, 501, 9, ""),
+    (CheckInOut.MASTER, 180, 3, "T20 T20 T20"),
+    (CheckInOut.MASTER, 3, 1, "T1"),
+    (CheckInOut.STRAIGHT, 1, 1, "1"),
+    (CheckInOut.STRAIGHT, 501, 9, ""),
+]
+
+
+@pytest.mark.parametrize("check_out,score,darts,route", checkout_data)
+def test_checkout(check_out: CheckInOut, score: int, darts: int, route: str) -> None:
+    table = get_checkout_table(check_out, 501)
+    assert (table.darts_needed(score) or 0) == darts
+    assert table.suggest(score) == route
+
+
+@pytest.mark.parametrize("check_out", list(CheckInOut))
+def test_routes(check_out: CheckInOut) -> None:
+    table = get_checkout_table(check_out, 501)
+    for score in range(1, 181):
+        routes = table.routes_for(score)
+        if not routes:
+            assert (table.darts_needed(score) or 4) > 3
+            continue
+        assert len(routes[0]) == table.darts_needed(score)
+        for route in routes:
+            throws = [Throw(dart) for dart in route]
+            assert sum(throw.calc_score() for throw in throws) == score
+            assert is_checking_dart(throws[-1], check_out)
+
+
+def test_cache_file(tmp_path: Path) -> None:
+    table = get_checkout_table(CheckInOut.DOUBLE, 301)  # already in memory
+    cached = get_checkout_table(CheckInOut.DOUBLE, 301, cache_dir=str(tmp_path))
+    assert cached == table
+    assert load_checkout_table_from_file(
+        str(tmp_path / "checkout_double_301.json")
+    ) == CheckoutTable.build(CheckInOut.DOUBLE, 301)
+
+
+def test_no_cache_file_by_default(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    get_checkout_table(CheckInOut.MASTER, 170)
+    assert not list(tmp_path.iterdir())
+
+
+def test_prepared_in_background() -> None:
+    assert prepare_checkout_table(CheckInOut.STRAIGHT, 171) is None
+    building[(CheckInOut.STRAIGHT, 171)].join()
+    table = prepare_checkout_table(CheckInOut.STRAIGHT, 171)
+    assert table == CheckoutTable.build(CheckInOut.STRAIGHT, 171)
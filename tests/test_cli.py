@@ -0,0 +1,27 @@
+import io
+
+from src.cli import FrameRenderer, build_layout, format_stats
+from src.scoreboard import Stats
+
+
+def test_render_only_changed_lines() -> None:
+    stream = io.StringIO()
+    renderer = FrameRenderer(stream)
+    renderer.render(["a", "b", "c"], 0)
+    assert stream.getvalue() == "\r\033[2Ka\n\033[2Kb\n\033[2Kc\n\033[J"
+    stream.truncate(0)
+    stream.seek(0)
+    renderer.render(["a", "x", "c", "d"], 4)
+    assert stream.getvalue() == "\033[4F\033[1E\033[2Kx\n\033[1E\033[2Kd\n\033[J"
+    stream.truncate(0)
+    stream.seek(0)
+    renderer.render(["a", "x"], 5)
+    assert stream.getvalue() == "\033[5F\033[2E\033[J"
+
+
+def test_layout_matches_player_lines() -> None:
+    layout = build_layout(("a", "a long player name"))
+    line = format_stats(Stats(player="a", sets=1, legs=2, score=301), layout)
+    assert line == "a:\t\t\t1\t2\t301\t0\t0.00\t"
+    assert layout.header == "Player\t\t\tSets\tLegs\tScore\tDarts\tAverage\t"
+    assert len(layout.title) == len(layout.footer) == line.count("\t") * 8
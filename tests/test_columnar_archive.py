@@ -0,0 +1,105 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.columnar_archive import ColumnarArchive, SEGMENTS
+from src.game_archive import GameArchive
+from src.game_options import CheckInOut, GameOptions, InputMethod
+from tests.helpers import play_match
+from tests.test_game_archive import a_wins, game_options
+
+c_scores = ["20", "20", "20", "t20", "0", "0"]
+round_options = GameOptions(
+    sets=1,
+    legs=1,
+    start_points=301,
+    check_out=CheckInOut.STRAIGHT,
+    input_method=InputMethod.ROUND,
+)
+round_match = ["180", "100", "121"]
+
+matches = [
+    (game_options, ["a", "b"], a_wins, 10),
+    (game_options, ["c", "a"], c_scores, 20),
+    (round_options, ["a", "b"], round_match, 30),
+]
+
+
+@pytest.fixture
+def archive(tmp_path: Path) -> ColumnarArchive:
+    archive = ColumnarArchive(str(tmp_path))
+    for options, players, throws, played_at in matches:
+        archive.add_game(play_match(options, players, throws), played_at)
+    return archive
+
+
+def test_columns_are_mapped(archive: ColumnarArchive) -> None:
+    darts = sum(len(throws) for *_, throws, _ in matches)
+    for name in ["games", "players", "segments", "points", "darts"]:
+        assert isinstance(archive.column(name), np.memmap)
+        assert len(archive.column(name)) == darts
+    # the won games end with the empty leg the scoreboard opened after the win
+    assert list(archive.column("legs")) == [0, 3, 8, 8, 14, 17]
+    assert archive.selected("points", None) is archive.column("points")
+
+
+def test_averages_match_game_archive(archive: ColumnarArchive) -> None:
+    game_archive = GameArchive(":memory:")
+    for options, players, throws, played_at in matches:
+        game_archive.add_game(play_match(options, players, throws), played_at)
+    for name, average in archive.averages().items():
+        assert average == pytest.approx(game_archive.career_stats(name).average)
+    three_darts = archive.game_mask(game_options=game_options)
+    assert list(three_darts) == [True, True, False]
+    assert archive.averages(three_darts)["a"] == pytest.approx(
+        game_archive.career_stats("a", game_options=game_options).average
+    )
+    assert archive.averages(archive.game_mask(since=15, until=25))["b"] == 0
+
+
+def test_average_trend(archive: ColumnarArchive) -> None:
+    scoreboards = [play_match(*match[:3]) for match in matches]
+    expected = [
+        next(
+            stats.average for stats in scoreboard.get_all_stats() if stats.player == "a"
+        )
+        for scoreboard in scoreboards
+    ]
+    assert archive.average_trend("a") == pytest.approx(expected)
+    assert archive.average_trend("c") == pytest.approx([60])
+    assert len(archive.average_trend("nobody")) == 0
+    assert len(archive.average_trend("a", archive.game_mask(until=15))) == 1
+
+
+def test_segment_heatmap(archive: ColumnarArchive) -> None:
+    heatmap = archive.segment_heatmap()
+    assert heatmap.shape == (3, SEGMENTS)
+    assert heatmap.sum() == len(a_wins) + len(c_scores)  # no whole visits
+    assert heatmap[2, 20] == 5
+    assert heatmap[1, 20] == 2
+    assert heatmap[0, 0] == 2
+    assert archive.segment_heatmap("c")[0, 20] == 3
+
+
+def test_reopen_and_interrupted_write(archive: ColumnarArchive, tmp_path: Path) -> None:
+    averages = archive.averages()
+    with open(tmp_path / "points.col", "ab") as file:
+        file.write(b"\x01\x02\x03")  # columns of a game without its index line
+    with open(tmp_path / "games.jsonl", "a") as file:
+        file.write('{"game_id": 3')
+    reopened = ColumnarArchive(str(tmp_path))
+    assert len(reopened.games) == 3
+    assert reopened.averages() == averages
+    reopened.add_game(play_match(game_options, ["d"], ["t20"]), played_at=40)
+    again = ColumnarArchive(str(tmp_path))
+    assert again.player_ids == {"a": 0, "b": 1, "c": 2, "d": 3}
+    assert again.averages()["d"] == 180
+    assert again.averages()["a"] == averages["a"]
+
+
+def test_empty_archive(tmp_path: Path) -> None:
+    archive = ColumnarArchive(str(tmp_path))
+    assert archive.averages() == {}
+    assert archive.segment_heatmap().sum() == 0
+    assert len(archive.column("players")) == 0
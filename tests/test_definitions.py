@@ -1,6 +1,6 @@
 import pytest
-from src.game_options import InputMethod
-from src.throw import Throw
+from src.game_options import InputMethod, IMPOSSIBLE_SCORES
+from src.throw import Throw, THROW_TABLE
 
 valid_test_data = [
     ("t20", InputMethod.THREEDARTS, 60),
@@ -43,3 +43,19 @@ invalid_test_data = [
 def test_invalid_throw(input_score: str, input_method: InputMethod) -> None:
     with pytest.raises(ValueError):
         Throw(input_score, input_method)
+
+
+@pytest.mark.parametrize("input_score,input_method,_", valid_test_data)
+def test_throw_is_interned(input_score: str, input_method: InputMethod, _: int) -> None:
+    throw = Throw(input_score, input_method)
+    assert Throw(throw.input_score, input_method) is throw
+    with pytest.raises(AttributeError):
+        throw.input_score = "t19"
+
+
+def test_throw_table() -> None:
+    assert len(THROW_TABLE[InputMethod.THREEDARTS]) == 65
+    assert len(THROW_TABLE[InputMethod.ROUND]) == 181 - len(IMPOSSIBLE_SCORES)
+    assert Throw("05") is Throw("5")
+    assert Throw("d25").calc_score() == 50
+    assert Throw("d25").is_double and not Throw("t20").is_double
@@ -0,0 +1,93 @@
+import tracemalloc
+from dataclasses import replace
+from pathlib import Path
+from typing import Optional
+
+import pytest
+
+from src.folded_legs import BoundedScoreboard, FoldedLeg
+from src.game_options import GameOptions, InputMethod
+from src.scoreboard import Scoreboard
+from src.throw import Throw
+from tests.helpers import match_options, play, random_throws, state_of, with_players
+
+
+@pytest.mark.parametrize("spill", [False, True])
+@pytest.mark.parametrize("input_method", list(InputMethod))
+def test_same_as_scoreboard(
+    tmp_path: Path, spill: bool, input_method: InputMethod
+) -> None:
+    game_options = replace(match_options(40, input_method), sets=10, legs=3)
+    throws = random_throws(match_options(40, input_method), 2, 40)
+    expected = play(with_players(Scoreboard(game_options)), throws)
+    spill_file = str(tmp_path / "legs.bin") if spill else None
+    bounded = play(with_players(BoundedScoreboard(game_options, spill_file)), throws)
+    assert state_of(bounded) == state_of(expected)
+    assert all(
+        isinstance(leg, FoldedLeg) for dset in bounded.history[:-1] for leg in dset
+    )
+    assert spill == (not bounded.store.nbytes())
+    for scoreboard in [expected, bounded]:
+        for _ in range(100):  # back over several legs and a set
+            scoreboard.undo_throw()
+    assert state_of(bounded) == state_of(expected)
+    for scoreboard in [expected, bounded]:
+        for _ in range(50):
+            scoreboard.redo_throw()
+        scoreboard.seek(3)
+        scoreboard.seek(len(scoreboard.timeline) - 10)
+        scoreboard.add_throw(*scoreboard.current_player()[:1], throws[0], 0)
+    assert state_of(bounded) == state_of(expected)
+
+
+def test_leg_summary() -> None:
+    game_options = GameOptions(sets=1, legs=3, start_points=101)
+    darts = ["t20", "t20", "1", "1", "1", "1", "d20"]
+    bounded = play(with_players(BoundedScoreboard(game_options)), darts)
+    (leg,) = bounded.history[0][:-1]
+    assert isinstance(leg, FoldedLeg)
+    assert (leg.darts, leg.winner) == (7, 0)
+    assert leg.points == [101, 3]  # a busted the first visit
+    assert leg.thrown == [5, 3]
+    assert [turn.throw.input_score for turn in leg] == darts
+
+
+def traced_memory(scoreboard: Scoreboard, throws: list[Throw]) -> int:
+    # memory still held after playing, the throws are interned
+    tracemalloc.start()
+    play(scoreboard, throws)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return memory
+
+
+@pytest.mark.parametrize(
+    "game_options", [GameOptions(sets=1, legs=1000), GameOptions(sets=1000, legs=1)]
+)
+@pytest.mark.parametrize("spill", [None, "legs.bin"])
+def test_memory_stays_flat(
+    tmp_path: Path, spill: Optional[str], game_options: GameOptions
+) -> None:
+    spill_file = str(tmp_path / spill) if spill else None
+    for legs in [50, 250]:
+        scoreboard = with_players(BoundedScoreboard(game_options, spill_file))
+        memory = traced_memory(scoreboard, random_throws(game_options, 2, legs))
+        # the live leg and the aggregates, besides the packed legs kept in memory
+        # and the spare room of their buffers
+        assert memory - scoreboard.store.nbytes() * 1.2 < 10_000
+        assert bool(spill) == (not scoreboard.store.nbytes())
+        scoreboard.close()
+
+
+def test_limits() -> None:
+    with pytest.raises(ValueError):
+        BoundedScoreboard(GameOptions(start_points=100_001))
+    scoreboard = BoundedScoreboard(GameOptions())
+    for player in range(256):
+        scoreboard.register_player(str(player))
+    with pytest.raises(ValueError):
+        scoreboard.register_player("256")
+    game_options = GameOptions(start_points=100)
+    scoreboard = play(with_players(BoundedScoreboard(game_options)), ["d25"] * 2)
+    with pytest.raises(ValueError):  # the summaries have a slot per player
+        scoreboard.register_player("c")
@@ -0,0 +1,48 @@
+import pytest
+
+from src.game_archive import GameArchive
+from src.game_options import GameOptions
+from tests.helpers import play_match
+
+game_options = GameOptions(sets=1, legs=2, start_points=101)
+# a wins the first leg, b busts in the second one and a wins it as well
+a_wins = ["t20", "1", "d20", "t20", "t20", "t20", "1", "d20"]
+
+
+@pytest.fixture
+def archive() -> GameArchive:
+    archive = GameArchive(":memory:")
+    archive.add_game(play_match(game_options, ["a", "b"], a_wins), played_at=10)
+    archive.add_game(play_match(game_options, ["a", "c"], a_wins), played_at=20)
+    return archive
+
+
+def test_career_matches_scoreboard(archive: GameArchive) -> None:
+    scoreboard = play_match(game_options, ["a", "b"], a_wins)
+    stats_a, stats_b = scoreboard.get_all_stats()
+    career = archive.career_stats("a")
+    assert career.games == 2
+    assert career.wins == 2
+    assert career.legs_won == 4
+    assert career.darts == 2 * stats_a.darts
+    assert career.average == pytest.approx(stats_a.average)
+    assert career.darts_per_leg == 3
+    assert career.highest_finish == 101
+    assert archive.career_stats("b").average == pytest.approx(stats_b.average)
+
+
+def test_filtered_career(archive: GameArchive) -> None:
+    assert archive.career_stats("a", since=15) == archive.career_stats(
+        "a", opponent="c"
+    )
+    assert archive.career_stats("a", until=15).games == 1
+    assert archive.career_stats("a", game_options=GameOptions()).games == 0
+    unfiltered = archive.career_stats("a", game_options=game_options)
+    assert unfiltered == archive.career_stats("a")
+    assert archive.career_stats("nobody").games == 0
+
+
+def test_head_to_head(archive: GameArchive) -> None:
+    assert archive.head_to_head("a", "b") == (1, 1, 0)
+    assert archive.head_to_head("c", "a") == (1, 0, 1)
+    assert archive.head_to_head("b", "c") == (0, 0, 0)
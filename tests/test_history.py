@@ -0,0 +1,59 @@
+import pytest
+
+from src.history import MAX_PLAYERS, ColumnarHistory
+from src.game_options import CheckInOut, GameOptions, InputMethod
+from src.scoreboard import Player
+from tests.helpers import play_match
+
+three_darts = GameOptions(sets=2, legs=2, start_points=101)
+to_win = ["t20", "1", "d20", "0", "0", "0"]
+history_data: list[tuple[GameOptions, list[str]]] = [
+    (three_darts, []),
+    (three_darts, ["t20", "d25", "t19"]),
+    (three_darts, to_win),
+    (three_darts, to_win * 2),
+    (three_darts, to_win * 2 + ["t20"]),
+    (
+        GameOptions(
+            sets=1,
+            legs=2,
+            start_points=301,
+            check_out=CheckInOut.STRAIGHT,
+            input_method=InputMethod.ROUND,
+        ),
+        ["180", "100", "121", "60"],
+    ),
+]
+
+
+@pytest.mark.parametrize("game_options,throws", history_data)
+def test_round_trip(game_options: GameOptions, throws: list[str]) -> None:
+    scoreboard = play_match(game_options, ["a", "b"], throws)
+    columnar = ColumnarHistory.from_history(
+        scoreboard.get_history(), scoreboard.get_players(), game_options.input_method
+    )
+    assert len(columnar) == len(throws)
+    assert columnar.views() == scoreboard.get_history()
+    rebuilt = ColumnarHistory.from_history(
+        columnar.to_history(), scoreboard.get_players(), game_options.input_method
+    )
+    assert rebuilt.views() == scoreboard.get_history()
+
+
+@pytest.mark.parametrize("game_options,throws", history_data)
+def test_pop_matches_undo(game_options: GameOptions, throws: list[str]) -> None:
+    scoreboard = play_match(game_options, ["a", "b"], throws)
+    columnar = ColumnarHistory.from_history(
+        scoreboard.get_history(), scoreboard.get_players(), game_options.input_method
+    )
+    while scoreboard.undo_throw():
+        columnar.pop()
+        assert columnar.views() == scoreboard.get_history()
+    assert columnar.pop() is None
+
+
+def test_player_limit() -> None:
+    players = [Player(idf, str(idf)) for idf in range(MAX_PLAYERS + 1)]
+    ColumnarHistory(players[:MAX_PLAYERS])
+    with pytest.raises(ValueError):
+        ColumnarHistory(players)
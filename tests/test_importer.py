@@ -0,0 +1,64 @@
+import csv
+from pathlib import Path
+
+import pytest
+
+from src.game_archive import GameArchive
+from src.importer import LEGACY_COLUMNS, ImportProgress, import_legacy
+
+
+def write_legacy_file(file_name: Path) -> None:
+    to_win = ["t20", "1", "d20"]
+    matches = {
+        "1": [("a", throw) for throw in to_win * 2],
+        "2": [("a", throw) for throw in to_win]
+        + [("b", "t20"), ("b", "0"), ("b", "0"), ("a", "t20")],
+        "3": [("a", "t20"), ("a", "x20")],  # invalid throw
+        # b starts the second leg
+        "4": [("a", throw) for throw in to_win] + [("a", "t20"), ("b", "0")],
+        "5": [("c", "20"), ("c", "0"), ("c", "0"), ("a", "d25")],
+    }
+    with open(file_name, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(LEGACY_COLUMNS)
+        for match, rows in matches.items():
+            for player, throw in rows:
+                writer.writerow(
+                    [match, "2015-03-01", "101", "Double", "1", "2", player, throw]
+                )
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_import(tmp_path: Path, workers: int) -> None:
+    write_legacy_file(tmp_path / "legacy.csv")
+    archive = GameArchive(":memory:")
+    progress = import_legacy(
+        str(tmp_path / "legacy.csv"), archive, workers=workers, matches_per_chunk=2
+    )
+    assert (progress.matches, progress.rejected, progress.darts) == (5, 2, 24)
+    assert archive.career_stats("a").games == 3
+    assert archive.career_stats("a").wins == 1
+    assert archive.career_stats("c").average == 20
+
+
+def test_resume(tmp_path: Path) -> None:
+    write_legacy_file(tmp_path / "legacy.csv")
+    archive = GameArchive(str(tmp_path / "archive.sqlite"))
+
+    def interrupt(progress: ImportProgress) -> None:
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        import_legacy(
+            str(tmp_path / "legacy.csv"),
+            archive,
+            workers=0,
+            matches_per_chunk=2,
+            report=interrupt,
+        )
+    assert archive.career_stats("a").games == 2
+    progress = import_legacy(
+        str(tmp_path / "legacy.csv"), archive, workers=0, matches_per_chunk=2
+    )
+    assert (progress.skipped, progress.matches) == (2, 3)
+    assert archive.career_stats("a").games == 3
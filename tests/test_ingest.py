@@ -0,0 +1,102 @@
+import time
+import threading
+from pathlib import Path
+
+import pytest
+
+from src.darts import XOhOneGame
+from src.game_options import GameOptions, ThrowReturn
+from src.ingest import BoardSnapshot, Renderer, StreamSource, ThrowIngestor, open_source
+from src.throw import Throw
+
+game_options = GameOptions(sets=3, legs=3, start_points=301)
+
+
+def new_ingestor(options: GameOptions = game_options) -> ThrowIngestor:
+    game = XOhOneGame(["a", "b"], options)
+    game.start_game()
+    return ThrowIngestor(game)
+
+
+def test_sources_applied_in_order() -> None:
+    ingestor = new_ingestor()
+    sources = [
+        threading.Thread(
+            target=lambda name=name: [
+                ingestor.submit(name, throw) for throw in ["1", "5", "d2"] * 10
+            ]
+        )
+        for name in ["board", "keypad", "app"]
+    ]
+    for source in sources:
+        source.start()
+    for source in sources:
+        source.join()
+    ingestor.flush()
+    ingestor.close()
+    assert ingestor.applied == {"board": 30, "keypad": 30, "app": 30}
+    assert ingestor.snapshot.seq == 91
+    stats = ingestor.snapshot.stats
+    assert sum(stat.darts for stat in stats) == 90
+    assert sum(301 - stat.score for stat in stats) == 30 * (1 + 5 + 4)
+
+
+def test_undo_redo_and_validation() -> None:
+    ingestor = new_ingestor()
+    with pytest.raises(ValueError):
+        ingestor.submit("keypad", "t25")
+    for text in ["t20", "t20", "undo", "redo", "undo"]:
+        ingestor.submit("keypad", text)
+    ingestor.flush()
+    snapshot = ingestor.snapshot
+    assert (snapshot.player, snapshot.remaining, snapshot.dart) == ("a", 241, 1)
+    assert [turn.throw.input_score for turn in snapshot.last_turns] == ["t20"]
+    with pytest.raises(AttributeError):
+        snapshot.remaining = 0  # type: ignore[misc]
+    ingestor.close()
+
+
+def test_won_game_rejects_input() -> None:
+    ingestor = new_ingestor(GameOptions(sets=1, legs=1, start_points=101))
+    for text in ["t20", "1", "d20"]:
+        ingestor.submit("board", text)
+    ingestor.submit("board", "t20")
+    ingestor.submit("keypad", "exit")
+    ingestor.close()
+    assert ingestor.snapshot.finished
+    assert ingestor.rejected == {"board": 1, "keypad": 1}
+
+
+def test_stream_sources(tmp_path: Path) -> None:
+    ingestor = new_ingestor()
+    recording = tmp_path / "board.log"
+    recording.write_text("t20\n\n# warmup over\nt20\nbull\nt19\n")
+    board = open_source(ingestor, "board", str(recording))
+    keypad = StreamSource(ingestor, "keypad", iter(["1\n", "x\n", "2\n"])).start()
+    board.join()
+    keypad.join()
+    ingestor.flush()
+    ingestor.close()
+    assert ingestor.applied == {"board": 3, "keypad": 2}
+    assert len(board.errors) == 1 and board.errors[0].startswith("bull")
+    assert len(keypad.errors) == 1
+
+
+def test_renderer_latency() -> None:
+    ingestor = new_ingestor()
+    frames: list[BoardSnapshot] = []
+    renderer = Renderer(ingestor, frames.append)
+    for _ in range(50):
+        ingestor.submit("board", "5")
+    ingestor.flush()
+    ingestor.close()
+    for _ in range(1000):  # the last snapshot is always drawn
+        if frames and frames[-1].seq == ingestor.snapshot.seq:
+            break
+        time.sleep(0.001)
+    renderer.stop()
+    assert ingestor.apply_latency.calls == 50
+    assert 0 < renderer.latency.calls <= 50
+    assert renderer.latency.percentile(50) >= ingestor.apply_latency.percentile(1)
+    assert [frame.seq for frame in frames] == sorted({frame.seq for frame in frames})
+    assert frames[-1].stats[0].darts + frames[-1].stats[1].darts == 50
@@ -0,0 +1,67 @@
+import pytest
+
+from src.darts import XOhOne
+from src.game_options import CheckInOut, GameOptions
+from src.instrumentation import CallStats, Instrumentation
+from src.scoreboard import Scoreboard
+from src.throw import Throw
+from tests.test_darts import TestingUI as DartsUI
+
+GAME_PATHS = [
+    ("src.darts", "XOhOne", "do_player_round"),
+    ("src.scoreboard", "Scoreboard", "add_throw"),
+    ("src.scoreboard", "Scoreboard", "current_player"),
+    ("src.throw", "Throw", "__new__"),
+]
+
+
+@pytest.fixture
+def instrumentation():
+    instrumentation = Instrumentation()
+    yield instrumentation
+    instrumentation.disable()
+
+
+def test_counts_calls_of_a_game(instrumentation: Instrumentation) -> None:
+    add_throw = Scoreboard.add_throw
+    instrumentation.enable(GAME_PATHS)
+    assert Scoreboard.add_throw is not add_throw
+    game_options = GameOptions(sets=1, legs=1, start_points=60)
+    game_options.check_out = CheckInOut.STRAIGHT
+    game = XOhOne(DartsUI("t20"), ["a"], game_options)
+    game.play()
+    stats = instrumentation.stats
+    assert stats["XOhOne.do_player_round"].calls == 1
+    assert stats["Scoreboard.add_throw"].calls == 1
+    assert stats["Scoreboard.current_player"].calls == 3
+    assert sum(stats["XOhOne.do_player_round"].buckets) == 1
+    assert Throw("t20") is Throw("t20")
+    assert "Scoreboard.add_throw" in instrumentation.report()
+    instrumentation.disable()
+    assert Scoreboard.add_throw is add_throw
+    Throw("t20")
+    assert stats["Throw.__new__"].calls == 3  # the one of the UI and two above
+    instrumentation.reset()
+    assert stats["Throw.__new__"].calls == 0
+
+
+def test_memory_deltas(instrumentation: Instrumentation) -> None:
+    instrumentation.enable(GAME_PATHS[1:2], trace_memory=True)
+    scoreboard = Scoreboard(GameOptions())
+    player = scoreboard.register_player("a")
+    for dart in range(100):
+        scoreboard.add_throw(player, Throw("1"), dart % 3)
+    stats = instrumentation.stats["Scoreboard.add_throw"]
+    assert stats.calls == 100
+    assert stats.memory > 0
+    assert "memory kB" in instrumentation.report()
+
+
+def test_percentiles() -> None:
+    stats = CallStats()
+    for elapsed in [100] * 90 + [5000] * 9 + [70000]:
+        stats.add(elapsed)
+    assert stats.percentile(50) == 128
+    assert stats.percentile(90) == 128
+    assert stats.percentile(99) == 8192
+    assert stats.percentile(100) == 70000
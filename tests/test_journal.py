@@ -0,0 +1,48 @@
+from pathlib import Path
+
+from src.darts import XOhOne
+from src.journal import GameJournal, read_journal, replay
+from src.game_options import GameOptions, ThrowReturn
+from src.throw import Throw
+from tests.test_darts import TestingUI as DartsUI
+
+
+class ScriptedUI(DartsUI):
+    def __init__(self, throws: list[str]):
+        super().__init__("0")
+        self.throws = iter(throws)
+
+    def read_throw(
+        self, player: str, remaining_score: int, dart: int
+    ) -> tuple[ThrowReturn, Throw]:
+        throw = next(self.throws)
+        if throw == "undo":
+            return ThrowReturn.UNDO, Throw("0")
+        return ThrowReturn.THROW, Throw(throw)
+
+
+def test_replay(tmp_path: Path) -> None:
+    file_name = str(tmp_path / "journal.jsonl")
+    game_options = GameOptions(sets=2, legs=2, start_points=101)
+    to_win = ["t20", "1", "d20"]
+    throws = to_win + ["t20", "undo", "t19", "undo", "undo", "d20"] + to_win * 3
+    with GameJournal(file_name, fsync_every=2) as journal:
+        game = XOhOne(ScriptedUI(throws), ["a"], game_options, journal)
+        game.play()
+    events = list(read_journal(file_name))
+    assert [event["event"] for event in events].count("leg") == 5
+    assert [event["event"] for event in events].count("set") == 2
+    scoreboards = replay(events)
+    assert list(scoreboards) == [journal.game_id]
+    replayed = scoreboards[journal.game_id]
+    assert replayed.get_all_stats() == game.scoreboard.get_all_stats()
+    assert replayed.is_win("game", replayed.get_players()[0])
+
+
+def test_torn_line(tmp_path: Path) -> None:
+    file_name = tmp_path / "journal.jsonl"
+    with GameJournal(str(file_name)) as journal:
+        journal.start_game(GameOptions())
+    with open(file_name, "a") as file:
+        file.write('{"event": "thr')
+    assert [event["event"] for event in read_journal(str(file_name))] == ["game"]
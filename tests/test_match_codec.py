@@ -0,0 +1,108 @@
+import json
+
+import pytest
+
+from src.game_options import CheckInOut, GameOptions, InputMethod, SetLegMode
+from src.match_codec import (
+    HEADER,
+    decode_history,
+    decode_match,
+    decode_matches,
+    decode_options,
+    encode_match,
+    encode_matches,
+    encode_options,
+)
+from src.scoreboard import Scoreboard
+from src.throw import Throw
+from tests.helpers import match_options, play_match, random_throws
+
+
+def play(game_options: GameOptions, players: int, throws: list[Throw]) -> Scoreboard:
+    names = [f"player {player + 1}" for player in range(players)]
+    return play_match(game_options, names, throws)
+
+
+def history_rows(scoreboard: Scoreboard) -> list[list[list[tuple]]]:
+    return [
+        [
+            [(turn.player, turn.score, turn.throw, turn.throw_in_round) for turn in leg]
+            for leg in dset
+        ]
+        for dset in scoreboard.get_history()
+    ]
+
+
+@pytest.mark.parametrize("seed", range(2))
+@pytest.mark.parametrize("players, legs", [(1, 2), (2, 7), (3, 5)])
+@pytest.mark.parametrize("input_method", list(InputMethod))
+def test_round_trip(
+    input_method: InputMethod, players: int, legs: int, seed: int
+) -> None:
+    throws = random_throws(match_options(legs, input_method), players, legs, seed)
+    game_options = match_options(legs, input_method)
+    game_options.legs = 2  # sets of several legs with a moving start player
+    game_options.start_player = 1
+    scoreboard = play(game_options, players, throws)
+    data = encode_match(scoreboard)
+    options, players, history = decode_history(data)
+    assert options == game_options
+    assert players == scoreboard.get_players()
+    assert history == scoreboard.get_history()
+    decoded = decode_match(data)
+    assert history_rows(decoded) == history_rows(scoreboard)
+    assert decoded.get_all_stats() == scoreboard.get_all_stats()
+    assert decoded.current_player() == scoreboard.current_player()
+
+
+def test_one_byte_per_dart() -> None:
+    scoreboard = play(match_options(100), 2, random_throws(match_options(100), 2, 100))
+    darts = sum(len(leg) for dset in scoreboard.get_history() for leg in dset)
+    data = encode_match(scoreboard)
+    sets = len(scoreboard.get_history())
+    # header, names, 2 bytes per set, 4 bytes per leg and one byte per dart
+    assert len(data) == HEADER.size + 1 + 2 * 9 + 4 + 2 * sets + 4 * sets + darts
+    as_json = json.dumps(
+        [
+            {"player": turn.player.idf, "throw": turn.throw.input_score}
+            for dset in scoreboard.get_history()
+            for leg in dset
+            for turn in leg
+        ]
+    )
+    assert len(data) * 5 < len(as_json)
+
+
+def test_out_of_turn_dart() -> None:
+    scoreboard = play(GameOptions(sets=1, legs=1, start_points=101), 2, [])
+    a, b = scoreboard.get_players()
+    scoreboard.add_throw(a, Throw("t20"), 0)
+    scoreboard.add_throw(b, Throw("20"), 0)  # b throws before a finished
+    scoreboard.add_throw(a, Throw("1"), 1)
+    data = encode_match(scoreboard)
+    _, _, history = decode_history(data)
+    assert history == scoreboard.get_history()
+
+
+def test_options_and_archive() -> None:
+    game_options = GameOptions(
+        sets=3,
+        legs=5,
+        start_points=301,
+        check_out=CheckInOut.STRAIGHT,
+        win_mode=SetLegMode.BESTOF,
+        input_method=InputMethod.ROUND,
+        start_player=2,
+    )
+    assert decode_options(encode_options(game_options)) == game_options
+    with pytest.raises(ValueError):
+        decode_options(b"{" + encode_options(game_options)[1:])
+    scoreboards = [
+        play(GameOptions(sets=1, legs=1, start_points=101), 2, [Throw("t20")]),
+        play(game_options, 3, [Throw("180", InputMethod.ROUND)]),
+        play(GameOptions(), 1, []),
+    ]
+    decoded = decode_matches(encode_matches(scoreboards))
+    assert [history_rows(match) for match in decoded] == [
+        history_rows(match) for match in scoreboards
+    ]
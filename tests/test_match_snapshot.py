@@ -0,0 +1,165 @@
+import os
+import time
+import threading
+from pathlib import Path
+
+import pytest
+
+from src.darts import XOhOne, XOhOneGame
+from src.folded_legs import BoundedScoreboard, FoldedLeg, LegStore
+from src.game_options import GameOptions, ThrowReturn
+from src.journal import GameJournal, read_journal, replay
+from src.match_snapshot import MatchSnapshots, load_snapshot, resume_match
+from src.throw import Throw
+from tests.helpers import (
+    match_options,
+    play,
+    play_match,
+    random_throws,
+    state_of,
+    with_players,
+)
+from tests.test_journal import ScriptedUI
+
+game_options = GameOptions(sets=3, legs=3, start_points=101)
+to_win = ["t20", "1", "d20"]
+
+
+class CrashingUI(ScriptedUI):
+    def read_throw(
+        self, player: str, remaining_score: int, dart: int
+    ) -> tuple[ThrowReturn, Throw]:
+        try:
+            return super().read_throw(player, remaining_score, dart)
+        except StopIteration:
+            raise KeyboardInterrupt  # the board PC goes down
+
+
+def crash(tmp_path: Path, throws: list[str], save_every: int = 5) -> XOhOne:
+    snapshots = MatchSnapshots(str(tmp_path / "snapshot.bin"), save_every)
+    with GameJournal(str(tmp_path / "journal.jsonl")) as journal:
+        game = XOhOne(
+            CrashingUI(throws), ["a", "b"], game_options, journal, None, snapshots
+        )
+        with pytest.raises(KeyboardInterrupt):
+            game.play()
+    return game
+
+
+def resume(tmp_path: Path):
+    return resume_match(str(tmp_path / "snapshot.bin"), str(tmp_path / "journal.jsonl"))
+
+
+def test_resume_replays_journal_tail(tmp_path: Path) -> None:
+    throws = to_win + ["t20", "undo", "t19", "undo", "undo", "d20"] + to_win + ["5"]
+    game = crash(tmp_path, throws)
+    resumed = resume(tmp_path)
+    assert resumed
+    assert 0 < resumed.replayed < len(throws)
+    assert state_of(resumed.scoreboard) == state_of(game.scoreboard)
+    events = list(read_journal(str(tmp_path / "journal.jsonl")))
+    assert resumed.events == len(events)
+    (replayed,) = replay(events).values()
+    assert state_of(resumed.scoreboard)[:6] == state_of(replayed)[:6]
+
+
+def test_resumed_game_continues(tmp_path: Path) -> None:
+    crash(tmp_path, to_win + ["t20", "undo"])
+    resumed = resume(tmp_path)
+    assert resumed
+    assert resumed.scoreboard.redo_throw()  # the undone dart can still be redone
+    resumed.scoreboard.undo_throw()
+    snapshots = MatchSnapshots(str(tmp_path / "snapshot.bin"), 5)
+    with GameJournal(str(tmp_path / "journal.jsonl")) as journal:
+        game = XOhOne(
+            ScriptedUI(to_win * 40), ["a", "b"], game_options, journal, None, snapshots
+        )
+        game.resume(resumed)
+        game.play_rounds()
+    assert any(
+        game.scoreboard.is_win("game", player) for player in game.scoreboard.players
+    )
+    assert not os.path.exists(tmp_path / "snapshot.bin")  # nothing left to resume
+    (replayed,) = replay(read_journal(str(tmp_path / "journal.jsonl"))).values()
+    assert replayed.get_all_stats() == game.scoreboard.get_all_stats()
+
+
+def test_snapshot_is_replaced_atomically(tmp_path: Path) -> None:
+    crash(tmp_path, to_win + ["t20"] * 4, save_every=2)
+    assert sorted(os.listdir(tmp_path)) == ["journal.jsonl", "snapshot.bin"]
+    assert resume_match(str(tmp_path / "missing.bin")) is None
+
+
+def test_resume_long_match_fast(tmp_path: Path) -> None:
+    scoreboard = play_match(
+        GameOptions(sets=100, legs=1),
+        ["a", "b"],
+        random_throws(match_options(60), 2, 60),
+    )
+    MatchSnapshots(str(tmp_path / "snapshot.bin")).save(scoreboard, None)
+    started = time.perf_counter()
+    loaded = load_snapshot(str(tmp_path / "snapshot.bin"))
+    elapsed = time.perf_counter() - started
+    assert loaded
+    assert state_of(loaded[0]) == state_of(scoreboard)
+    loaded[0].seek(0)
+    loaded[0].seek(len(loaded[0].timeline))
+    assert loaded[0].get_all_stats() == scoreboard.get_all_stats()
+    assert elapsed < 0.05  # thousands of darts
+
+
+def test_snapshot_written_after_journal(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    file_name = str(tmp_path / "journal.jsonl")
+    snapshot_file = str(tmp_path / "snapshot.bin")
+    fsync = os.fsync
+    synced_by: list[threading.Thread] = []
+    monkeypatch.setattr(
+        os,
+        "fsync",
+        lambda fd: synced_by.append(threading.current_thread()) or fsync(fd),
+    )
+    with GameJournal(file_name, fsync_every=1000, fsync_interval=60) as journal:
+        game = XOhOneGame(["a", "b"], game_options, journal)
+        game.start_game()
+        for throw in to_win + ["t20", "t19"]:
+            game.apply_input(ThrowReturn.THROW, Throw(throw))
+        MatchSnapshots(snapshot_file).save(game.scoreboard, journal)
+        journal.sync()
+        events = list(read_journal(file_name))
+        assert len(events) == journal.events  # on disk before the snapshot
+        loaded = load_snapshot(snapshot_file)
+        assert loaded and loaded[2] == events[-1]["seq"]
+    assert synced_by and threading.main_thread() not in synced_by
+
+
+@pytest.mark.parametrize("spill", [False, True])
+def test_folded_legs_snapshot(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, spill: bool
+) -> None:
+    spill_file = str(tmp_path / "legs.bin") if spill else None
+    scoreboard = with_players(
+        BoundedScoreboard(GameOptions(sets=1, legs=100), spill_file)
+    )
+    play(scoreboard, random_throws(match_options(30), 2, 30)[:-20])
+    for _ in range(3):
+        scoreboard.undo_throw()
+    expected = state_of(scoreboard)
+    with monkeypatch.context() as patched:
+        # the darts of folded legs are neither read nor decoded
+        patched.setattr(LegStore, "load", lambda *_: pytest.fail("darts loaded"))
+        MatchSnapshots(str(tmp_path / "snapshot.bin")).save(scoreboard, None)
+        loaded = load_snapshot(str(tmp_path / "snapshot.bin"))
+    assert loaded
+    restored = loaded[0]
+    assert isinstance(restored, BoundedScoreboard)
+    assert isinstance(restored.history[0][0], FoldedLeg)
+    assert state_of(restored) == expected
+    for board in [scoreboard, restored]:
+        assert board.redo_throw()
+        board.seek(0)
+        board.seek(len(board.timeline))
+    assert restored.get_all_stats() == scoreboard.get_all_stats()
+    scoreboard.close()
+    restored.close()
@@ -0,0 +1,83 @@
+import pytest
+
+from src.game_archive import GameArchive
+from src.ratings import EloFormula, Ratings, independent_groups
+from tests.helpers import play_match
+from tests.test_game_archive import a_wins, game_options
+
+b_wins = ["1", "1", "1", "t20", "1", "d20", "t20", "1", "d20"]
+
+
+def rated_archive(games: list[tuple[list[str], list[str], float]]) -> Ratings:
+    ratings = Ratings(GameArchive(":memory:"))
+    for players, throws, played_at in games:
+        ratings.add_game(play_match(game_options, players, throws), played_at)
+    return ratings
+
+
+def state_of(ratings: Ratings) -> tuple[list, list]:
+    return (
+        ratings.connection.execute("SELECT * FROM ratings ORDER BY 1").fetchall(),
+        ratings.connection.execute("SELECT * FROM rating_history").fetchall(),
+    )
+
+
+league = [
+    (["a", "b"], a_wins, 10),
+    (["c", "d"], a_wins, 15),
+    (["a", "c"], b_wins, 20),
+    (["e", "f"], a_wins, 25),
+    (["b", "d"], a_wins, 30),
+]
+
+
+def test_formula() -> None:
+    formula = EloFormula()
+    assert formula.rate([1500, 1500], [(1, 2), (0, 0)]) == [1516, 1484]
+    assert formula.rate([1600, 1400], [(1, 0), (1, 0)]) == pytest.approx(
+        [1600 - 8.31, 1400 + 8.31], abs=0.01
+    )
+    three = formula.rate([1500, 1500, 1500], [(1, 2), (0, 1), (0, 0)])
+    assert sum(three) == pytest.approx(4500)
+    assert three[0] > three[1] > three[2]
+
+
+def test_incremental_ratings() -> None:
+    ratings = rated_archive(league[:1])
+    assert ratings.rating("a") == 1516
+    assert ratings.rating("b") == 1484
+    assert ratings.rating("nobody") == 1500
+    ratings = rated_archive(league)
+    assert ratings.rating("c") > 1516  # beat a higher rated player
+    assert ratings.leaderboard(2)[0][0] == "c"
+    games = {name: games for name, _, games in ratings.leaderboard()}
+    assert games == {"a": 2, "b": 2, "c": 2, "d": 2, "e": 1, "f": 1}
+
+
+def test_point_in_time() -> None:
+    ratings = rated_archive(league)
+    assert ratings.rating("a", at=10) == 1500
+    assert ratings.rating("a", at=11) == 1516
+    assert ratings.rating("a", at=21) == ratings.rating("a")
+    assert ratings.rating("b", at=30) == 1484
+
+
+def test_unfinished_and_late_games() -> None:
+    in_order = rated_archive(league)
+    late = rated_archive(league[1:] + league[:1])  # an older game imported later
+    late.add_game(play_match(game_options, ["a", "b"], ["t20"]), 40)
+    assert late.leaderboard() == in_order.leaderboard()
+    assert late.rating("a", at=21) == in_order.rating("a", at=21)
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_rebuild(workers: int) -> None:
+    ratings = rated_archive(league)
+    incremental = state_of(ratings)
+    assert len(independent_groups(ratings.rated_games())) == 2
+    ratings.rebuild(EloFormula(k=16), workers=workers)
+    assert ratings.rating("a", at=11) == 1508
+    ratings.rebuild(EloFormula(), workers=workers)
+    rebuilt = state_of(ratings)
+    assert rebuilt[0] == pytest.approx(incremental[0])
+    assert sorted(rebuilt[1]) == pytest.approx(sorted(incremental[1]))
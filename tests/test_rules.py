@@ -0,0 +1,93 @@
+import pytest
+
+from src.rules import get_rule_table, evaluate, BUST, LEG_WON
+from src.scoreboard import Scoreboard
+from src.game_options import GameOptions, CheckInOut, InputMethod
+from src.throw import Throw, THROWS
+
+rule_data: list[tuple[CheckInOut, CheckInOut, int, str, int, bool, bool]] = [
+    (CheckInOut.DOUBLE, CheckInOut.STRAIGHT, 501, "t20", 441, False, False),
+    (CheckInOut.DOUBLE, CheckInOut.DOUBLE, 501, "t20", 501, False, False),
+    (CheckInOut.DOUBLE, CheckInOut.DOUBLE, 501, "d20", 461, False, False),
+    (CheckInOut.DOUBLE, CheckInOut.MASTER, 501, "20", 501, False, False),
+    (CheckInOut.DOUBLE, CheckInOut.MASTER, 501, "t20", 441, False, False),
+    (CheckInOut.DOUBLE, CheckInOut.STRAIGHT, 40, "d20", 0, False, True),
+    (CheckInOut.DOUBLE, CheckInOut.STRAIGHT, 20, "20", 20, True, False),
+    (CheckInOut.DOUBLE, CheckInOut.STRAIGHT, 41, "d20", 41, True, False),
+    (CheckInOut.MASTER, CheckInOut.STRAIGHT, 60, "t20", 0, False, True),
+    (CheckInOut.MASTER, CheckInOut.STRAIGHT, 40, "d20", 0, False, True),
+    (CheckInOut.MASTER, CheckInOut.STRAIGHT, 20, "20", 20, True, False),
+    (CheckInOut.MASTER, CheckInOut.STRAIGHT, 21, "20", 21, True, False),
+    (CheckInOut.MASTER, CheckInOut.STRAIGHT, 22, "20", 2, False, False),
+    (CheckInOut.STRAIGHT, CheckInOut.STRAIGHT, 20, "20", 0, False, True),
+    (CheckInOut.STRAIGHT, CheckInOut.STRAIGHT, 21, "20", 1, False, False),
+    (CheckInOut.STRAIGHT, CheckInOut.STRAIGHT, 19, "20", 19, True, False),
+]
+
+
+@pytest.mark.parametrize("check_out,check_in,score,throw,new_score,bust,won", rule_data)
+def test_lookup(
+    check_out: CheckInOut,
+    check_in: CheckInOut,
+    score: int,
+    throw: str,
+    new_score: int,
+    bust: bool,
+    won: bool,
+) -> None:
+    rules = get_rule_table(check_out, check_in, 501)
+    assert rules.lookup(score, Throw(throw)) == (new_score, bust, won)
+
+
+@pytest.mark.parametrize("check_out", list(CheckInOut))
+@pytest.mark.parametrize("check_in", list(CheckInOut))
+def test_table_matches_rules(check_out: CheckInOut, check_in: CheckInOut) -> None:
+    rules = get_rule_table(check_out, check_in, 301)
+    for score in range(0, 400, 7):
+        for throw in THROWS:
+            new_score, flag = evaluate(score, throw, check_out, check_in, 301)
+            assert rules.lookup(score, throw) == (
+                new_score,
+                bool(flag & BUST),
+                bool(flag & LEG_WON),
+            )
+
+
+def test_double_in_stats() -> None:
+    game_options = GameOptions(check_in=CheckInOut.DOUBLE)
+    scoreboard = Scoreboard(game_options)
+    player = scoreboard.register_player("player")
+    for dart, throw in enumerate(["t20", "20", "d20"]):
+        scoreboard.add_throw(player, Throw(throw), dart)
+    stats = scoreboard.get_all_stats()[0]
+    assert stats.score == 461
+    assert stats.darts == 3
+    assert stats.average == 40
+
+
+def test_straight_out_round() -> None:
+    game_options = GameOptions(
+        start_points=101, check_out=CheckInOut.STRAIGHT, input_method=InputMethod.ROUND
+    )
+    scoreboard = Scoreboard(game_options)
+    player = scoreboard.register_player("player")
+    scoreboard.add_throw(player, Throw("100", InputMethod.ROUND), 0)
+    assert scoreboard.get_remaining_score_of(player) == 1
+    assert not scoreboard.was_overthrow(player)
+
+
+def test_visit_totals_check_straight() -> None:
+    # a visit total is not a dart, it cannot be a double or master dart
+    straight = CheckInOut.STRAIGHT
+    for check in [CheckInOut.DOUBLE, CheckInOut.MASTER]:
+        for check_in, check_out in [(check, straight), (straight, check)]:
+            values = {"check_in": check_in.value, "check_out": check_out.value}
+            with pytest.raises(ValueError):
+                GameOptions(
+                    check_in=check_in,
+                    check_out=check_out,
+                    input_method=InputMethod.ROUND,
+                )
+            with pytest.raises(ValueError):
+                GameOptions.from_dict({**values, "input_method": 1})
+    GameOptions(check_out=straight, input_method=InputMethod.ROUND)
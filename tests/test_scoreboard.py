@@ -3,6 +3,7 @@ import pytest
 from src.scoreboard import Scoreboard, is_overthrow
 from src.game_options import GameOptions, CheckInOut, InputMethod
 from src.throw import Throw
+from tests.helpers import play
 
 
 current_player_data: list[tuple[int, int, int]] = [
@@ -171,3 +172,93 @@ def test_is_overthrow(
         is_overthrow(remaining_score, Throw(last_throw), game_options.check_out)
         == result
     )
+
+
+to_win_twice = ["t20", "1", "d20", "t20", "1", "d20", "t20", "t20", "5"]
+undo_data: list[tuple[CheckInOut, list[str], int, int]] = [
+    (CheckInOut.DOUBLE, to_win_twice, 1, 1),
+    (CheckInOut.DOUBLE, to_win_twice, 1, 3),
+    (CheckInOut.DOUBLE, to_win_twice, 1, 4),
+    (CheckInOut.DOUBLE, to_win_twice, 1, 7),
+    (CheckInOut.DOUBLE, to_win_twice, 2, 1),
+    (CheckInOut.DOUBLE, to_win_twice, 2, 5),
+    (CheckInOut.STRAIGHT, to_win_twice, 1, 2),
+    (CheckInOut.STRAIGHT, to_win_twice, 2, 6),
+]
+
+
+@pytest.mark.parametrize("check_out,throws,players,undos", undo_data)
+def test_stats_after_undo(
+    check_out: CheckInOut, throws: list[str], players: int, undos: int
+) -> None:
+    game_options = GameOptions(sets=2, legs=2, start_points=101, check_out=check_out)
+    undone = Scoreboard(game_options)
+    replayed = Scoreboard(game_options)
+    for name in ["a", "b"][:players]:
+        undone.register_player(name)
+        replayed.register_player(name)
+    play(undone, throws)
+    for _ in range(undos):
+        assert undone.undo_throw()
+    play(replayed, throws[: len(throws) - undos])
+    assert undone.get_all_stats() == replayed.get_all_stats()
+    assert undone.current_player() == replayed.current_player()
+    assert undone.start_player_of_leg() == replayed.start_player_of_leg()
+
+
+@pytest.mark.parametrize("check_out,throws,players,undos", undo_data)
+def test_redo_after_undo(
+    check_out: CheckInOut, throws: list[str], players: int, undos: int
+) -> None:
+    game_options = GameOptions(sets=2, legs=2, start_points=101, check_out=check_out)
+    redone = Scoreboard(game_options)
+    played = Scoreboard(game_options)
+    for name in ["a", "b"][:players]:
+        redone.register_player(name)
+        played.register_player(name)
+    play(redone, throws)
+    play(played, throws)
+    for _ in range(undos):
+        assert redone.undo_throw()
+    for _ in range(undos):
+        assert redone.redo_throw()
+    assert not redone.redo_throw()
+    assert redone.get_history() == played.get_history()
+    assert redone.get_all_stats() == played.get_all_stats()
+    assert redone.current_player() == played.current_player()
+
+
+def test_throw_after_undo_drops_redo() -> None:
+    scoreboard = Scoreboard(GameOptions())
+    scoreboard.register_player("a")
+    play(scoreboard, ["t20", "t20", "t20"])
+    scoreboard.undo_throw()
+    play(scoreboard, ["20"])
+    assert not scoreboard.redo_throw()
+    assert scoreboard.get_remaining_score_of(scoreboard.players[0]) == 361
+
+
+@pytest.mark.parametrize("players", [1, 2, 3])
+def test_seek(players: int) -> None:
+    game_options = GameOptions(sets=20, legs=5, start_points=101)
+    names = ["a", "b", "c"][:players]
+    throws = (["t20", "t7", "d10", "25", "0", "t19", "d20", "t20"] * 80)[:600]
+    scoreboard = Scoreboard(game_options)
+    for name in names:
+        scoreboard.register_player(name)
+    play(scoreboard, throws)
+    darts = scoreboard.position
+    for dart_index in [0, 500, 3, 130, 129, 70, darts, 1, darts - 200]:
+        scoreboard.seek(dart_index)
+        replayed = Scoreboard(game_options)
+        for name in names:
+            replayed.register_player(name)
+        for turn in scoreboard.timeline[:dart_index]:
+            play(replayed, [turn.throw.input_score])
+        assert scoreboard.position == dart_index
+        assert scoreboard.get_history() == replayed.get_history()
+        assert scoreboard.get_all_stats() == replayed.get_all_stats()
+        assert scoreboard.current_player() == replayed.current_player()
+        assert scoreboard.start_player_of_leg() == replayed.start_player_of_leg()
+    with pytest.raises(ValueError):
+        scoreboard.seek(darts + 1)
@@ -0,0 +1,77 @@
+from pathlib import Path
+
+import pytest
+
+from src.game_options import InputMethod
+from src.scoreboard_benchmark import (
+    BASELINE_FILE,
+    DEFAULT_CASES,
+    OPERATIONS,
+    BenchmarkCase,
+    CaseResult,
+    find_regressions,
+    find_scaling_regressions,
+    load_baseline,
+    options_of,
+    synthetic_match,
+)
+from tests.helpers import play_match
+
+
+@pytest.mark.parametrize("input_method", list(InputMethod))
+def test_synthetic_match(input_method: InputMethod) -> None:
+    case = BenchmarkCase(players=3, legs=4, input_method=input_method)
+    throws = synthetic_match(case)
+    assert throws == synthetic_match(case)
+    names = [str(player) for player in range(case.players)]
+    scoreboard = play_match(options_of(case), names, throws)
+    assert sum(tally.sets for tally in scoreboard.tallies) == case.legs
+
+
+def test_find_scaling_regressions() -> None:
+    cases = [BenchmarkCase(2, legs) for legs in [1, 10, 100]]
+    results = [
+        CaseResult(case=case.name, darts=10, ns_per_call=dict.fromkeys(OPERATIONS, 900))
+        for case in cases
+    ]
+    results[1].ns_per_call = dict.fromkeys(OPERATIONS, 100)
+    results[2].ns_per_call = {**dict.fromkeys(OPERATIONS, 250), "get_all_stats": 400}
+    assert find_scaling_regressions(cases, results) == [
+        "2p-100l-threedarts get_all_stats: 400 ns (2p-10l-threedarts 100 ns)"
+    ]
+
+
+def test_baseline_is_found_from_any_directory(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    assert load_baseline() == load_baseline(BASELINE_FILE)
+
+
+def test_baseline_covers_default_cases() -> None:
+    baseline = load_baseline(BASELINE_FILE)
+    assert sorted(baseline) == sorted(case.name for case in DEFAULT_CASES)
+
+
+def test_find_regressions() -> None:
+    baseline = {
+        "case": {
+            **dict.fromkeys(OPERATIONS, 1000),
+            "peak_memory": 1000,
+            "calibration_ns": 100,
+        }
+    }
+    result = CaseResult(
+        case="case",
+        darts=10,
+        ns_per_call={**dict.fromkeys(OPERATIONS, 1000), "add_throw": 1600},
+        peak_memory=1300,
+        calibration=100,
+    )
+    assert find_regressions([result], baseline) == [
+        "case add_throw: 1600 ns (baseline 1000 ns)",
+        "case peak memory: 1300 B (baseline 1000 B)",
+    ]
+    result.calibration = 200  # a machine half as fast
+    result.peak_memory = 1000
+    assert find_regressions([result], baseline) == []
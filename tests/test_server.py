@@ -0,0 +1,95 @@
+import asyncio
+from unittest.mock import Mock
+
+import pytest
+
+from src.game_options import GameOptions, InputMethod
+from src.server import BENCHMARK_THROWS, GameHost, benchmark
+
+
+def test_benchmark_games_finish() -> None:
+    games_per_second, throws_per_second = asyncio.run(benchmark(20))
+    assert games_per_second > 0
+    assert throws_per_second == pytest.approx(games_per_second * len(BENCHMARK_THROWS))
+
+
+def test_boards_are_independent() -> None:
+    async def play() -> None:
+        host = GameHost()
+        options = {"start_points": 101, "sets": 1, "legs": 1}
+        first = (await host.handle_request({"op": "new", "players": ["a"]}))["game"]
+        second = (
+            await host.handle_request(
+                {"op": "new", "players": ["b", "c"], "options": options}
+            )
+        )["game"]
+        state = await host.submit(first, "t20")
+        assert (state["player"], state["remaining"], state["dart"]) == ("a", 441, 1)
+        state = await host.submit(second, "t20")
+        assert (state["player"], state["remaining"], state["dart"]) == ("b", 41, 1)
+        assert (await host.submit(second, "t21"))["error"].startswith("Wrong input")
+        assert (await host.submit(second, "undo"))["remaining"] == 101
+        assert (await host.submit(second, "redo"))["remaining"] == 41
+        await host.submit(second, "1")
+        state = await host.submit(second, "d20")
+        assert state["finished"]
+        assert [stats["sets"] for stats in state["stats"]] == [1, 0]
+        assert second not in host.boards
+        assert "error" in await host.submit(second, "t20")
+        assert (await host.handle_request({"op": "state", "game": first}))[
+            "remaining"
+        ] == 441
+        assert (await host.submit(first, "exit"))["finished"]
+        assert host.finished_games == 2
+
+    asyncio.run(play())
+
+
+def test_new_game_options() -> None:
+    async def new_game() -> GameOptions:
+        host = GameHost()
+        game = await host.handle_request(
+            {"op": "new", "players": ["a"], "options": {"check_out": "straight"}}
+        )
+        return host.boards[game["game"]].game.game_options
+
+    assert asyncio.run(new_game()).check_out.value == "straight"
+
+
+def test_round_input() -> None:
+    async def play() -> dict:
+        host = GameHost()
+        options = {"input_method": InputMethod.ROUND.value, "check_out": "straight"}
+        game = await host.handle_request(
+            {"op": "new", "players": ["a"], "options": options}
+        )
+        return await host.submit(game["game"], "140")
+
+    assert asyncio.run(play())["remaining"] == 361
+
+
+def test_queued_inputs_answered_when_game_ends() -> None:
+    async def play(fail: bool) -> list:
+        host = GameHost()
+        options = {"start_points": 101, "sets": 1, "legs": 1}
+        game = (
+            await host.handle_request(
+                {"op": "new", "players": ["a"], "options": options}
+            )
+        )["game"]
+        await host.submit(game, "t20")
+        if fail:
+            host.boards[game].game.apply_input = Mock(side_effect=RuntimeError)
+        # clients that submitted at the same time as the winning dart
+        answers = await asyncio.gather(
+            *(host.submit(game, throw) for throw in ["1", "d20", "t20", "t20"]),
+            return_exceptions=True,
+        )
+        await asyncio.sleep(0)
+        return answers
+
+    *_, won, late, later = asyncio.run(asyncio.wait_for(play(False), 5))
+    assert won["finished"]
+    assert late["error"] == later["error"] == "game finished"
+    answers = asyncio.run(asyncio.wait_for(play(True), 5))
+    assert all(answer["error"] == "game finished" for answer in answers)
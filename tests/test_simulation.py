@@ -0,0 +1,56 @@
+import pytest
+import numpy as np
+
+from src.simulation import PlayerModel, aim_point, hit_codes, simulate_matches
+from src.game_options import GameOptions, CheckInOut
+from src.throw import Throw
+
+
+@pytest.mark.parametrize("target", ["t20", "d16", "5", "t1", "d25", "25", "d6"])
+def test_aim_point_hits_target(target: str) -> None:
+    x, y = aim_point(Throw(target))
+    if target == "25":  # the bull is aimed at the center
+        target = "d25"
+    assert hit_codes(np.array([x]), np.array([y]))[0] == Throw(target).code
+
+
+def test_simulation_is_deterministic() -> None:
+    game_options = GameOptions(sets=1, legs=2, start_points=301)
+    models = [PlayerModel("a", 15), PlayerModel("b", 30)]
+    in_process = simulate_matches(game_options, models, 300, 100, workers=0, seed=3)
+    in_pool = simulate_matches(game_options, models, 300, 100, workers=2, seed=3)
+    assert in_process == in_pool
+    assert sum(in_process.win_probabilities()) == pytest.approx(1)
+    assert sum(in_process.leg_win_probabilities()) == pytest.approx(1)
+    assert in_process.win_probabilities()[0] > in_process.win_probabilities()[1]
+
+
+def test_perfect_player() -> None:
+    game_options = GameOptions(sets=1, legs=1, check_out=CheckInOut.DOUBLE)
+    result = simulate_matches(game_options, [PlayerModel("a", 0.1)], 10, workers=0)
+    assert result.mean_darts_per_leg() == [9]
+    assert result.averages() == [pytest.approx(167)]
+
+
+def test_double_in() -> None:
+    models = [PlayerModel("a", 15), PlayerModel("b", 30)]
+    straight = simulate_matches(
+        GameOptions(sets=1, legs=1, start_points=301), models, 500, workers=0
+    )
+    double_in = simulate_matches(
+        GameOptions(sets=1, legs=1, start_points=301, check_in=CheckInOut.DOUBLE),
+        models,
+        500,
+        workers=0,
+    )
+    assert 0.5 < double_in.win_probabilities()[0] < 1
+    for player in range(2):
+        # the darts spent on getting in lower the average but not to zero
+        assert 0 < double_in.averages()[player] < straight.averages()[player]
+        assert double_in.mean_darts_per_leg()[player] < 60
+
+
+def test_unfinished_legs() -> None:
+    game_options = GameOptions(sets=1, legs=1, check_in=CheckInOut.DOUBLE)
+    with pytest.raises(ValueError):
+        simulate_matches(game_options, [PlayerModel("a", 2000)], 10, workers=0)
@@ -0,0 +1,132 @@
+import json
+import asyncio
+import threading
+from typing import Any
+
+import pytest
+
+import src.spectator
+from src.darts import XOhOneGame
+from src.game_options import GameOptions, ThrowReturn
+from src.spectator import ScoreboardDeltas, SpectatorFeed
+from src.throw import Throw
+
+game_options = GameOptions(sets=2, legs=1, start_points=101)
+
+
+def new_game(feed: SpectatorFeed) -> XOhOneGame:
+    game = XOhOneGame(["a", "b"], game_options, feed=feed)
+    game.start_game()
+    return game
+
+
+def throw(game: XOhOneGame, *throws: str) -> None:
+    for dart in throws:
+        game.apply_input(ThrowReturn.THROW, Throw(dart))
+
+
+def test_deltas() -> None:
+    feed = SpectatorFeed()
+    game = new_game(feed)
+    deltas = ScoreboardDeltas()
+    assert deltas.reset(game.scoreboard)["state"]["players"] == ["a", "b"]
+    throw(game, "t20")
+    assert deltas.changes(game.scoreboard) == {
+        "throws": [[0, "t20", 0]],
+        "stats": [[0, {"score": 41, "darts": 1, "average": 180.0}]],
+    }
+    assert deltas.changes(game.scoreboard) == {}
+    throw(game, "1", "d20")
+    message = deltas.changes(game.scoreboard)
+    assert message["throws"] == [[0, "1", 1], [0, "d20", 2]]
+    assert message["won"] == ["set", 0]
+    assert message["stats"][0][1]["sets"] == 1
+    game.apply_input(ThrowReturn.UNDO, Throw("0"))
+    message = deltas.changes(game.scoreboard)
+    assert message["undo"] == 1
+    assert message["stats"] == [
+        [0, {"sets": 0, "score": 40, "darts": 2, "average": 91.5}]
+    ]
+
+
+def test_feed_messages() -> None:
+    feed = SpectatorFeed()
+    viewer = feed.subscribe()
+    game = new_game(feed)
+    throw(game, "t20", "1")
+    game.apply_input(ThrowReturn.UNDO, Throw("0"))
+    game.apply_input(ThrowReturn.REDO, Throw("0"))
+    messages = []
+    while not viewer.queue.empty():
+        messages.append(json.loads(viewer.queue.get_nowait()))
+    assert [message["seq"] for message in messages] == [0, 1, 2, 3, 4, 5]
+    assert messages[0]["state"]["players"] == []  # nothing was published yet
+    assert messages[1]["state"]["players"] == ["a", "b"]
+    assert [list(message)[1] for message in messages[2:]] == [
+        "throws",
+        "throws",
+        "undo",
+        "throws",
+    ]
+
+
+def test_serialized_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    dumps = []
+    original_dumps = json.dumps
+
+    def counting_dumps(message: Any, **kwargs: Any) -> str:
+        dumps.append(message)
+        return original_dumps(message, **kwargs)
+
+    monkeypatch.setattr(src.spectator.json, "dumps", counting_dumps)
+    feed = SpectatorFeed()
+    viewers = [feed.subscribe() for _ in range(50)]
+    dumps.clear()
+    game = new_game(feed)
+    throw(game, "t20", "1", "d20")
+    assert len(dumps) == 4
+    assert all(viewer.queue.qsize() == 5 for viewer in viewers)
+
+
+def test_slow_viewer_gets_state() -> None:
+    feed = SpectatorFeed(queue_size=2)
+    slow = feed.subscribe()
+    game = new_game(feed)
+    throw(game, "t20", "1", "d20")
+    messages = [json.loads(slow.queue.get_nowait()) for _ in range(slow.queue.qsize())]
+    state = next(message for message in messages if "state" in message)
+    assert state["state"]["stats"][0]["sets"] == 1
+    assert messages[-1]["seq"] == 4
+
+
+def test_viewers_over_socket() -> None:
+    feed = SpectatorFeed()
+    port = feed.start_in_thread(port=0)
+
+    async def watch(ready: threading.Event, count: int) -> list[Any]:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        first = json.loads(await reader.readline())
+        ready.set()
+        messages = [first] + [
+            json.loads(await reader.readline()) for _ in range(count - 1)
+        ]
+        writer.close()
+        return messages
+
+    results: list[list[Any]] = []
+    viewers = []
+    for _ in range(3):
+        ready = threading.Event()
+        viewer = threading.Thread(
+            target=lambda ready=ready: results.append(asyncio.run(watch(ready, 5)))
+        )
+        viewer.start()
+        ready.wait(5)
+        viewers.append(viewer)
+    game = new_game(feed)  # played in this thread, the feed runs in its own
+    throw(game, "t20", "1", "d20")
+    for viewer in viewers:
+        viewer.join(5)
+    assert len(results) == 3
+    assert results[0] == results[1] == results[2]
+    assert results[0][-1]["won"] == ["set", 0]
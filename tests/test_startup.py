@@ -0,0 +1,99 @@
+import os
+import sys
+import time
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from src.game_options import (
+    CheckInOut,
+    GameOptions,
+    InputMethod,
+    load_game_opt_from_file,
+)
+
+# modules that are not needed before the first prompt, a slower start shows
+# up as one of them being imported by main
+DEFERRED_MODULES = [
+    "colorama",
+    "dataclasses_json",
+    "marshmallow",
+    "numpy",
+    "sqlite3",
+    "asyncio",
+    "concurrent.futures",
+    "src.analytics",
+    "src.game_archive",
+    "src.server",
+    "src.simulation",
+    "src.tournament",
+]
+# import main may cost this many bare interpreter starts, about twice the current
+# cost. Both scale with the speed of the machine.
+STARTUP_RATIO = 10
+STARTUP_RUNS = 5
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def fastest_start(code: str) -> float:
+    times = []
+    for _ in range(STARTUP_RUNS):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def test_startup_defers_imports() -> None:
+    modules = subprocess.run(
+        [sys.executable, "-c", "import sys, main; print(' '.join(sys.modules))"],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.split()
+    assert [module for module in DEFERRED_MODULES if module in modules] == []
+
+
+def test_startup_time() -> None:
+    bare = fastest_start("pass")
+    assert fastest_start("import main") - bare < STARTUP_RATIO * bare
+
+
+@pytest.mark.parametrize(
+    "game_options",
+    [
+        GameOptions(),
+        GameOptions(
+            sets=3,
+            legs=5,
+            start_points=301,
+            check_in=CheckInOut.DOUBLE,
+            check_out=CheckInOut.MASTER,
+            start_player=2,
+        ),
+    ],
+)
+def test_game_options_round_trip(game_options: GameOptions, tmp_path: Path) -> None:
+    file_name = str(tmp_path / "game_opt.json")
+    game_options.save_to_file(file_name)
+    assert load_game_opt_from_file(file_name) == game_options
+
+
+def test_unchanged_options_are_not_rewritten(tmp_path: Path) -> None:
+    file_name = str(tmp_path / "game_opt.json")
+    GameOptions(sets=3).save_to_file(file_name)
+    os.utime(file_name, (0, 0))
+    GameOptions(sets=3).save_to_file(file_name)
+    assert os.path.getmtime(file_name) == 0
+    GameOptions(sets=4).save_to_file(file_name)
+    assert load_game_opt_from_file(file_name).sets == 4
+
+
+def test_old_options_file_format() -> None:
+    values = {"sets": 2, "check_out": "straight", "input_method": 3, "unknown": 1}
+    game_options = GameOptions.from_dict(values)
+    assert game_options.check_out == CheckInOut.STRAIGHT
+    assert game_options.input_method == InputMethod.THREEDARTS
+    assert game_options.to_dict()["check_out"] == "straight"
@@ -0,0 +1,169 @@
+import pytest
+
+from src.game_options import GameOptions
+from src.scoreboard import Scoreboard
+from src.simulation import PlayerModel
+from src.tournament import (
+    BYE,
+    KNOCKOUT,
+    MatchResult,
+    RecordedUI,
+    ReplayedMatch,
+    SimulatedMatch,
+    Tournament,
+    bracket_order,
+    circle_rounds,
+    result_of,
+    run_on_boards,
+    run_tournament,
+)
+
+
+def better_seed_wins(
+    game_options: GameOptions, home: str, away: str, seed: int
+) -> MatchResult:
+    winner, loser = sorted([home, away], key=lambda player: int(player[1:]))
+    return MatchResult(winner=winner, loser=loser, winner_legs=3, loser_legs=1)
+
+
+def seeded_players(count: int) -> list[str]:
+    return [f"p{seed}" for seed in range(1, count + 1)]
+
+
+def test_bracket_order() -> None:
+    assert bracket_order(8) == [0, 7, 3, 4, 1, 6, 2, 5]
+
+
+@pytest.mark.parametrize("players", [2, 5, 6])
+def test_circle_rounds(players: int) -> None:
+    rounds = circle_rounds(seeded_players(players))
+    pairings = [frozenset(pairing) for pairings in rounds for pairing in pairings]
+    assert len(pairings) == len(set(pairings)) == players * (players - 1) // 2
+    for pairings in rounds:
+        playing = [player for pairing in pairings for player in pairing]
+        assert len(playing) == len(set(playing))
+
+
+def test_round_robin_standings() -> None:
+    tournament = Tournament(GameOptions(), boards=2)
+    tournament.add_round_robin(seeded_players(5))
+    run_tournament(tournament, better_seed_wins, workers=0)
+    assert tournament.is_finished()
+    table = tournament.table()
+    assert [standing.player for standing in table] == seeded_players(5)
+    assert [standing.won for standing in table] == [4, 3, 2, 1, 0]
+    assert table[0].legs_for == 12 and table[0].legs_against == 4
+
+
+@pytest.mark.parametrize("players", [2, 5, 8, 13])
+def test_single_elimination(players: int) -> None:
+    tournament = Tournament(GameOptions(), boards=3)
+    tournament.add_single_elimination(seeded_players(players))
+    run_tournament(tournament, better_seed_wins, workers=0)
+    assert tournament.champion == "p1"
+    played = [match for match in tournament.matches if BYE not in match.players]
+    assert len(played) == players - 1
+
+
+@pytest.mark.parametrize("players", [2, 4, 6, 8, 16])
+def test_double_elimination(players: int) -> None:
+    tournament = Tournament(GameOptions(), boards=4)
+    tournament.add_double_elimination(seeded_players(players))
+    run_tournament(tournament, better_seed_wins, workers=0)
+    assert tournament.is_finished()
+    assert tournament.champion == "p1"
+    losses: dict[str, int] = {}
+    for match in tournament.matches:
+        assert match.result
+        losses[match.result.loser] = losses.get(match.result.loser, 0) + 1
+    losses.pop(BYE, None)
+    assert set(losses) == set(seeded_players(players)[1:])
+    assert set(losses.values()) == {2}
+
+
+def test_groups_then_knockout() -> None:
+    tournament = Tournament(GameOptions(), boards=4)
+    tournament.add_groups_then_knockout(seeded_players(16), groups=4, advance=2)
+    assert [len(standings) for standings in tournament.standings.values()] == [4] * 4
+    assert not any(
+        match.players[0] for match in tournament.matches if match.stage == "knockout"
+    )
+    run_tournament(tournament, better_seed_wins, workers=0)
+    assert tournament.is_finished()
+    assert [standing.player for standing in tournament.table("group A")] == [
+        "p1",
+        "p8",
+        "p9",
+        "p16",
+    ]
+    assert tournament.champion == "p1"
+
+
+def test_boards_and_busy_players() -> None:
+    tournament = Tournament(GameOptions(), boards=4)
+    tournament.add_round_robin(seeded_players(4))
+    assigned = tournament.assign_boards()
+    assert len(assigned) == 2
+    assert tournament.boards == [0, 1, None, None]
+    home, away = assigned[0].pairing()
+    result = better_seed_wins(GameOptions(), home, away, 0)
+    tournament.report_result(assigned[0].idf, result)
+    assert tournament.assign_boards() == []
+    assert tournament.boards == [None, 1, None, None]
+
+
+def test_simulated_season_is_reproducible() -> None:
+    models = {
+        name: PlayerModel(name, sigma=sigma)
+        for name, sigma in zip(seeded_players(6), [10, 14, 18, 22, 26, 30])
+    }
+    options = GameOptions(sets=1, legs=2)
+
+    def season(workers: int) -> list[tuple[int, int]]:
+        tournament = Tournament(options, boards=6)
+        tournament.add_round_robin(list(models))
+        run_tournament(tournament, SimulatedMatch(models), workers=workers, seed=4)
+        return [(standing.won, standing.legs_for) for standing in tournament.table()]
+
+    assert season(0) == season(2)
+
+
+def test_replayed_match() -> None:
+    options = GameOptions(sets=1, legs=1, start_points=101)
+    throws = {("a", "b"): ["t20", "0", "0", "t20", "t20", "t20", "1", "d20"]}
+    result = ReplayedMatch(throws)(options, "a", "b", 0)
+    assert result == MatchResult(winner="b", loser="a", winner_legs=1, loser_legs=0)
+    for throws in [["t20", "t25"], ["t20"]]:  # invalid and unfinished
+        with pytest.raises(ValueError):
+            ReplayedMatch({("a", "b"): throws})(options, "a", "b", 0)
+
+
+def test_matches_on_boards() -> None:
+    options = GameOptions(sets=1, legs=1, start_points=101)
+    tournament = Tournament(options, boards=2)
+    tournament.add_round_robin(seeded_players(4))
+    # the player throwing first wins every match
+    uis = [RecordedUI(["t20", "1", "d20"] * 6, options) for _ in range(2)]
+    run_on_boards(tournament, uis)
+    assert tournament.is_finished()
+    assert sum(standing.won for standing in tournament.table()) == 6
+    assert tournament.boards == [None, None]
+    assert all(
+        match.result and match.result.winner == match.players[0]
+        for match in tournament.matches
+    )
+
+
+def test_result_needs_a_finished_pairing() -> None:
+    scoreboard = Scoreboard(GameOptions())
+    for name in ["a", "b", "c"]:
+        scoreboard.register_player(name)
+    with pytest.raises(ValueError):
+        result_of(scoreboard)
+    unfinished = Scoreboard(GameOptions())
+    for name in ["a", "b"]:
+        unfinished.register_player(name)
+    with pytest.raises(ValueError):
+        result_of(unfinished)
+    with pytest.raises(ValueError):
+        Tournament(GameOptions()).add_match(KNOCKOUT, 0, ["a", None]).pairing()